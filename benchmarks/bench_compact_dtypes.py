@@ -0,0 +1,53 @@
+"""Compara memória e custo de serialização Parquet das saídas dos transformadores com e sem dtypes compactos.
+
+Uso: python -m benchmarks.bench_compact_dtypes --rows 1000000
+"""
+import argparse
+import io
+import logging
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import build_raw_bcb, build_raw_ibge
+from src.bcb_pipeline.transformer import transform_bcb_data
+from src.ibge_pipeline.transformer import transform_ibge_data
+
+
+def measure(df: pd.DataFrame) -> dict:
+    memory = df.memory_usage(deep=True).sum()
+    start = time.perf_counter()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+    elapsed = time.perf_counter() - start
+    return {"memory_mb": memory / 1e6, "parquet_mb": buffer.tell() / 1e6, "serialize_s": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    raw_bcb = build_raw_bcb(args.rows)
+    raw_ibge = build_raw_ibge(args.rows)
+    # A deduplicação por (data_referencia, codigo_serie, localidade_codigo) mantém a escala municipal
+    ibge_args = (raw_ibge, "6579", "9324", "População residente estimada")
+
+    cases = {
+        "bcb": (transform_bcb_data(raw_bcb, 11), transform_bcb_data(raw_bcb, 11, compact=True)),
+        "ibge": (transform_ibge_data(*ibge_args), transform_ibge_data(*ibge_args, compact=True)),
+    }
+
+    print(f"{'transformador':<14}{'modo':<10}{'memória MB':>12}{'parquet MB':>12}{'serializa s':>13}")
+    for name, (df_default, df_compact) in cases.items():
+        for mode, df in (("padrão", df_default), ("compacto", df_compact)):
+            result = measure(df)
+            print(f"{name:<14}{mode:<10}{result['memory_mb']:>12.1f}{result['parquet_mb']:>12.1f}{result['serialize_s']:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
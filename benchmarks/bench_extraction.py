@@ -0,0 +1,82 @@
+"""Mede a extração do BCB e do IBGE contra o servidor local (tests/fake_api_server.py), sem rede externa.
+
+Uso: python -m benchmarks.bench_extraction --latency 0.2 --localities 5570
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from src.bcb_pipeline import extractor as bcb_extractor
+from src.common.async_http import AsyncHttpClient, run_async
+from src.common.concurrency import run_concurrently
+from src.common.rate_control import configure_host_rate_limit
+from src.ibge_pipeline import extractor as ibge_extractor
+from tests.fake_api_server import FakeApiConfig, FakeApiServer
+
+
+def timed(func, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="latência por requisição (s)")
+    parser.add_argument("--localities", type=int, default=5570, help="municípios por período no IBGE")
+    parser.add_argument("--series", type=int, default=200, help="séries do SGS no cenário de muitas séries")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    config = FakeApiConfig(latency_seconds=args.latency, ibge_localities=args.localities)
+    with FakeApiServer(config) as server:
+        bcb_extractor.BCB_API_BASE_URL = server.bcb_url
+        ibge_extractor.IBGE_AGGREGATE_API_BASE_URL = server.ibge_url
+        # Sem limite de taxa no servidor local: mede só a concorrência de cada caminho
+        configure_host_rate_limit("127.0.0.1", 1_000_000, burst=1_000_000, max_concurrency=32)
+
+        print(f"{'cenário':<38}{'linhas':>10}{'segundos':>10}")
+        for workers in (1, 4):
+            df, elapsed = timed(
+                bcb_extractor.fetch_bcb_series_data_chunked, 11, "01/01/1986", "31/12/2024", max_workers=workers
+            )
+            print(f"{f'bcb backfill ({workers} workers)':<38}{len(df):>10}{elapsed:>10.3f}")
+
+        codes = list(range(1, args.series + 1))
+        frames, elapsed = timed(
+            run_concurrently,
+            lambda code: bcb_extractor.fetch_bcb_series_data(code, "01/01/2024", "31/01/2024"),
+            codes,
+            max_workers=4,
+        )
+        print(f"{f'bcb {len(codes)} séries (4 threads)':<38}{sum(map(len, frames)):>10}{elapsed:>10.3f}")
+
+        async def _fetch_all_async() -> list:
+            async with AsyncHttpClient(max_connections_per_host=32) as client:
+                return await asyncio.gather(*(
+                    bcb_extractor.fetch_bcb_series_data_async(client, code, "01/01/2024", "31/01/2024") for code in codes
+                ))
+
+        frames, elapsed = timed(run_async, _fetch_all_async())
+        print(f"{f'bcb {len(codes)} séries (async, 32/host)':<38}{sum(map(len, frames)):>10}{elapsed:>10.3f}")
+
+        df, elapsed = timed(
+            ibge_extractor.fetch_ibge_aggregate_data, "1737", "63", "-12", "N6[all]", max_values_per_request=None
+        )
+        print(f"{'ibge view=flat (corpo inteiro)':<38}{len(df):>10}{elapsed:>10.3f}")
+
+        for workers in (1, 4):
+            df, elapsed = timed(
+                ibge_extractor.fetch_ibge_aggregate_data, "1737", "63", "-12", "N6[all]", max_workers=workers
+            )
+            print(f"{f'ibge shards por UF ({workers} workers)':<38}{len(df):>10}{elapsed:>10.3f}")
+
+        rows, elapsed = timed(
+            lambda: sum(len(batch) for batch in ibge_extractor.fetch_ibge_aggregate_data_batches("1737", "63", "-12", "N6[all]"))
+        )
+        print(f"{'ibge view=flat (streaming, shards)':<38}{rows:>10}{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Mede a vazão de carga da staging e do MERGE usando o backend local (SQLite), sem GCP.
+
+Uso: python -m benchmarks.bench_local_warehouse --rows 1000000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.common.bigquery_operations import (
+    delete_staging_table,
+    load_df_to_staging_table,
+    merge_data_to_final_table
+)
+from src.common.local_warehouse import configure_local_warehouse
+
+
+def build_transformed(rows: int, series: int = 4, seed: int = 0) -> pd.DataFrame:
+    per_series = -(-rows // series)
+    dates = pd.date_range("1986-01-01", periods=per_series, freq="D")
+    return pd.DataFrame({
+        "data_referencia": np.tile(dates.to_numpy(), series)[:rows],
+        "codigo_serie": np.repeat(np.arange(1, series + 1), per_series)[:rows],
+        "valor_serie": np.random.default_rng(seed).uniform(0, 20, rows),
+    })
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    assert func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_local_warehouse(os.path.join(tmp_dir, "warehouse.sqlite"))
+        print(f"{'etapa':<22}{'segundos':>10}{'linhas/s':>14}")
+        # Primeira carga só insere; a segunda atualiza todas as chaves (caminho de revisão)
+        for label, seed in (("insere", 0), ("atualiza", 1)):
+            df = build_transformed(args.rows, seed=seed)
+            results = {
+                f"staging ({label})": timed(load_df_to_staging_table, df, "bench", "dataset", "stg"),
+                f"merge ({label})": timed(merge_data_to_final_table, "bench", "dataset", "stg", "final"),
+            }
+            delete_staging_table("bench", "dataset", "stg")
+            for step, elapsed in results.items():
+                print(f"{step:<22}{elapsed:>10.3f}{args.rows / elapsed:>14,.0f}")
+        configure_local_warehouse(None)
+
+
+if __name__ == "__main__":
+    main()
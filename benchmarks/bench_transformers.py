@@ -0,0 +1,127 @@
+"""Benchmark de escala dos transformadores (BCB e IBGE) com dados sintéticos sujos, comparado a baselines.
+
+Mede tempo (melhor de N execuções), pico de memória (tracemalloc) e linhas/s por transformador e
+tamanho. Sai com código 1 se algum caso regredir além da tolerância em relação ao baseline gravado.
+
+O caso de 1e7 linhas fica fora do padrão: com o tracemalloc ativo leva dezenas de minutos e
+alguns GB de memória. Rode-o explicitamente quando necessário.
+
+Uso:
+    python -m benchmarks.bench_transformers
+    python -m benchmarks.bench_transformers --sizes 1e3,1e4,1e5,1e6,1e7 --repeats 1
+    python -m benchmarks.bench_transformers --update-baseline
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from benchmarks.synthetic import build_raw_bcb, build_raw_ibge
+from src.bcb_pipeline.transformer import transform_bcb_data
+from src.ibge_pipeline.transformer import transform_ibge_data
+
+DEFAULT_SIZES = "1e3,1e4,1e5,1e6"
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "transformers.json")
+DIRTY_FRACTION = 0.02
+# Abaixo deste tempo as medições são dominadas por ruído e não contam como regressão
+MIN_COMPARABLE_SECONDS = 0.2
+
+TRANSFORMERS: Dict[str, tuple] = {
+    "bcb": (build_raw_bcb, lambda df: transform_bcb_data(df, 11)),
+    "ibge": (build_raw_ibge, lambda df: transform_ibge_data(df, "8888", "12606", "Produção industrial", period_type="mensal")),
+}
+
+
+def measure(transform: Callable[[pd.DataFrame], pd.DataFrame], df_raw: pd.DataFrame, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        transform(df_raw)
+        timings.append(time.perf_counter() - start)
+
+    # Pico de memória em uma execução separada: o rastreamento do tracemalloc distorce o tempo
+    gc.collect()
+    tracemalloc.start()
+    transform(df_raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = min(timings)
+    return {"seconds": seconds, "peak_mb": peak / 1e6, "rows_per_s": len(df_raw) / seconds}
+
+
+def compare(result: dict, baseline: dict, time_tolerance: float, memory_tolerance: float) -> List[str]:
+    regressions = []
+    if baseline["seconds"] >= MIN_COMPARABLE_SECONDS and result["seconds"] > baseline["seconds"] * (1 + time_tolerance):
+        regressions.append(f"tempo {result['seconds']:.3f}s > baseline {baseline['seconds']:.3f}s")
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + memory_tolerance):
+        regressions.append(f"memória {result['peak_mb']:.1f}MB > baseline {baseline['peak_mb']:.1f}MB")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="tamanhos separados por vírgula (ex.: 1e3,1e5)")
+    parser.add_argument("--transformers", default=",".join(TRANSFORMERS), help="subconjunto de: bcb,ibge")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.50)
+    parser.add_argument("--memory-tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f).get("results", {})
+
+    results = {}
+    failures = []
+    print(f"{'caso':<16}{'segundos':>10}{'pico MB':>10}{'linhas/s':>14}  status")
+    for name in args.transformers.split(","):
+        build_raw, transform = TRANSFORMERS[name]
+        for size in sizes:
+            key = f"{name}/{size}"
+            df_raw = build_raw(size, dirty_fraction=DIRTY_FRACTION)
+            result = measure(transform, df_raw, args.repeats)
+            del df_raw
+            results[key] = result
+
+            status = "sem baseline"
+            if key in baselines:
+                regressions = compare(result, baselines[key], args.time_tolerance, args.memory_tolerance)
+                status = "REGRESSÃO: " + "; ".join(regressions) if regressions else "ok"
+                if regressions:
+                    failures.append(key)
+            print(f"{key:<16}{result['seconds']:>10.3f}{result['peak_mb']:>10.1f}{result['rows_per_s']:>14,.0f}  {status}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        payload = {
+            "machine": {"python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform()},
+            "results": {**baselines, **results},
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+
+    if failures:
+        print(f"{len(failures)} caso(s) com regressão: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
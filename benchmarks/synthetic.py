@@ -0,0 +1,65 @@
+"""Geradores de DataFrames brutos sintéticos no formato das APIs (SGS do BCB e view=flat do IBGE).
+
+dirty_fraction controla a fração de linhas com valores sujos encontrados na prática: decimais com
+vírgula e marcadores de valor ausente ('...', '-', 'X', '') e datas/períodos inválidos.
+"""
+import numpy as np
+import pandas as pd
+
+BCB_INVALID_VALUES = np.array(["...", "", "-"])
+BCB_INVALID_DATES = np.array(["31/02/2020", "2020-01-01", "00/00/0000"])
+IBGE_INVALID_VALUES = np.array(["...", "-", "X"])
+IBGE_INVALID_PERIODS = np.array(["abc", "202313", ""])
+IBGE_HEADER = {
+    "NC": "Nível Territorial (Código)", "D1C": "Município (Código)", "D1N": "Município",
+    "D2C": "Mês (Código)", "MN": "Unidade de Medida", "V": "Valor",
+}
+
+
+def _dirty_mask(rng: np.random.Generator, rows: int, fraction: float) -> np.ndarray:
+    return rng.random(rows) < fraction
+
+
+def build_raw_bcb(rows: int, dirty_fraction: float = 0.0, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Datas formatadas uma vez e repetidas: o SGS nunca passa de algumas dezenas de milhares de dias
+    unique_dates = pd.date_range("1986-01-01", periods=min(rows, 100_000), freq="D").strftime("%d/%m/%Y").to_numpy()
+    dates = unique_dates[np.arange(rows) % len(unique_dates)].astype(object)
+    values = np.round(rng.uniform(0, 20, rows), 4).astype(str).astype(object)
+
+    if dirty_fraction:
+        comma = _dirty_mask(rng, rows, dirty_fraction)
+        values[comma] = np.char.replace(values[comma].astype(str), ".", ",")
+        invalid = _dirty_mask(rng, rows, dirty_fraction / 2)
+        values[invalid] = rng.choice(BCB_INVALID_VALUES, invalid.sum())
+        bad_dates = _dirty_mask(rng, rows, dirty_fraction / 2)
+        dates[bad_dates] = rng.choice(BCB_INVALID_DATES, bad_dates.sum())
+
+    return pd.DataFrame({"data": dates, "valor": values})
+
+
+def build_raw_ibge(rows: int, dirty_fraction: float = 0.0, seed: int = 0, municipios: int = 5570) -> pd.DataFrame:
+    """Linhas view=flat (com a linha de cabeçalho) de uma variável mensal em nível municipal."""
+    rng = np.random.default_rng(seed)
+    codigos = rng.integers(1100015, 5300108, size=municipios)
+    periodos = np.array([f"{year}{month:02d}" for year in range(1990, 2030) for month in range(1, 13)], dtype=object)
+    idx_municipio = np.arange(rows) % municipios
+    idx_periodo = (np.arange(rows) // municipios) % len(periodos)
+
+    values = rng.integers(800, 12_000_000, size=rows).astype(str).astype(object)
+    periods = periodos[idx_periodo].copy()
+    if dirty_fraction:
+        invalid = _dirty_mask(rng, rows, dirty_fraction)
+        values[invalid] = rng.choice(IBGE_INVALID_VALUES, invalid.sum())
+        bad_periods = _dirty_mask(rng, rows, dirty_fraction / 2)
+        periods[bad_periods] = rng.choice(IBGE_INVALID_PERIODS, bad_periods.sum())
+
+    df = pd.DataFrame({
+        "NC": "6",
+        "D1C": codigos[idx_municipio].astype(str),
+        "D1N": pd.Series([f"Município {code} - UF" for code in codigos])[idx_municipio].to_numpy(),
+        "D2C": periods,
+        "MN": "Pessoas",
+        "V": values,
+    })
+    return pd.concat([pd.DataFrame([IBGE_HEADER]), df], ignore_index=True)
@@ -1,17 +1,27 @@
-from airflow import DAG
-from airflow.operators.python import PythonOperator
-from airflow.utils.dates import days_ago
 import os
 import sys
 from datetime import timedelta
 
+import pendulum
+from airflow.exceptions import AirflowException
+
+try:
+    from airflow.sdk import DAG, task
+except ImportError:  # Airflow 2.x
+    from airflow import DAG
+    from airflow.decorators import task
+
 DAGS_FOLDER = os.path.dirname(os.path.realpath(__file__))
 SRC_PATH = os.path.join(DAGS_FOLDER, "src")
 if SRC_PATH not in sys.path:
     sys.path.append(SRC_PATH)
 
-from bcb_pipeline.main_bcb import run_all_bcb_pipelines
-from common.utils import setup_logging
+# No parse só o catálogo (módulo leve); pandas, BigQuery e Variables ficam para a execução da task
+from bcb_pipeline.config import SERIES_TO_PROCESS
+
+# Limites de paralelismo entre workers: pool do Airflow e número máximo de séries simultâneas
+BCB_DAG_POOL = os.getenv("BCB_DAG_POOL", "default_pool")
+BCB_DAG_MAX_ACTIVE_TASKS = int(os.getenv("BCB_DAG_MAX_ACTIVE_TASKS", "4"))
 
 default_args = {
     "owner": "airflow",
@@ -25,17 +35,21 @@ with DAG(
     dag_id="bcb_indicadores_pipeline",
     description="Pipeline diário de ingestão de dados do BCB",
     default_args=default_args,
-    schedule_interval="@daily",
-    start_date=days_ago(1),
+    schedule="@daily",
+    start_date=pendulum.datetime(2024, 1, 1, tz="America/Sao_Paulo"),
     catchup=False,
+    max_active_tasks=BCB_DAG_MAX_ACTIVE_TASKS,
     tags=["bcb", "bigquery"],
 ) as dag:
 
-    def run_bcb_pipeline():
+    # Uma task mapeada por série: falhas e retries ficam restritos à série afetada
+    @task(pool=BCB_DAG_POOL, max_active_tis_per_dag=BCB_DAG_MAX_ACTIVE_TASKS)
+    def run_bcb_series(serie: dict) -> None:
+        from bcb_pipeline.main_bcb import run_bcb_pipeline_for_serie
+        from common.utils import setup_logging
+
         setup_logging()
-        run_all_bcb_pipelines()
+        if not run_bcb_pipeline_for_serie(serie):
+            raise AirflowException(f"Pipeline da série {serie['name']} falhou.")
 
-    task = PythonOperator(
-        task_id="run_bcb_pipeline",
-        python_callable=run_bcb_pipeline,
-    )
+    run_bcb_series.expand(serie=SERIES_TO_PROCESS)
@@ -1,18 +1,28 @@
-from airflow import DAG
-from airflow.operators.python import PythonOperator
-from airflow.utils.dates import days_ago
 import os
 import sys
 from datetime import timedelta
 
+import pendulum
+from airflow.exceptions import AirflowException
+
+try:
+    from airflow.sdk import DAG, task
+except ImportError:  # Airflow 2.x
+    from airflow import DAG
+    from airflow.decorators import task
+
 # Ajustar o caminho para importar os módulos
 DAGS_FOLDER = os.path.dirname(os.path.realpath(__file__))
 SRC_PATH = os.path.join(DAGS_FOLDER, "src")
 if SRC_PATH not in sys.path:
     sys.path.append(SRC_PATH)
 
-from ibge_pipeline.main_ibge import run_all_ibge_pipelines
-from common.utils import setup_logging
+# No parse só o catálogo (módulo leve); pandas, BigQuery e Variables ficam para a execução da task
+from ibge_pipeline.config import IBGE_INDICATORS_TO_PROCESS
+
+# Limites de paralelismo entre workers: pool do Airflow e número máximo de indicadores simultâneos
+IBGE_DAG_POOL = os.getenv("IBGE_DAG_POOL", "default_pool")
+IBGE_DAG_MAX_ACTIVE_TASKS = int(os.getenv("IBGE_DAG_MAX_ACTIVE_TASKS", "2"))
 
 default_args = {
     "owner": "airflow",
@@ -26,17 +36,21 @@ with DAG(
     dag_id="ibge_indicadores_pipeline",
     description="Pipeline diário de ingestão de dados do IBGE",
     default_args=default_args,
-    schedule_interval="@daily",
-    start_date=days_ago(1),
+    schedule="@daily",
+    start_date=pendulum.datetime(2024, 1, 1, tz="America/Sao_Paulo"),
     catchup=False,
+    max_active_tasks=IBGE_DAG_MAX_ACTIVE_TASKS,
     tags=["ibge", "bigquery"],
 ) as dag:
 
-    def run_ibge_pipeline():
+    # Uma task mapeada por indicador: falhas e retries ficam restritos ao indicador afetado
+    @task(pool=IBGE_DAG_POOL, max_active_tis_per_dag=IBGE_DAG_MAX_ACTIVE_TASKS)
+    def run_ibge_indicator(config: dict) -> None:
+        from ibge_pipeline.main_ibge import run_full_ibge_pipeline_for_indicator
+        from common.utils import setup_logging
+
         setup_logging()
-        run_all_ibge_pipelines()
+        if not run_full_ibge_pipeline_for_indicator(config):
+            raise AirflowException(f"Pipeline do indicador {config['indicator_name_table']} falhou.")
 
-    task = PythonOperator(
-        task_id="run_ibge_pipeline",
-        python_callable=run_ibge_pipeline,
-    )
+    run_ibge_indicator.expand(config=IBGE_INDICATORS_TO_PROCESS)
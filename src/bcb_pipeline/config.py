@@ -0,0 +1,41 @@
+"""Catálogo e configuração do pipeline BCB.
+
+Importado pela DAG durante o parse: só biblioteca padrão, sem pandas, BigQuery ou acesso às
+Variables do Airflow. As Variables são lidas em tempo de execução, por get_bcb_settings().
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# "partition_type": "MONTH" nas séries diárias com histórico anterior a 1990: particionada por dia,
+# a tabela final passaria do limite de 10.000 partições do BigQuery no backfill
+SERIES_TO_PROCESS = [
+    {"name": "selic_diaria", "code": 11, "partition_type": "MONTH"},
+    {"name": "selic_acumulada_mes", "code": 4390},
+    {"name": "dolar_ptax_venda", "code": 1, "partition_type": "MONTH"},
+    {"name": "euro_ptax_venda", "code": 21619},
+    {"name": "inadimplencia_credito_inst_publicas", "code": 13667},
+    {"name": "saldo_credito_pf", "code": 20541},
+]
+
+BIGQUERY_DATASET_BCB_DEFAULT = "dados_publicos_bcb"
+GCP_LOCATION_DEFAULT = "southamerica-east1"
+
+
+@dataclass(frozen=True)
+class BcbSettings:
+    project_id: Optional[str]
+    dataset_id: str
+    location: str
+
+
+@lru_cache(maxsize=1)
+def get_bcb_settings() -> BcbSettings:
+    """Lê GCP_PROJECT_ID, BIGQUERY_DATASET_BCB e GCP_LOCATION uma vez por processo, na primeira chamada."""
+    from airflow.models import Variable
+
+    return BcbSettings(
+        project_id=Variable.get("GCP_PROJECT_ID", default_var=None),
+        dataset_id=Variable.get("BIGQUERY_DATASET_BCB", default_var=BIGQUERY_DATASET_BCB_DEFAULT),
+        location=Variable.get("GCP_LOCATION", default_var=GCP_LOCATION_DEFAULT),
+    )
@@ -1,23 +1,64 @@
+import asyncio
 import requests
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from src.common.utils import setup_logging
+from src.common.async_http import AsyncHttpClient
+from src.common.concurrency import DEFAULT_MAX_WORKERS, run_concurrently
+from src.common.http_client import http_get
+from src.common.rate_control import CircuitOpenError
 
 logger = setup_logging()
 logger = logging.getLogger(__name__)
 
 BCB_API_BASE_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_code}/dados"
+# Validade das respostas no cache HTTP em disco (usado apenas quando HTTP_CACHE_DIR está configurado)
+BCB_CACHE_TTL_SECONDS = 6 * 60 * 60
+# O SGS recusa consultas de séries diárias com intervalo superior a 10 anos
+BCB_MAX_WINDOW_YEARS = 10
+BCB_HISTORY_START_DATE = "01/01/1986"
+BCB_DATE_FORMAT = "%d/%m/%Y"
 
 
 def fetch_bcb_series_data(
     series_code: int, 
     start_date: str, 
     end_date: Optional[str] = None
-) -> pd.DataFrame:
+) -> Optional[pd.DataFrame]:
+    """Uma requisição ao SGS; DataFrame vazio quando não há dados no período e None em caso de falha."""
+    request_url, params = _build_bcb_request(series_code, start_date, end_date)
 
+    response = None
+    try:
+        response = http_get(request_url, params=params, timeout=30, cache_ttl=BCB_CACHE_TTL_SECONDS)
+        return _bcb_response_to_frame(response, series_code)
+    except Exception as e:
+        _log_bcb_error(e, series_code, response)
+    return None
+
+
+async def fetch_bcb_series_data_async(
+    client: AsyncHttpClient,
+    series_code: int,
+    start_date: str,
+    end_date: Optional[str] = None
+) -> Optional[pd.DataFrame]:
+    """Versão assíncrona de fetch_bcb_series_data, com o mesmo contrato (None em caso de falha)."""
+    request_url, params = _build_bcb_request(series_code, start_date, end_date)
+
+    response = None
+    try:
+        response = await client.get(request_url, params=params, timeout=30)
+        return _bcb_response_to_frame(response, series_code)
+    except Exception as e:
+        _log_bcb_error(e, series_code, response)
+    return None
+
+
+def _build_bcb_request(series_code: int, start_date: str, end_date: Optional[str]) -> tuple:
     end_date = end_date or datetime.today().strftime('%d/%m/%Y')
 
     params = {
@@ -29,38 +70,125 @@ def fetch_bcb_series_data(
     request_url = BCB_API_BASE_URL.format(series_code=series_code)
     logger.info(f"[BCB] Série: {series_code} | Período: {start_date} a {end_date}")
     logger.debug(f"[BCB] URL: {request_url} | Parâmetros: {params}")
+    return request_url, params
 
-    try:
-        response = requests.get(request_url, params=params, timeout=30)
-        response.raise_for_status()
-        data_json = response.json()
-
-        if not data_json:
-            logger.warning(f"[BCB] Nenhum dado retornado para série {series_code}.")
-            return pd.DataFrame()
 
-        df = pd.DataFrame(data_json)
-        logger.info(f"[BCB] {len(df)} registros retornados para a série {series_code}.")
-        return df
+def _bcb_response_to_frame(response, series_code: int) -> pd.DataFrame:
+    response.raise_for_status()
+    data_json = response.json()
 
-    except requests.exceptions.HTTPError as e:
-        logger.exception(f"[BCB] Erro HTTP na série {series_code}: {e}")
-        _log_response_content(response)
+    if not data_json:
+        logger.warning(f"[BCB] Nenhum dado retornado para série {series_code}.")
+        return pd.DataFrame()
 
-    except requests.exceptions.ConnectionError as e:
-        logger.exception(f"[BCB] Erro de conexão na série {series_code}: {e}")
+    df = pd.DataFrame(data_json)
+    logger.info(f"[BCB] {len(df)} registros retornados para a série {series_code}.")
+    return df
 
-    except requests.exceptions.Timeout as e:
-        logger.exception(f"[BCB] Timeout na série {series_code}: {e}")
 
-    except requests.exceptions.RequestException as e:
-        logger.exception(f"[BCB] Erro de requisição genérico na série {series_code}: {e}")
-
-    except ValueError as e:
-        logger.exception(f"[BCB] Erro ao processar JSON da série {series_code}: {e}")
+def _log_bcb_error(error: Exception, series_code: int, response) -> None:
+    if isinstance(error, CircuitOpenError):
+        # API fora do ar ou limitando: sem stack trace, para não poluir o log com uma série por linha
+        logger.warning(f"[BCB] Série {series_code} ignorada: {error}")
+    elif isinstance(error, requests.exceptions.HTTPError):
+        logger.exception(f"[BCB] Erro HTTP na série {series_code}: {error}")
         _log_response_content(response)
-
-    return pd.DataFrame()
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        logger.exception(f"[BCB] Erro de conexão na série {series_code}: {error}")
+    elif isinstance(error, requests.exceptions.Timeout):
+        logger.exception(f"[BCB] Timeout na série {series_code}: {error}")
+    elif isinstance(error, requests.exceptions.RequestException):
+        logger.exception(f"[BCB] Erro de requisição genérico na série {series_code}: {error}")
+    elif isinstance(error, ValueError):
+        logger.exception(f"[BCB] Erro ao processar JSON da série {series_code}: {error}")
+        _log_response_content(response)
+    else:
+        raise error
+
+
+def split_date_range(
+    start_date: str,
+    end_date: str,
+    window_years: int = BCB_MAX_WINDOW_YEARS
+) -> List[Tuple[str, str]]:
+    """Divide [start_date, end_date] (dd/mm/aaaa) em janelas contíguas de até window_years anos."""
+    start = datetime.strptime(start_date, BCB_DATE_FORMAT)
+    end = datetime.strptime(end_date, BCB_DATE_FORMAT)
+
+    windows = []
+    window_start = start
+    while window_start <= end:
+        try:
+            next_start = window_start.replace(year=window_start.year + window_years)
+        except ValueError:  # 29/02 em ano não bissexto
+            next_start = window_start.replace(year=window_start.year + window_years, day=28) + timedelta(days=1)
+        window_end = min(next_start - timedelta(days=1), end)
+        windows.append((window_start.strftime(BCB_DATE_FORMAT), window_end.strftime(BCB_DATE_FORMAT)))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+def fetch_bcb_series_data_chunked(
+    series_code: int,
+    start_date: str,
+    end_date: Optional[str] = None,
+    window_years: int = BCB_MAX_WINDOW_YEARS,
+    max_workers: int = DEFAULT_MAX_WORKERS
+) -> Optional[pd.DataFrame]:
+
+    end_date = end_date or datetime.today().strftime(BCB_DATE_FORMAT)
+    windows = split_date_range(start_date, end_date, window_years)
+    if len(windows) <= 1:
+        return fetch_bcb_series_data(series_code, start_date, end_date)
+
+    logger.info(f"[BCB] Série {series_code}: backfill de {start_date} a {end_date} em {len(windows)} janelas.")
+    frames = run_concurrently(
+        lambda window: fetch_bcb_series_data(series_code, window[0], window[1]),
+        windows,
+        max_workers=max_workers,
+        thread_name_prefix=f"bcb-{series_code}"
+    )
+
+    return _consolidate_windows(frames, series_code)
+
+
+async def fetch_bcb_series_data_chunked_async(
+    client: AsyncHttpClient,
+    series_code: int,
+    start_date: str,
+    end_date: Optional[str] = None,
+    window_years: int = BCB_MAX_WINDOW_YEARS
+) -> Optional[pd.DataFrame]:
+    """Versão assíncrona de fetch_bcb_series_data_chunked; a concorrência é limitada pelo cliente."""
+    end_date = end_date or datetime.today().strftime(BCB_DATE_FORMAT)
+    windows = split_date_range(start_date, end_date, window_years)
+    if len(windows) <= 1:
+        return await fetch_bcb_series_data_async(client, series_code, start_date, end_date)
+
+    logger.info(f"[BCB] Série {series_code}: backfill de {start_date} a {end_date} em {len(windows)} janelas.")
+    frames = await asyncio.gather(
+        *(fetch_bcb_series_data_async(client, series_code, window[0], window[1]) for window in windows)
+    )
+    return _consolidate_windows(list(frames), series_code)
+
+
+def _consolidate_windows(frames: List[Optional[pd.DataFrame]], series_code: int) -> Optional[pd.DataFrame]:
+    """Une as janelas do backfill; se qualquer janela falhar, a série inteira falha (teria um buraco)."""
+    failed = sum(df is None for df in frames)
+    if failed:
+        logger.error(f"[BCB] {failed} de {len(frames)} janelas do backfill da série {series_code} falharam. Resultado descartado.")
+        return None
+
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        logger.warning(f"[BCB] Nenhum dado retornado no backfill da série {series_code}.")
+        return pd.DataFrame()
+
+    # Janelas são contíguas, mas o SGS pode repetir a observação da borda em períodos não diários
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(subset=["data"], keep="last").reset_index(drop=True)
+    logger.info(f"[BCB] {len(df)} registros consolidados no backfill da série {series_code}.")
+    return df
 
 
 def _log_response_content(response: Optional[requests.Response]) -> None:
@@ -1,101 +1,576 @@
+import asyncio
 import logging
-from airflow.models import Variable
-from datetime import datetime, timedelta
+import os
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from google.cloud import bigquery
 
 from src.common.utils import setup_logging
-from src.bcb_pipeline.extractor import fetch_bcb_series_data
+from src.common.async_http import AsyncHttpClient, run_async
+from src.common.concurrency import DEFAULT_MAX_WORKERS, run_concurrently
+from src.bcb_pipeline.extractor import (
+    BCB_HISTORY_START_DATE,
+    fetch_bcb_series_data,
+    fetch_bcb_series_data_async,
+    fetch_bcb_series_data_chunked,
+    fetch_bcb_series_data_chunked_async
+)
 from src.bcb_pipeline.transformer import transform_bcb_data
 from src.common.bigquery_operations import (
+    LOAD_STRATEGY_MERGE,
+    LOAD_STRATEGY_PARTITION_OVERWRITE,
+    PARTITION_OVERWRITE_MAX_PARTITIONS,
+    PARTITION_TYPE_DAY,
+    delete_staging_table,
+    get_affected_partitions,
+    get_series_watermarks,
     load_df_to_staging_table,
-    merge_data_to_final_table
+    load_parquet_to_staging_table,
+    merge_data_to_final_table,
+    overwrite_final_table_partitions
 )
+from src.common.fingerprint import compute_dataframe_fingerprint, fingerprint_key, get_fingerprint_store
+from src.common.landing_zone import get_landing_zone_dir, landing_path, write_landing_parquet
+from src.common.metrics import StageMetrics, stage
+from src.bcb_pipeline.config import SERIES_TO_PROCESS, get_bcb_settings
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-GCP_PROJECT_ID = Variable.get("GCP_PROJECT_ID")
-BIGQUERY_DATASET_BCB = Variable.get("BIGQUERY_DATASET_BCB", default_var="dados_publicos_bcb")
-GCP_LOCATION = Variable.get("GCP_LOCATION", default_var="southamerica-east1")
+BCB_BATCH_STAGING_ID = "bcb_batch_staging"
+# Nome do arquivo da landing zone das execuções em lote (todas as séries em um Parquet)
+BCB_BATCH_LANDING_SERIES = "lote"
+BCB_LANDING_SOURCE = "bcb"
+# Dias reprocessados antes do último dado carregado, para capturar revisões do SGS
+BCB_REVISION_LOOKBACK_DAYS = 7
+# Saída do transformador com dtypes compactos (codigo_serie int32)
+BCB_COMPACT_DTYPES = False
+# Estratégia padrão de escrita; cada série pode sobrescrever com a chave "load_strategy"
+BCB_LOAD_STRATEGY = LOAD_STRATEGY_MERGE
+# Particionamento da tabela final na criação; cada série pode sobrescrever com a chave "partition_type"
+BCB_PARTITION_TYPE = PARTITION_TYPE_DAY
+# Modo de carga, parte da chave do fingerprint: janela pedida (padrão de 90 dias, backfill) ou incremental
+BCB_LOAD_MODE_WINDOW = "janela"
+BCB_LOAD_MODE_INCREMENTAL = "incremental"
+
+
+
+def _extract_and_transform_series(
+    series_name: str,
+    series_code: int,
+    start_date: str,
+    end_date: str,
+    chunked: bool = False,
+    df_raw: Optional[pd.DataFrame] = None,
+    extracted: bool = False
+) -> Optional[pd.DataFrame]:
+    """Extrai e transforma uma série; DataFrame vazio quando não há nada a carregar e None se a extração falhou.
+
+    Com df_raw (já extraído por _extract_series_async), só transforma; extracted=True indica que
+    df_raw=None é uma extração que falhou, e não um pedido de extração.
+    """
+    if df_raw is None and not extracted:
+        with stage(BCB_LANDING_SOURCE, series_name, "extract") as metrics:
+            if chunked:
+                df_raw = fetch_bcb_series_data_chunked(series_code, start_date, end_date)
+            else:
+                df_raw = fetch_bcb_series_data(series_code, start_date, end_date)
+            _record_extraction(metrics, df_raw)
+    if df_raw is None:
+        logger.error(f"[{series_name}] Falha na extração.")
+        return None
+    if df_raw.empty:
+        logger.warning(f"[{series_name}] Nenhum dado extraído. Pulando.")
+        return pd.DataFrame()
+
+    with stage(BCB_LANDING_SOURCE, series_name, "transform") as metrics:
+        df_transformed = transform_bcb_data(df_raw, series_code, compact=BCB_COMPACT_DTYPES)
+        metrics.rows = len(df_transformed)
+    if df_transformed.empty:
+        logger.warning(f"[{series_name}] Transformação vazia. Pulando.")
+    return df_transformed
+
 
-SERIES_TO_PROCESS = [
-    {"name": "selic_diaria", "code": 11},
-    {"name": "selic_acumulada_mes", "code": 4390},
-    {"name": "dolar_ptax_venda", "code": 1},
-    {"name": "euro_ptax_venda", "code": 21619},
-    {"name": "inadimplencia_credito_inst_publicas", "code": 13667},
-    {"name": "saldo_credito_pf", "code": 20541},
-]
+def _record_extraction(metrics: StageMetrics, df_raw: Optional[pd.DataFrame]) -> None:
+    if df_raw is not None:
+        metrics.rows = len(df_raw)
+    elif metrics.status != "ignorado":  # circuito aberto: a etapa já foi marcada como ignorada
+        metrics.mark_failed()
 
 
 def run_full_bcb_pipeline_for_series(
     series_name: str,
     series_code: int,
     start_date: str,
-    end_date: str
+    end_date: str,
+    client: Optional[bigquery.Client] = None,
+    chunked: bool = False,
+    load_strategy: str = BCB_LOAD_STRATEGY,
+    df_raw: Optional[pd.DataFrame] = None,
+    load_mode: str = BCB_LOAD_MODE_WINDOW,
+    extracted: bool = False,
+    partition_type: str = BCB_PARTITION_TYPE
 ) -> bool:
+    """Extrai, transforma e carrega uma série; False se qualquer etapa falhar, inclusive a extração.
+
+    Com df_raw, começa pela transformação; extracted=True indica que df_raw=None é uma extração que falhou.
+    """
     logger.info(f"--- Iniciando pipeline para: {series_name} (código {series_code}) ---")
 
     base_name = f"bcb_{series_name}"
     staging_id = f"{base_name}_staging"
     final_id = base_name
 
-    df_raw = fetch_bcb_series_data(series_code, start_date, end_date)
-    if df_raw.empty:
-        logger.warning(f"[{series_name}] Nenhum dado extraído. Pulando.")
+    df_transformed = _extract_and_transform_series(
+        series_name, series_code, start_date, end_date, chunked=chunked, df_raw=df_raw, extracted=extracted
+    )
+    if df_transformed is None:
+        return False
+    if df_transformed.empty:
         return True
 
-    df_transformed = transform_bcb_data(df_raw, series_code)
-    if df_transformed.empty:
-        logger.warning(f"[{series_name}] Transformação vazia. Pulando.")
+    # Chave por série e modo, não pela data inicial: a janela padrão desliza um dia por execução.
+    # Conteúdo idêntico ao da última carga do mesmo modo já está na tabela final, então o MERGE seria nulo
+    fp_store = get_fingerprint_store()
+    fp_key = fingerprint_key(BCB_LANDING_SOURCE, series_name, load_mode)
+    fingerprint = compute_dataframe_fingerprint(df_transformed) if fp_store else None
+    if fp_store and fp_store.is_unchanged(fp_key, fingerprint):
+        logger.info(f"[{series_name}] Conteúdo idêntico à última carga bem-sucedida. Etapas do BigQuery ignoradas.")
         return True
 
-    if not load_df_to_staging_table(df_transformed, GCP_PROJECT_ID, BIGQUERY_DATASET_BCB, staging_id, gcp_location=GCP_LOCATION):
-        logger.error(f"[{series_name}] Falha no carregamento para staging.")
-        return False
+    if _use_partition_overwrite(df_transformed, series_name, load_strategy, partition_type):
+        if not _overwrite_partitions(df_transformed, series_name, final_id, client=client):
+            return False
+    else:
+        if not _load_staging(df_transformed, series_name, staging_id, client=client):
+            logger.error(f"[{series_name}] Falha no carregamento para staging.")
+            return False
 
-    if not merge_data_to_final_table(GCP_PROJECT_ID, BIGQUERY_DATASET_BCB, staging_id, final_id, gcp_location=GCP_LOCATION):
-        logger.error(f"[{series_name}] Falha na operação MERGE.")
-        return False
+        if not _merge_and_cleanup(series_name, staging_id, final_id, client=client, partition_type=partition_type):
+            return False
 
-    try:
-        client = bigquery.Client(project=GCP_PROJECT_ID)
-        client.delete_table(f"{GCP_PROJECT_ID}.{BIGQUERY_DATASET_BCB}.{staging_id}", not_found_ok=True)
-        logger.info(f"[{series_name}] Tabela de staging '{staging_id}' deletada.")
-    except Exception as e:
-        logger.warning(f"[{series_name}] Erro ao deletar tabela de staging: {e}")
+    if fp_store:
+        fp_store.put(fp_key, fingerprint)
 
     logger.info(f"--- Pipeline para {series_name} concluído com sucesso ---")
     return True
 
 
-def run_all_bcb_pipelines(start_date: str = None, end_date: str = None) -> None:
-    logger.info("==== Iniciando execução dos pipelines do BCB ====")
+def _load_staging(
+    df: pd.DataFrame,
+    landing_series: str,
+    staging_id: str,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Carrega a staging a partir da landing zone em Parquet, quando configurada, ou direto do DataFrame."""
+    settings = get_bcb_settings()
+    with stage(BCB_LANDING_SOURCE, landing_series, "stage_load") as metrics:
+        metrics.rows = len(df)
+        landing_dir = get_landing_zone_dir()
+        if not landing_dir:
+            loaded = load_df_to_staging_table(df, settings.project_id, settings.dataset_id, staging_id, gcp_location=settings.location, client=client, pipeline=BCB_LANDING_SOURCE)
+        else:
+            try:
+                path = write_landing_parquet(df, BCB_LANDING_SOURCE, landing_series, base_dir=landing_dir)
+                loaded = load_parquet_to_staging_table(path, settings.project_id, settings.dataset_id, staging_id, gcp_location=settings.location, client=client, pipeline=BCB_LANDING_SOURCE)
+            except Exception as e:
+                logger.error(f"[{landing_series}] Falha ao gravar a landing zone: {e}")
+                loaded = False
+        if not loaded:
+            metrics.mark_failed()
+        return loaded
 
-    if not GCP_PROJECT_ID:
-        logger.error("Variável GCP_PROJECT_ID ausente. Abortando.")
-        return
 
+def _use_partition_overwrite(df: pd.DataFrame, series_name: str, load_strategy: str, partition_type: str = BCB_PARTITION_TYPE) -> bool:
+    if load_strategy != LOAD_STRATEGY_PARTITION_OVERWRITE:
+        return False
+    if partition_type != PARTITION_TYPE_DAY:
+        logger.info(f"[{series_name}] Tabela final particionada por {partition_type}; usando MERGE em vez de reescrita de partições.")
+        return False
+    n_partitions = len(get_affected_partitions(df))
+    if n_partitions > PARTITION_OVERWRITE_MAX_PARTITIONS:
+        logger.info(f"[{series_name}] {n_partitions} partições afetadas; usando MERGE em vez de reescrita de partições.")
+        return False
+    return True
+
+
+def _overwrite_partitions(
+    df: pd.DataFrame,
+    series_name: str,
+    final_id: str,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Reescreve as partições afetadas da tabela final, sem staging nem MERGE."""
+    settings = get_bcb_settings()
+    with stage(BCB_LANDING_SOURCE, series_name, "partition_overwrite") as metrics:
+        metrics.rows = len(df)
+        landing_dir = get_landing_zone_dir()
+        if landing_dir:
+            try:
+                write_landing_parquet(df, BCB_LANDING_SOURCE, series_name, base_dir=landing_dir)
+            except Exception as e:
+                logger.error(f"[{series_name}] Falha ao gravar a landing zone: {e}")
+                metrics.mark_failed()
+                return False
+
+        if not overwrite_final_table_partitions(df, settings.project_id, settings.dataset_id, final_id, gcp_location=settings.location, client=client, pipeline=BCB_LANDING_SOURCE):
+            logger.error(f"[{series_name}] Falha na reescrita das partições da tabela final.")
+            metrics.mark_failed()
+            return False
+        return True
+
+
+def _merge_and_cleanup(
+    series_name: str,
+    staging_id: str,
+    final_id: str,
+    client: Optional[bigquery.Client] = None,
+    series_codes: Optional[List[int]] = None,
+    partition_type: str = BCB_PARTITION_TYPE
+) -> bool:
+    settings = get_bcb_settings()
+    with stage(BCB_LANDING_SOURCE, series_name, "merge") as metrics:
+        if not merge_data_to_final_table(settings.project_id, settings.dataset_id, staging_id, final_id, gcp_location=settings.location, client=client, series_codes=series_codes, pipeline=BCB_LANDING_SOURCE, partition_type=partition_type):
+            logger.error(f"[{series_name}] Falha na operação MERGE.")
+            metrics.mark_failed()
+            return False
+
+    with stage(BCB_LANDING_SOURCE, series_name, "cleanup") as metrics:
+        if not delete_staging_table(settings.project_id, settings.dataset_id, staging_id, client=client):
+            logger.warning(f"[{series_name}] Tabela de staging '{staging_id}' não foi removida.")
+            metrics.mark_failed()
+    return True
+
+
+def reload_bcb_series_from_landing(
+    series_name: str,
+    run_date: date,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Recarrega uma série a partir do Parquet de uma execução anterior, sem extrair nem transformar.
+
+    Se a execução foi em lote, usa o Parquet do lote, restrito ao código da série.
+    """
+    if series_name == BCB_BATCH_LANDING_SERIES:
+        logger.error("O Parquet do lote contém várias séries; use reload_bcb_batch_from_landing.")
+        return False
+
+    settings = get_bcb_settings()
+    landing_dir = get_landing_zone_dir()
+    if not landing_dir:
+        logger.error("Landing zone não configurada. Não é possível recarregar.")
+        return False
+
+    path = landing_path(landing_dir, BCB_LANDING_SOURCE, series_name, run_date)
+    series_codes = None
+    serie = _find_serie(series_name)
+    if not os.path.exists(path):
+        batch_path = landing_path(landing_dir, BCB_LANDING_SOURCE, BCB_BATCH_LANDING_SERIES, run_date)
+        if serie is None or not os.path.exists(batch_path):
+            logger.error(f"[{series_name}] Arquivo da landing zone não encontrado: {path}")
+            return False
+        path, series_codes = batch_path, [serie["code"]]
+
+    staging_id = f"bcb_{series_name}_staging"
+    logger.info(f"--- Recarregando {series_name} a partir de {path} ---")
+    with stage(BCB_LANDING_SOURCE, series_name, "stage_load") as metrics:
+        if not load_parquet_to_staging_table(path, settings.project_id, settings.dataset_id, staging_id, gcp_location=settings.location, client=client, pipeline=BCB_LANDING_SOURCE):
+            logger.error(f"[{series_name}] Falha no carregamento para staging.")
+            metrics.mark_failed()
+            return False
+    partition_type = serie.get("partition_type", BCB_PARTITION_TYPE) if serie else BCB_PARTITION_TYPE
+    return _merge_and_cleanup(
+        series_name, staging_id, f"bcb_{series_name}", client=client, series_codes=series_codes, partition_type=partition_type
+    )
+
+
+def reload_bcb_batch_from_landing(
+    run_date: date,
+    client: Optional[bigquery.Client] = None
+) -> Dict[str, bool]:
+    """Recarrega uma execução em lote: o Parquet do lote vai para a staging e cada série recebe seu MERGE.
+
+    As séries são as de SERIES_TO_PROCESS cujo código aparece no arquivo.
+    """
+    settings = get_bcb_settings()
+    landing_dir = get_landing_zone_dir()
+    if not landing_dir:
+        logger.error("Landing zone não configurada. Não é possível recarregar.")
+        return {}
+
+    path = landing_path(landing_dir, BCB_LANDING_SOURCE, BCB_BATCH_LANDING_SERIES, run_date)
+    if not os.path.exists(path):
+        logger.error(f"Arquivo do lote não encontrado na landing zone: {path}")
+        return {}
+
+    codes = set(pd.read_parquet(path, columns=["codigo_serie"])["codigo_serie"].unique().tolist())
+    series_list = [serie for serie in SERIES_TO_PROCESS if serie["code"] in codes]
+    logger.info(f"--- Recarregando o lote de {run_date} ({len(series_list)} séries) a partir de {path} ---")
+    with stage(BCB_LANDING_SOURCE, BCB_BATCH_LANDING_SERIES, "stage_load") as metrics:
+        if not load_parquet_to_staging_table(path, settings.project_id, settings.dataset_id, BCB_BATCH_STAGING_ID, gcp_location=settings.location, client=client, pipeline=BCB_LANDING_SOURCE):
+            logger.error("Falha no carregamento da staging em lote.")
+            metrics.mark_failed()
+            return {serie["name"]: False for serie in series_list}
+    return _merge_batch_staging(series_list, client=client)
+
+
+def _find_serie(series_name: str) -> Optional[dict]:
+    return next((serie for serie in SERIES_TO_PROCESS if serie["name"] == series_name), None)
+
+
+def _merge_batch_staging(series_list: List[dict], client: Optional[bigquery.Client] = None) -> Dict[str, bool]:
+    """Um MERGE por série a partir da staging em lote, filtrado pelo código da série; remove a staging no fim."""
+    settings = get_bcb_settings()
+    resultados = {}
+    for serie in series_list:
+        with stage(BCB_LANDING_SOURCE, serie["name"], "merge") as metrics:
+            sucesso = merge_data_to_final_table(
+                settings.project_id, settings.dataset_id, BCB_BATCH_STAGING_ID, f"bcb_{serie['name']}",
+                gcp_location=settings.location, client=client, series_codes=[serie["code"]],
+                pipeline=BCB_LANDING_SOURCE, partition_type=serie.get("partition_type", BCB_PARTITION_TYPE)
+            )
+            if not sucesso:
+                metrics.mark_failed()
+        if not sucesso:
+            logger.error(f"[{serie['name']}] Falha na operação MERGE a partir da staging em lote.")
+        resultados[serie["name"]] = sucesso
+
+    with stage(BCB_LANDING_SOURCE, BCB_BATCH_LANDING_SERIES, "cleanup") as metrics:
+        if not delete_staging_table(settings.project_id, settings.dataset_id, BCB_BATCH_STAGING_ID, client=client):
+            logger.warning(f"Tabela de staging em lote '{BCB_BATCH_STAGING_ID}' não foi removida.")
+            metrics.mark_failed()
+    return resultados
+
+
+def resolve_incremental_start_date(
+    series_name: str,
+    series_code: int,
+    default_start_date: str,
+    revision_lookback_days: int = BCB_REVISION_LOOKBACK_DAYS,
+    client: Optional[bigquery.Client] = None
+) -> str:
+    """Calcula a data inicial a partir do watermark da tabela final menos a janela de revisão."""
+    settings = get_bcb_settings()
+    watermarks = get_series_watermarks(settings.project_id, settings.dataset_id, f"bcb_{series_name}", client=client)
+    watermark = watermarks.get(int(series_code))
+    if watermark is None:
+        logger.info(f"[{series_name}] Sem watermark na tabela final. Usando data inicial padrão {default_start_date}.")
+        return default_start_date
+
+    start_date = (watermark - timedelta(days=revision_lookback_days)).strftime("%d/%m/%Y")
+    logger.info(f"[{series_name}] Watermark {watermark} encontrado. Extração incremental a partir de {start_date}.")
+    return start_date
+
+
+def run_bcb_pipelines_batched(
+    series_list: List[dict],
+    start_date: str,
+    end_date: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    client: Optional[bigquery.Client] = None,
+    chunked: bool = False,
+    async_extract: bool = False,
+    load_mode: str = BCB_LOAD_MODE_WINDOW
+) -> Dict[str, bool]:
+    """Carrega todas as séries em uma única staging e executa um MERGE por tabela final."""
+    logger.info(f"--- Iniciando pipeline BCB em lote para {len(series_list)} séries ---")
+
+    raw_frames = _extract_series_async(series_list, start_date, end_date, chunked) if async_extract else None
+
+    def _extract(item: Tuple[dict, Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        serie, df_raw = item
+        try:
+            return _extract_and_transform_series(
+                serie["name"], serie["code"], serie.get("start_date", start_date), end_date,
+                chunked=chunked, df_raw=df_raw, extracted=async_extract
+            )
+        except Exception as e:
+            logger.exception(f"[{serie['name']}] Erro inesperado na extração/transformação: {e}")
+            return None
+
+    items = list(zip(series_list, raw_frames or [None] * len(series_list)))
+    frames = run_concurrently(_extract, items, max_workers=max_workers, thread_name_prefix="bcb")
+
+    fp_store = get_fingerprint_store()
+    fingerprints = {}
+    resultados = {}
+    series_com_dados = []
+    for serie, df in zip(series_list, frames):
+        if df is None:
+            resultados[serie["name"]] = False
+        elif df.empty:
+            resultados[serie["name"]] = True
+        else:
+            if fp_store:
+                fp_key = fingerprint_key(BCB_LANDING_SOURCE, serie["name"], load_mode)
+                fingerprint = compute_dataframe_fingerprint(df)
+                if fp_store.is_unchanged(fp_key, fingerprint):
+                    logger.info(f"[{serie['name']}] Conteúdo idêntico à última carga bem-sucedida. Série fora do lote.")
+                    resultados[serie["name"]] = True
+                    continue
+                fingerprints[serie["name"]] = (fp_key, fingerprint)
+            series_com_dados.append((serie, df))
+
+    if not series_com_dados:
+        logger.info("Nenhuma série com dados para carregar no lote.")
+        return {serie["name"]: resultados[serie["name"]] for serie in series_list}
+
+    df_lote = pd.concat([df for _, df in series_com_dados], ignore_index=True)
+    if not _load_staging(df_lote, BCB_BATCH_LANDING_SERIES, BCB_BATCH_STAGING_ID, client=client):
+        logger.error(f"Falha no carregamento da staging em lote ({len(series_com_dados)} séries).")
+        for serie, _ in series_com_dados:
+            resultados[serie["name"]] = False
+    else:
+        merged = _merge_batch_staging([serie for serie, _ in series_com_dados], client=client)
+        for name, sucesso in merged.items():
+            if sucesso and name in fingerprints:
+                fp_store.put(*fingerprints[name])
+        resultados.update(merged)
+
+    logger.info("--- Pipeline BCB em lote concluído ---")
+    return {serie["name"]: resultados[serie["name"]] for serie in series_list}
+
+
+def _extract_series_async(
+    series_list: List[dict],
+    start_date: str,
+    end_date: str,
+    chunked: bool = False
+) -> List[Optional[pd.DataFrame]]:
+    """Extrai todas as séries em um único event loop, sob o limite de taxa e de conexões por host.
+
+    Cada série mede sua própria etapa extract (None quando ela falha); a chamada é síncrona para quem a usa.
+    """
+    async def _extract_all() -> List[Optional[pd.DataFrame]]:
+        async with AsyncHttpClient() as http:
+            async def _extract(serie: dict) -> Optional[pd.DataFrame]:
+                serie_start = serie.get("start_date", start_date)
+                with stage(BCB_LANDING_SOURCE, serie["name"], "extract") as metrics:
+                    if chunked:
+                        df_raw = await fetch_bcb_series_data_chunked_async(http, serie["code"], serie_start, end_date)
+                    else:
+                        df_raw = await fetch_bcb_series_data_async(http, serie["code"], serie_start, end_date)
+                    _record_extraction(metrics, df_raw)
+                return df_raw
+
+            return list(await asyncio.gather(*(_extract(serie) for serie in series_list)))
+
+    logger.info(f"Extraindo {len(series_list)} séries de forma assíncrona.")
+    return run_async(_extract_all())
+
+
+def _resolve_date_window(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
     if not start_date or not end_date:
         today = datetime.today()
         start_date = (today - timedelta(days=90)).strftime("%d/%m/%Y")
         end_date = today.strftime("%d/%m/%Y")
         logger.info(f"Usando período padrão de 90 dias: {start_date} a {end_date}")
+    return start_date, end_date
+
+
+def run_bcb_pipeline_for_serie(
+    serie: dict,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    incremental: bool = False,
+    revision_lookback_days: int = BCB_REVISION_LOOKBACK_DAYS,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Executa uma série de SERIES_TO_PROCESS isoladamente (unidade das tasks mapeadas da DAG)."""
+    start_date, end_date = _resolve_date_window(start_date, end_date)
+    if incremental:
+        start_date = resolve_incremental_start_date(
+            serie["name"], serie["code"], start_date, revision_lookback_days, client=client
+        )
+    return run_full_bcb_pipeline_for_series(
+        serie["name"], serie["code"], start_date, end_date,
+        client=client, load_strategy=serie.get("load_strategy", BCB_LOAD_STRATEGY),
+        load_mode=BCB_LOAD_MODE_INCREMENTAL if incremental else BCB_LOAD_MODE_WINDOW,
+        partition_type=serie.get("partition_type", BCB_PARTITION_TYPE)
+    )
+
 
-    sucesso_geral = True
-    for serie in SERIES_TO_PROCESS:
-        sucesso = run_full_bcb_pipeline_for_series(
-            serie["name"], serie["code"], start_date, end_date
+def run_all_bcb_pipelines(
+    start_date: str = None,
+    end_date: str = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    client: Optional[bigquery.Client] = None,
+    batched: bool = False,
+    incremental: bool = False,
+    revision_lookback_days: int = BCB_REVISION_LOOKBACK_DAYS,
+    chunked: bool = False,
+    async_extract: bool = False
+) -> Dict[str, bool]:
+    """Executa todas as séries; async_extract=True extrai todas em um event loop antes de transformar e carregar."""
+    logger.info("==== Iniciando execução dos pipelines do BCB ====")
+
+    if not get_bcb_settings().project_id:
+        logger.error("Variável GCP_PROJECT_ID ausente. Abortando.")
+        return {}
+
+    start_date, end_date = _resolve_date_window(start_date, end_date)
+    load_mode = BCB_LOAD_MODE_INCREMENTAL if incremental else BCB_LOAD_MODE_WINDOW
+
+    series = SERIES_TO_PROCESS
+    if incremental:
+        def _with_incremental_start(serie: dict) -> dict:
+            serie_start = resolve_incremental_start_date(
+                serie["name"], serie["code"], start_date, revision_lookback_days, client=client
+            )
+            return {**serie, "start_date": serie_start}
+
+        series = run_concurrently(_with_incremental_start, SERIES_TO_PROCESS, max_workers=max_workers, thread_name_prefix="bcb")
+
+    def _run_serie(item: Tuple[dict, Optional[pd.DataFrame]]) -> bool:
+        serie, df_raw = item
+        try:
+            return run_full_bcb_pipeline_for_series(
+                serie["name"], serie["code"], serie.get("start_date", start_date), end_date,
+                client=client, chunked=chunked, load_strategy=serie.get("load_strategy", BCB_LOAD_STRATEGY),
+                df_raw=df_raw, load_mode=load_mode, extracted=async_extract,
+                partition_type=serie.get("partition_type", BCB_PARTITION_TYPE)
+            )
+        except Exception as e:
+            logger.exception(f"[{serie['name']}] Erro inesperado no pipeline: {e}")
+            return False
+
+    if batched:
+        resultados = run_bcb_pipelines_batched(
+            series, start_date, end_date, max_workers=max_workers, client=client, chunked=chunked,
+            async_extract=async_extract, load_mode=load_mode
         )
+    else:
+        raw_frames = _extract_series_async(series, start_date, end_date, chunked) if async_extract else None
+        items = list(zip(series, raw_frames or [None] * len(series)))
+        sucessos = run_concurrently(_run_serie, items, max_workers=max_workers, thread_name_prefix="bcb")
+        resultados = {serie["name"]: sucesso for serie, sucesso in zip(series, sucessos)}
+
+    for name, sucesso in resultados.items():
         if not sucesso:
-            logger.error(f"[{serie['name']}] Pipeline falhou.")
-            sucesso_geral = False
-        logger.info("-" * 80)
+            logger.error(f"[{name}] Pipeline falhou.")
 
-    if sucesso_geral:
+    if all(resultados.values()):
         logger.info("Todos os pipelines BCB executados com sucesso.")
     else:
         logger.error("Um ou mais pipelines do BCB falharam. Veja os logs.")
+    return resultados
+
+
+def run_bcb_backfill(
+    start_date: str = BCB_HISTORY_START_DATE,
+    end_date: Optional[str] = None,
+    **kwargs
+) -> Dict[str, bool]:
+    """Carga do histórico completo: extração em janelas paralelas aceitas pela API do SGS.
+
+    A staging não é particionada e o MERGE é feito em janelas de até 10 anos (limite de 4.000
+    partições por job); as séries com "partition_type": "MONTH" ficam abaixo do limite de 10.000
+    partições por tabela.
+    """
+    end_date = end_date or datetime.today().strftime("%d/%m/%Y")
+    logger.info(f"==== Backfill BCB de {start_date} a {end_date} ====")
+    return run_all_bcb_pipelines(start_date, end_date, chunked=True, **kwargs)
 
 
 if __name__ == "__main__":
@@ -2,9 +2,11 @@ import pandas as pd
 import logging
 from typing import Optional
 
+from src.common.dtypes import to_compact_dtypes
+
 logger = logging.getLogger(__name__)
 
-def transform_bcb_data(df_raw: pd.DataFrame, series_code: int) -> pd.DataFrame:
+def transform_bcb_data(df_raw: pd.DataFrame, series_code: int, compact: bool = False) -> pd.DataFrame:
 
     if df_raw.empty:
         logger.info(f"[BCB] Série {series_code}: DataFrame vazio recebido. Nenhuma transformação será aplicada.")
@@ -16,7 +18,8 @@ def transform_bcb_data(df_raw: pd.DataFrame, series_code: int) -> pd.DataFrame:
         logger.error(f"[BCB] Série {series_code}: Colunas ausentes no DataFrame: {missing_cols}")
         return pd.DataFrame()
 
-    df = df_raw.copy()
+    # Copia apenas as colunas usadas, não o DataFrame bruto inteiro
+    df = df_raw[['data', 'valor']].copy()
     logger.info(f"[BCB] Série {series_code}: Iniciando transformação de {len(df)} registros.")
 
     df['data_referencia'] = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce')
@@ -29,6 +32,8 @@ def transform_bcb_data(df_raw: pd.DataFrame, series_code: int) -> pd.DataFrame:
 
     try:
         df_transformed = df[['data_referencia', 'codigo_serie', 'valor_serie']].copy()
+        if compact:
+            df_transformed = to_compact_dtypes(df_transformed, int32_columns=['codigo_serie'])
         logger.info(f"[BCB] Série {series_code}: Transformação concluída com {len(df_transformed)} registros.")
         return df_transformed
 
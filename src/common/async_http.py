@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import json
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+
+from src.common.http_client import (
+    DEFAULT_HEADERS,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_JITTER,
+    HTTP_BACKOFF_MAX,
+    HTTP_MAX_RETRIES,
+    RETRY_STATUS_CODES,
+)
+from src.common.metrics import record_bytes_downloaded
+from src.common.rate_control import THROTTLE_STATUS_CODES, HostRateController, get_host_controller
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Requisições em andamento por host em cada cliente assíncrono (o teto do processo fica no controle de taxa)
+ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST = 8
+
+
+@dataclass
+class AsyncHttpResponse:
+    """Resposta já lida, com a interface de requests.Response usada pelos extratores."""
+    url: str
+    status_code: int
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    encoding: str = "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class AsyncHttpClient:
+    """Cliente aiohttp com a mesma política de retry do http_get e o mesmo controle de taxa por host.
+
+    Cada tentativa ocupa uma vaga e um token do controle de taxa do host (compartilhado com o
+    caminho síncrono); enquanto o circuito do host estiver aberto, get levanta CircuitOpenError.
+    Falhas de conexão e timeouts viram as exceções equivalentes de requests, para que os extratores
+    assíncronos tratem erros como os síncronos. Não usa o cache HTTP em disco.
+
+        async with AsyncHttpClient() as client:
+            response = await client.get(url, params=params)
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+        backoff_jitter: float = HTTP_BACKOFF_JITTER
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_connections_per_host)
+        self._session = aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+        self._session = None
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._semaphores[host]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+        delay = min(self.backoff_factor * (2 ** attempt), HTTP_BACKOFF_MAX)
+        return delay + random.uniform(0, self.backoff_jitter) if delay else 0.0
+
+    async def get(self, url: str, params: Optional[dict] = None, timeout: float = 30) -> AsyncHttpResponse:
+        host = urlsplit(url).hostname or ""
+        controller = get_host_controller(host)
+        is_probe = controller.check_circuit()
+        try:
+            response = await self._get_with_retries(controller, host, url, params, timeout)
+        except Exception:
+            controller.record_result(failed=True, is_probe=is_probe)
+            raise
+        except BaseException:
+            # Cancelamento (asyncio.CancelledError) não diz nada sobre o host, mas libera a sonda
+            controller.abandon(is_probe)
+            raise
+        controller.record_result(failed=response.status_code in RETRY_STATUS_CODES, is_probe=is_probe)
+        return response
+
+    async def _get_with_retries(
+        self, controller: HostRateController, host: str, url: str, params: Optional[dict], timeout: float
+    ) -> AsyncHttpResponse:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                async with self._semaphore(host):
+                    await controller.acquire_async()
+                    try:
+                        async with self._session.get(
+                            url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)
+                        ) as resp:
+                            body = await resp.read()
+                            response = AsyncHttpResponse(
+                                url=str(resp.url),
+                                status_code=resp.status,
+                                content=body,
+                                headers=dict(resp.headers),
+                                encoding=resp.charset or "utf-8",
+                            )
+                    finally:
+                        controller.release()
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+                if last_attempt:
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except asyncio.TimeoutError as e:
+                if last_attempt:
+                    raise requests.exceptions.Timeout(f"Timeout de {timeout}s para {url}") from e
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            record_bytes_downloaded(len(response.content))
+            if response.status_code in THROTTLE_STATUS_CODES:
+                controller.on_throttle()
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                logger.debug(f"HTTP {response.status_code} em {url}; nova tentativa {attempt + 1}/{self.max_retries}.")
+                await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+            return response
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """Executa uma corrotina a partir de código síncrono, para as entradas main_* continuarem síncronas."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Já dentro de um event loop (ex.: notebook): roda em outra thread, com um loop próprio
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-http") as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coro).result()
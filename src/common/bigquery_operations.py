@@ -1,10 +1,95 @@
+import io
 import logging
+import os
+import threading
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
 
+from src.common.concurrency import DEFAULT_MAX_WORKERS, run_concurrently
+from src.common.local_warehouse import LocalBackend, get_local_warehouse
+from src.common.metrics import record_bigquery_job
+from src.common.schemas import LEGACY_MERGE_KEYS, TableSchema, get_table_schema, superseded_legacy_rows
+from src.common.warehouse_backend import WarehouseBackend, merge_source_conditions, prepare_partition_rows
+
 logger = logging.getLogger(__name__)  
 
+# Com valor "1", todo MERGE registra também os bytes que processaria sem a poda de partições (dry run)
+MERGE_REPORT_UNPRUNED_BYTES_ENV = "BIGQUERY_MERGE_REPORT_UNPRUNED_BYTES"
+
+# Estratégias de escrita na tabela final
+LOAD_STRATEGY_MERGE = "merge"
+LOAD_STRATEGY_PARTITION_OVERWRITE = "partition_overwrite"
+# Cada partição reescrita é um job de carga (cota diária por tabela); acima disso, use o MERGE
+PARTITION_OVERWRITE_MAX_PARTITIONS = 100
+
+# Granularidade do particionamento por data_referencia na criação da tabela final. Uma tabela
+# aceita no máximo 10.000 partições: séries diárias com o histórico desde os anos 80 usam MONTH
+PARTITION_TYPE_DAY = bigquery.TimePartitioningType.DAY
+PARTITION_TYPE_MONTH = bigquery.TimePartitioningType.MONTH
+# Um job modifica no máximo 4.000 partições; staging que cobre mais dias (backfill) vira vários
+# MERGEs, um por janela de 10 anos
+MERGE_SLICE_DAYS = 3650
+
+# Cliente e metadados compartilhados pelo processo inteiro (todas as séries e threads)
+_CLIENTS: Dict[str, bigquery.Client] = {}
+_KNOWN_DATASETS: Set[str] = set()
+_KNOWN_TABLES: Set[str] = set()
+# Tabelas finais migradas do layout antigo neste processo: o próximo MERGE apaga as linhas legadas que substitui
+_MIGRATED_TABLES: Set[str] = set()
+_CACHE_LOCK = threading.Lock()
+
+
+def get_bigquery_client(project_id: str) -> bigquery.Client:
+    """Retorna o cliente BigQuery compartilhado do processo para o projeto, criando-o na primeira chamada."""
+    with _CACHE_LOCK:
+        client = _CLIENTS.get(project_id)
+        if client is None:
+            logger.info(f"Criando cliente BigQuery compartilhado para o projeto {project_id}.")
+            client = bigquery.Client(project=project_id)
+            _CLIENTS[project_id] = client
+        return client
+
+
+def _bigquery_schema(table_schema: TableSchema, with_descriptions: bool = False) -> List[bigquery.SchemaField]:
+    return [
+        bigquery.SchemaField(
+            column.name, column.bq_type, mode="NULLABLE",
+            description=column.description if with_descriptions else None
+        )
+        for column in table_schema.columns
+    ]
+
+
+# Nomes legados que a API do BigQuery devolve para os tipos do esquema registrado
+_BQ_TYPE_ALIASES = {"INTEGER": "INT64", "FLOAT": "FLOAT64"}
+
+
+def _time_partitioning(table_schema: TableSchema, partition_type: str = PARTITION_TYPE_DAY) -> bigquery.TimePartitioning:
+    return bigquery.TimePartitioning(type_=partition_type, field=table_schema.partition_field)
+
+
+def _to_parquet_buffer(table: pa.Table) -> io.BytesIO:
+    """Serializa a tabela Arrow já tipada; o job de carga não infere tipos a partir do pandas."""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def clear_bigquery_caches() -> None:
+    """Descarta clientes e metadados memorizados (útil em testes ou após troca de credenciais)."""
+    with _CACHE_LOCK:
+        _CLIENTS.clear()
+        _KNOWN_DATASETS.clear()
+        _KNOWN_TABLES.clear()
+        _MIGRATED_TABLES.clear()
+
+
 def ensure_bigquery_dataset_exists(
     client: bigquery.Client,
     dataset_id: str,
@@ -13,11 +98,15 @@ def ensure_bigquery_dataset_exists(
 ):
     
     full_dataset_id = f"{project_id}.{dataset_id}"
+    if full_dataset_id in _KNOWN_DATASETS:
+        return
+
     dataset_ref = client.dataset(dataset_id) 
 
     try:
         client.get_dataset(dataset_ref)
         logger.info(f"Dataset {full_dataset_id} já existe.")
+        _KNOWN_DATASETS.add(full_dataset_id)
 
     except NotFound:
         logger.info(f"Dataset {full_dataset_id} não encontrado. Criando na localização {location}...")
@@ -25,8 +114,9 @@ def ensure_bigquery_dataset_exists(
         dataset_object_to_create.location = location
         
         try:
-            client.create_dataset(dataset_object_to_create, timeout=30)
+            client.create_dataset(dataset_object_to_create, exists_ok=True, timeout=30)
             logger.info(f"Dataset {full_dataset_id} criado com sucesso na localização {location}.")
+            _KNOWN_DATASETS.add(full_dataset_id)
 
         except Exception as e:
             logger.error(f"Falha ao criar o dataset {full_dataset_id} na localização {location}: {e}")
@@ -36,126 +126,284 @@ def ensure_bigquery_dataset_exists(
         logger.error(f"Erro inesperado ao verificar a existência do dataset {full_dataset_id}: {e}")
         raise
 
+
 def load_df_to_staging_table(
     df: pd.DataFrame,
     project_id: str,
     dataset_id: str,
     staging_table_id: str,
-    gcp_location: str = "southamerica-east1"
+    gcp_location: str = "southamerica-east1",
+    client: Optional[bigquery.Client] = None,
+    pipeline: str = "bcb"
 ) -> bool:
+    """Carrega o DataFrame na staging com o esquema registrado do pipeline (src.common.schemas)."""
     if df.empty:
         logger.info(f"DataFrame para staging em {dataset_id}.{staging_table_id} está vazio. Nenhum dado para carregar.")
         return True
 
+    table_schema = get_table_schema(pipeline)
     try:
-        client = bigquery.Client(project=project_id)
-        ensure_bigquery_dataset_exists(client, dataset_id, project_id, location=gcp_location)
-    except Exception as e:
-        logger.error(f"Falha ao inicializar o cliente BigQuery ou garantir a existência do dataset {project_id}.{dataset_id}: {e}")
+        df = table_schema.select(df)
+    except ValueError as e:
+        logger.error(f"DataFrame incompatível com a staging {dataset_id}.{staging_table_id}: {e}")
         return False
+    backend = get_warehouse_backend(project_id, client, gcp_location)
+    return backend.load_staging(df, dataset_id, staging_table_id, table_schema)
 
-    table_ref_full = f"{project_id}.{dataset_id}.{staging_table_id}"
-    logger.info(f"Iniciando carregamento de {len(df)} linhas para a tabela de STAGING: {table_ref_full}")
 
-    schema = [
-        bigquery.SchemaField("data_referencia", "DATE", mode="NULLABLE"),
-        bigquery.SchemaField("codigo_serie", "INTEGER", mode="NULLABLE"),
-        bigquery.SchemaField("valor_serie", "FLOAT64", mode="NULLABLE"),
-    ]
+def load_parquet_to_staging_table(
+    parquet_path: str,
+    project_id: str,
+    dataset_id: str,
+    staging_table_id: str,
+    gcp_location: str = "southamerica-east1",
+    client: Optional[bigquery.Client] = None,
+    pipeline: str = "bcb"
+) -> bool:
+    """Carrega um arquivo Parquet da landing zone na staging, com o esquema registrado do pipeline."""
+    backend = get_warehouse_backend(project_id, client, gcp_location)
+    return backend.load_staging_file(parquet_path, dataset_id, staging_table_id, get_table_schema(pipeline))
 
-    job_config = bigquery.LoadJobConfig(
-        schema=schema,
-        write_disposition="WRITE_TRUNCATE", 
-        create_disposition="CREATE_IF_NEEDED",
-        time_partitioning=bigquery.TimePartitioning(
-            type_=bigquery.TimePartitioningType.DAY,
-            field="data_referencia"
-        )
+
+def _staging_job_config(table_schema: TableSchema) -> bigquery.LoadJobConfig:
+    """Staging sem particionamento: um backfill diário desde 1986 passaria do limite de 4.000 partições por job."""
+    return bigquery.LoadJobConfig(
+        schema=_bigquery_schema(table_schema),
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition="WRITE_TRUNCATE",
+        create_disposition="CREATE_IF_NEEDED"
     )
 
-    try:
-        load_job = client.load_table_from_dataframe(
-            df, table_ref_full, job_config=job_config
-        )
-        logger.info(f"Job de carregamento para STAGING {load_job.job_id} iniciado para {table_ref_full}.")
-        load_job.result()
 
-        if load_job.errors:
-            logger.error(f"Job de carregamento para STAGING {table_ref_full} encontrou erros:")
-            for error in load_job.errors:
-                logger.error(f" - {error['message']}")
-            return False
-        
-        logger.info(f"Carregamento para STAGING {table_ref_full} concluído com sucesso.")
-        return True
+def _drop_previous_staging(client: bigquery.Client, table_ref_full: str) -> None:
+    """Remove a staging deixada por uma execução que falhou antes da limpeza.
 
-    except Exception as e:
-        logger.error(f"Erro durante o carregamento de dados para STAGING {table_ref_full}: {e}")
+    Ela pode ter sido criada particionada por dia, e o WRITE_TRUNCATE mantém o particionamento da tabela existente.
+    """
+    client.delete_table(table_ref_full, not_found_ok=True)
+
+
+def _wait_for_staging_load(load_job: bigquery.LoadJob, table_ref_full: str) -> bool:
+    logger.info(f"Job de carregamento para STAGING {load_job.job_id} iniciado para {table_ref_full}.")
+    load_job.result()
+    record_bigquery_job(load_job)
+
+    if load_job.errors:
+        logger.error(f"Job de carregamento para STAGING {table_ref_full} encontrou erros:")
+        for error in load_job.errors:
+            logger.error(f" - {error['message']}")
         return False
-    
-def merge_data_to_final_table(
+
+    logger.info(f"Carregamento para STAGING {table_ref_full} concluído com sucesso.")
+    return True
+
+
+def _ensure_final_table_exists(
+    client: bigquery.Client,
     project_id: str,
     dataset_id: str,
-    staging_table_id: str,
     final_table_id: str,
-    gcp_location: str = "southamerica-east1"
+    table_schema: TableSchema,
+    partition_type: str = PARTITION_TYPE_DAY
 ) -> bool:
-    
-    try:
-        client = bigquery.Client(project=project_id)
-        ensure_bigquery_dataset_exists(client, dataset_id, project_id, location=gcp_location)
+    """Cria a tabela final (particionada e clusterizada) apenas na primeira vez em que é vista pelo processo.
 
-    except Exception as e:
-        logger.error(f"Falha ao inicializar o cliente BigQuery ou garantir a existência do dataset {project_id}.{dataset_id} (função MERGE): {e}")
-        return False
+    partition_type só vale na criação: o particionamento de uma tabela existente não muda, e uma
+    divergência é apenas registrada no log (recriar a tabela é uma operação manual).
+
+    Se a tabela já existe sem colunas do esquema registrado (ex.: tabelas ibge_* criadas no layout do
+    BCB), as colunas faltantes são acrescentadas e o clustering é atualizado; as linhas antigas ficam
+    com NULL nelas, e as que a carga seguinte cobre são substituídas (ver _MIGRATED_TABLES). Coluna
+    existente com outro tipo é erro.
+    """
+    full_table_id = f"{project_id}.{dataset_id}.{final_table_id}"
+    if full_table_id in _KNOWN_TABLES:
+        return True
 
+    final_table_full_id_for_sql = f"`{full_table_id}`"
     final_table_ref = client.dataset(dataset_id).table(final_table_id)
-    final_table_full_id_for_sql = f"`{project_id}.{dataset_id}.{final_table_id}`"
-    staging_table_full_id_for_sql = f"`{project_id}.{dataset_id}.{staging_table_id}`"
 
     logger.info(f"Verificando/Criando tabela final: {final_table_full_id_for_sql}")
-    schema_final = [
-        bigquery.SchemaField("data_referencia", "DATE", mode="NULLABLE", description="Data de referência do indicador"),
-        bigquery.SchemaField("codigo_serie", "INTEGER", mode="NULLABLE", description="Código da série numérica do BCB SGS"),
-        bigquery.SchemaField("valor_serie", "FLOAT64", mode="NULLABLE", description="Valor do indicador na data de referência"),
-    ]
-    
-    table_definition = bigquery.Table(final_table_ref, schema=schema_final)
-    table_definition.time_partitioning = bigquery.TimePartitioning(
-        type_=bigquery.TimePartitioningType.DAY,
-        field="data_referencia"
-    )
-    table_definition.clustering_fields = ["codigo_serie"]
+    table_definition = bigquery.Table(final_table_ref, schema=_bigquery_schema(table_schema, with_descriptions=True))
+    table_definition.time_partitioning = _time_partitioning(table_schema, partition_type)
+    table_definition.clustering_fields = list(table_schema.clustering_fields)
 
     try:
-        client.create_table(table_definition, exists_ok=True) 
+        table = client.create_table(table_definition, exists_ok=True) 
+        live_partitioning = table.time_partitioning.type_ if table.time_partitioning else None
+        if live_partitioning != partition_type:
+            logger.warning(
+                f"Tabela final {final_table_full_id_for_sql} particionada por {live_partitioning}, não por {partition_type}. "
+                f"Particionada por dia, ela comporta no máximo 10.000 datas distintas."
+            )
+        added_columns = _migrate_final_table_schema(client, table, table_schema, final_table_full_id_for_sql)
+        if added_columns is None:
+            return False
+        if added_columns and table_schema.added_merge_keys:
+            _MIGRATED_TABLES.add(full_table_id)
         logger.info(f"Tabela final {final_table_full_id_for_sql} verificada/criada com sucesso com esquema, particionamento e clustering.")
     except Exception as e:
         logger.error(f"Falha ao criar/verificar a tabela final {final_table_full_id_for_sql}: {e}")
         return False
 
-    merge_join_keys = "target.data_referencia = source.data_referencia AND target.codigo_serie = source.codigo_serie"
-    update_set_clause = "target.valor_serie = source.valor_serie"
-    insert_columns = "(data_referencia, codigo_serie, valor_serie)"
-    source_columns_for_insert = "(source.data_referencia, source.codigo_serie, source.valor_serie)"
-
-    merge_sql = f"""
-    MERGE {final_table_full_id_for_sql} AS target
-    USING (SELECT DISTINCT * FROM {staging_table_full_id_for_sql}) AS source
-    ON {merge_join_keys}
-    WHEN MATCHED THEN
-        UPDATE SET {update_set_clause}
-    WHEN NOT MATCHED BY TARGET THEN
-        INSERT {insert_columns}
-        VALUES {source_columns_for_insert};
+    _KNOWN_TABLES.add(full_table_id)
+    return True
+
+
+def _migrate_final_table_schema(
+    client: bigquery.Client,
+    table: bigquery.Table,
+    table_schema: TableSchema,
+    final_table_full_id_for_sql: str
+) -> Optional[List[str]]:
+    """Acrescenta à tabela as colunas do esquema que faltam; retorna os nomes acrescentados, ou None se incompatível."""
+    live_types = {field.name: _BQ_TYPE_ALIASES.get(field.field_type, field.field_type) for field in table.schema}
+    conflicts = [
+        f"{column.name} ({live_types[column.name]} != {column.bq_type})"
+        for column in table_schema.columns
+        if column.name in live_types and live_types[column.name] != column.bq_type
+    ]
+    if conflicts:
+        logger.error(f"Tabela final {final_table_full_id_for_sql} incompatível com o esquema '{table_schema.pipeline}': {conflicts}")
+        return None
+
+    missing = [field for field in _bigquery_schema(table_schema, with_descriptions=True) if field.name not in live_types]
+    if not missing:
+        return []
+    logger.warning(
+        f"Tabela final {final_table_full_id_for_sql} no layout antigo; acrescentando as colunas "
+        f"{[field.name for field in missing]} do esquema '{table_schema.pipeline}'."
+    )
+    table.schema = list(table.schema) + missing
+    table.clustering_fields = list(table_schema.clustering_fields)
+    client.update_table(table, ["schema", "clustering_fields"])
+    return [field.name for field in missing]
+
+
+def delete_staging_table(
+    project_id: str,
+    dataset_id: str,
+    staging_table_id: str,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    return get_warehouse_backend(project_id, client).delete_staging(dataset_id, staging_table_id)
+
+
+def get_series_watermarks(
+    project_id: str,
+    dataset_id: str,
+    final_table_id: str,
+    client: Optional[bigquery.Client] = None
+) -> Dict[int, date]:
+    """Retorna MAX(data_referencia) por codigo_serie da tabela final; vazio se a tabela ainda não existe."""
+    final_table_full_id_for_sql = f"`{project_id}.{dataset_id}.{final_table_id}`"
+    try:
+        watermarks = get_warehouse_backend(project_id, client).series_watermarks(dataset_id, final_table_id)
+    except Exception as e:
+        logger.warning(f"Erro ao consultar watermark em {final_table_full_id_for_sql}: {e}")
+        return {}
+
+    if watermarks is None:
+        logger.info(f"Tabela final {final_table_full_id_for_sql} não encontrada. Sem watermark disponível.")
+        return {}
+    logger.info(f"Watermarks obtidos de {final_table_full_id_for_sql}: {watermarks}")
+    return watermarks
+
+
+def _get_staging_bounds(
+    client: bigquery.Client,
+    staging_table_full_id_for_sql: str,
+    source_filter: str
+) -> Optional[Tuple[Optional[date], Optional[date], List[int]]]:
+    """Intervalo de datas e códigos presentes na staging; None se a consulta falhar."""
+    bounds_sql = f"""
+    SELECT
+        MIN(data_referencia) AS data_minima,
+        MAX(data_referencia) AS data_maxima,
+        ARRAY_AGG(DISTINCT codigo_serie IGNORE NULLS) AS codigos
+    FROM {staging_table_full_id_for_sql}{source_filter}
+    """
+    try:
+        bounds_job = client.query(bounds_sql)
+        rows = list(bounds_job.result())
+        record_bigquery_job(bounds_job)
+    except Exception as e:
+        logger.warning(f"Não foi possível obter o intervalo da staging {staging_table_full_id_for_sql}: {e}")
+        return None
+    if not rows:
+        return None
+    row = rows[0]
+    return row["data_minima"], row["data_maxima"], sorted(int(code) for code in (row["codigos"] or []))
+
+
+def _log_unpruned_merge_bytes(client: bigquery.Client, merge_sql: str, final_table_full_id_for_sql: str) -> None:
+    """Dry run (sem custo) do MERGE sem poda, para comparar com os bytes do MERGE executado."""
+    try:
+        dry_run_job = client.query(merge_sql, job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False))
+        logger.info(f"MERGE sem poda em {final_table_full_id_for_sql} processaria {dry_run_job.total_bytes_processed} bytes (dry run).")
+    except Exception as e:
+        logger.warning(f"Dry run do MERGE sem poda em {final_table_full_id_for_sql} falhou: {e}")
+
+
+def merge_data_to_final_table(
+    project_id: str,
+    dataset_id: str,
+    staging_table_id: str,
+    final_table_id: str,
+    gcp_location: str = "southamerica-east1",
+    client: Optional[bigquery.Client] = None,
+    series_codes: Optional[List[int]] = None,
+    report_unpruned_bytes: Optional[bool] = None,
+    pipeline: str = "bcb",
+    partition_type: str = PARTITION_TYPE_DAY
+) -> bool:
+    """MERGE da staging na tabela final, restrito às partições e séries presentes na staging.
+
+    Chave e colunas do MERGE vêm do esquema registrado do pipeline (src.common.schemas); linhas da
+    staging sem data_referencia são ignoradas, nos dois backends. Staging que cobre mais de
+    MERGE_SLICE_DAYS dias é consolidada em um MERGE por janela; se uma janela falha, as anteriores
+    ficam gravadas e a reexecução (idempotente) completa a carga.
+
+    Com report_unpruned_bytes=True (padrão: variável BIGQUERY_MERGE_REPORT_UNPRUNED_BYTES), faz também
+    um dry run do MERGE sem poda e registra os bytes que ele processaria, para comparação.
     """
+    if report_unpruned_bytes is None:
+        report_unpruned_bytes = os.getenv(MERGE_REPORT_UNPRUNED_BYTES_ENV) == "1"
+
+    table_schema = get_table_schema(pipeline)
+    backend = get_warehouse_backend(project_id, client, gcp_location)
+    return backend.merge(
+        dataset_id, staging_table_id, final_table_id, table_schema,
+        source_conditions=merge_source_conditions(table_schema, series_codes),
+        partition_type=partition_type,
+        report_unpruned_bytes=report_unpruned_bytes
+    )
+
+
+def _merge_windows(data_minima: date, data_maxima: date) -> List[Tuple[date, date]]:
+    """Janelas consecutivas de até MERGE_SLICE_DAYS dias cobrindo [data_minima, data_maxima]."""
+    windows = []
+    inicio = data_minima
+    while inicio <= data_maxima:
+        fim = min(inicio + timedelta(days=MERGE_SLICE_DAYS - 1), data_maxima)
+        windows.append((inicio, fim))
+        inicio = fim + timedelta(days=1)
+    return windows
 
+
+def _run_merge(
+    client: bigquery.Client,
+    merge_sql: str,
+    staging_table_full_id_for_sql: str,
+    final_table_full_id_for_sql: str
+) -> bool:
     logger.info(f"Executando MERGE da staging table {staging_table_full_id_for_sql} para a final table {final_table_full_id_for_sql}.")
     logger.debug(f"Consulta MERGE:\n{merge_sql}")
 
     try:
         query_job = client.query(merge_sql)
         query_job.result()
+        record_bigquery_job(query_job)
 
         if query_job.errors:
             logger.error(f"Operação MERGE para {final_table_full_id_for_sql} falhou com erros:")
@@ -169,6 +417,7 @@ def merge_data_to_final_table(
         
         logger.info(f"Operação MERGE para {final_table_full_id_for_sql} concluída com sucesso.")
         logger.info(f"Linhas afetadas pela operação MERGE: {rows_affected_message}.")
+        logger.info(f"Bytes processados pelo MERGE: {query_job.total_bytes_processed}.")
         return True
 
     except Exception as e:
@@ -177,4 +426,355 @@ def merge_data_to_final_table(
              logger.error("Detalhes do erro do job de query (MERGE):")
              for error_detail in query_job.errors:
                 logger.error(f"  Message: {error_detail.get('message', 'N/A')}, Reason: {error_detail.get('reason', 'N/A')}, Location: {error_detail.get('location', 'N/A')}")
-        return False
\ No newline at end of file
+        return False
+
+
+def get_affected_partitions(df: pd.DataFrame) -> List[date]:
+    """Partições diárias (data_referencia) tocadas pelo DataFrame, em ordem."""
+    return sorted(set(pd.to_datetime(df["data_referencia"]).dt.date.dropna()))
+
+
+def _read_partition_rows(
+    client: bigquery.Client,
+    final_table_full_id_for_sql: str,
+    partitions: List[date],
+    table_schema: TableSchema
+) -> pd.DataFrame:
+    """Linhas já gravadas nas partições afetadas; as que não forem substituídas são reescritas junto."""
+    partition_rows_sql = f"""
+    SELECT {', '.join(table_schema.column_names)}
+    FROM {final_table_full_id_for_sql}
+    WHERE {table_schema.partition_field} IN UNNEST(@datas)
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ArrayQueryParameter("datas", "DATE", partitions),
+    ])
+    partition_rows_job = client.query(partition_rows_sql, job_config=job_config)
+    rows = partition_rows_job.result()
+    record_bigquery_job(partition_rows_job)
+    return pd.DataFrame([dict(row.items()) for row in rows], columns=table_schema.column_names)
+
+
+def overwrite_final_table_partitions(
+    df: pd.DataFrame,
+    project_id: str,
+    dataset_id: str,
+    final_table_id: str,
+    gcp_location: str = "southamerica-east1",
+    client: Optional[bigquery.Client] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    pipeline: str = "bcb"
+) -> bool:
+    """Grava as partições afetadas direto na tabela final com cargas WRITE_TRUNCATE em table$AAAAMMDD.
+
+    Alternativa ao staging + MERGE para tabelas particionadas por dia (as partições de uma tabela
+    particionada por mês não são endereçadas por table$AAAAMMDD): as linhas já gravadas nas
+    mesmas partições cuja chave (esquema do pipeline) não está no DataFrame são lidas e reescritas
+    junto. Cada partição é substituída atomicamente, mas o conjunto de partições não; uma falha
+    parcial é corrigida reexecutando a carga.
+    """
+    if df.empty:
+        logger.info(f"DataFrame para {dataset_id}.{final_table_id} está vazio. Nenhuma partição para reescrever.")
+        return True
+
+    table_schema = get_table_schema(pipeline)
+    try:
+        df = prepare_partition_rows(df, table_schema)
+    except ValueError as e:
+        logger.error(f"DataFrame incompatível com {dataset_id}.{final_table_id}: {e}")
+        return False
+    if df.empty:
+        logger.info(f"Nenhuma linha com data_referencia para {dataset_id}.{final_table_id}. Nenhuma partição para reescrever.")
+        return True
+    backend = get_warehouse_backend(project_id, client, gcp_location)
+    return backend.overwrite_partitions(df, dataset_id, final_table_id, table_schema, max_workers)
+
+
+class BigQueryBackend(WarehouseBackend):
+    """Operações dos pipelines no BigQuery, com o cliente injetado ou o compartilhado do projeto."""
+
+    def __init__(self, project_id: str, location: str = "southamerica-east1", client: Optional[bigquery.Client] = None):
+        self.project_id = project_id
+        self.location = location
+        self.client = client
+
+    def _connect(self, dataset_id: str) -> Optional[bigquery.Client]:
+        """Cliente com o dataset garantido; None (com o erro registrado) se a inicialização falhar."""
+        try:
+            client = self.client or get_bigquery_client(self.project_id)
+            ensure_bigquery_dataset_exists(client, dataset_id, self.project_id, location=self.location)
+            return client
+        except Exception as e:
+            logger.error(f"Falha ao inicializar o cliente BigQuery ou garantir a existência do dataset {self.project_id}.{dataset_id}: {e}")
+            return None
+
+    def load_staging(self, df: pd.DataFrame, dataset_id: str, staging_table_id: str, table_schema: TableSchema) -> bool:
+        client = self._connect(dataset_id)
+        if client is None:
+            return False
+
+        table_ref_full = f"{self.project_id}.{dataset_id}.{staging_table_id}"
+        logger.info(f"Iniciando carregamento de {len(df)} linhas para a tabela de STAGING: {table_ref_full}")
+
+        try:
+            _drop_previous_staging(client, table_ref_full)
+            parquet_buffer = _to_parquet_buffer(table_schema.to_arrow(df))
+            load_job = client.load_table_from_file(
+                parquet_buffer, table_ref_full, job_config=_staging_job_config(table_schema)
+            )
+            return _wait_for_staging_load(load_job, table_ref_full)
+
+        except Exception as e:
+            logger.error(f"Erro durante o carregamento de dados para STAGING {table_ref_full}: {e}")
+            return False
+
+    def load_staging_file(self, parquet_path: str, dataset_id: str, staging_table_id: str, table_schema: TableSchema) -> bool:
+        client = self._connect(dataset_id)
+        if client is None:
+            return False
+
+        table_ref_full = f"{self.project_id}.{dataset_id}.{staging_table_id}"
+        logger.info(f"Iniciando carregamento do arquivo {parquet_path} para a tabela de STAGING: {table_ref_full}")
+
+        try:
+            _drop_previous_staging(client, table_ref_full)
+            with open(parquet_path, "rb") as parquet_file:
+                load_job = client.load_table_from_file(
+                    parquet_file, table_ref_full, job_config=_staging_job_config(table_schema)
+                )
+            return _wait_for_staging_load(load_job, table_ref_full)
+
+        except Exception as e:
+            logger.error(f"Erro durante o carregamento do arquivo {parquet_path} para STAGING {table_ref_full}: {e}")
+            return False
+
+    def merge(
+        self,
+        dataset_id: str,
+        staging_table_id: str,
+        final_table_id: str,
+        table_schema: TableSchema,
+        source_conditions: List[str],
+        partition_type: str = PARTITION_TYPE_DAY,
+        report_unpruned_bytes: bool = False
+    ) -> bool:
+        client = self._connect(dataset_id)
+        if client is None:
+            return False
+
+        final_table_full_id_for_sql = f"`{self.project_id}.{dataset_id}.{final_table_id}`"
+        staging_table_full_id_for_sql = f"`{self.project_id}.{dataset_id}.{staging_table_id}`"
+
+        if not _ensure_final_table_exists(client, self.project_id, dataset_id, final_table_id, table_schema, partition_type):
+            return False
+
+        merge_join_keys = " AND ".join(f"target.{key} = source.{key}" for key in table_schema.merge_keys)
+        update_set_clause = ", ".join(f"target.{column} = source.{column}" for column in table_schema.update_columns)
+        insert_columns = f"({', '.join(table_schema.column_names)})"
+        source_columns_for_insert = f"({', '.join(f'source.{column}' for column in table_schema.column_names)})"
+
+        source_filter = f" WHERE {' AND '.join(source_conditions)}"
+
+        def _build_merge_sql(
+            join_condition: str,
+            pruning_condition: str = "",
+            source_filter: str = source_filter,
+            legacy_cleanup: bool = False
+        ) -> str:
+            merge_sql = f"""
+        MERGE {final_table_full_id_for_sql} AS target
+        USING (SELECT DISTINCT {', '.join(table_schema.column_names)} FROM {staging_table_full_id_for_sql}{source_filter}) AS source
+        ON {join_condition}
+        WHEN MATCHED THEN
+            UPDATE SET {update_set_clause}
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT {insert_columns}
+            VALUES {source_columns_for_insert};
+        """
+            if not legacy_cleanup:
+                return merge_sql
+            # Tabela recém-migrada do layout antigo: linhas legadas (NULL nas chaves novas) cobertas pela
+            # staging são apagadas na mesma transação do MERGE, senão ficariam ao lado das linhas novas
+            legacy_null = " OR ".join(f"target.{key} IS NULL" for key in table_schema.added_merge_keys)
+            legacy_match = " AND ".join(f"source.{key} = target.{key}" for key in LEGACY_MERGE_KEYS)
+            legacy_source = f"SELECT {', '.join(LEGACY_MERGE_KEYS)} FROM {staging_table_full_id_for_sql}{source_filter}"
+            return f"""
+        BEGIN TRANSACTION;
+        DELETE FROM {final_table_full_id_for_sql} AS target
+        WHERE ({legacy_null}){pruning_condition}
+        AND EXISTS (SELECT 1 FROM ({legacy_source}) AS source WHERE {legacy_match});
+        {merge_sql.strip()}
+        COMMIT TRANSACTION;
+        """
+
+        # Limites constantes no ON permitem ao BigQuery podar partições (data) e blocos do cluster (série)
+        windows: List[Tuple[Optional[date], Optional[date]]] = [(None, None)]
+        series_pruning = ""
+        bounds = _get_staging_bounds(client, staging_table_full_id_for_sql, source_filter)
+        if bounds is None:
+            logger.warning(f"MERGE para {final_table_full_id_for_sql} será executado sem poda de partições.")
+        else:
+            data_minima, data_maxima, codigos = bounds
+            if data_minima is None:
+                logger.info(f"Staging {staging_table_full_id_for_sql} sem linhas para {final_table_full_id_for_sql}. MERGE ignorado.")
+                return True
+            windows = _merge_windows(data_minima, data_maxima)
+            if codigos:
+                series_pruning = f" AND target.codigo_serie IN ({', '.join(str(code) for code in codigos)})"
+
+        # A limpeza das linhas legadas só acompanha o MERGE que segue a migração da tabela, e só com poda
+        full_table_id = f"{self.project_id}.{dataset_id}.{final_table_id}"
+        legacy_cleanup = full_table_id in _MIGRATED_TABLES
+        if legacy_cleanup and bounds is None:
+            logger.warning(f"Limpeza das linhas legadas de {final_table_full_id_for_sql} adiada: staging sem limites para poda.")
+            legacy_cleanup = False
+
+        if report_unpruned_bytes and bounds is not None:
+            _log_unpruned_merge_bytes(client, _build_merge_sql(merge_join_keys), final_table_full_id_for_sql)
+        if len(windows) > 1:
+            logger.info(
+                f"Staging {staging_table_full_id_for_sql} cobre {len(windows)} janelas de até {MERGE_SLICE_DAYS} dias; "
+                f"um MERGE por janela para {final_table_full_id_for_sql}."
+            )
+
+        for inicio, fim in windows:
+            pruning_condition = series_pruning
+            window_filter = source_filter
+            if inicio is not None:
+                date_range = f"BETWEEN DATE '{inicio.isoformat()}' AND DATE '{fim.isoformat()}'"
+                pruning_condition = f" AND target.data_referencia {date_range}{series_pruning}"
+                if len(windows) > 1:
+                    window_filter = f"{source_filter} AND data_referencia {date_range}"
+            merge_sql = _build_merge_sql(merge_join_keys + pruning_condition, pruning_condition, window_filter, legacy_cleanup)
+            if not _run_merge(client, merge_sql, staging_table_full_id_for_sql, final_table_full_id_for_sql):
+                return False
+        if legacy_cleanup:
+            _MIGRATED_TABLES.discard(full_table_id)
+        return True
+
+    def overwrite_partitions(
+        self,
+        df: pd.DataFrame,
+        dataset_id: str,
+        final_table_id: str,
+        table_schema: TableSchema,
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> bool:
+        partitions = get_affected_partitions(df)
+        full_table_id = f"{self.project_id}.{dataset_id}.{final_table_id}"
+        final_table_full_id_for_sql = f"`{full_table_id}`"
+        if len(partitions) > PARTITION_OVERWRITE_MAX_PARTITIONS:
+            logger.error(
+                f"{len(partitions)} partições afetadas em {final_table_full_id_for_sql} excedem o limite de "
+                f"{PARTITION_OVERWRITE_MAX_PARTITIONS} para reescrita. Use a estratégia MERGE."
+            )
+            return False
+
+        client = self._connect(dataset_id)
+        if client is None:
+            return False
+
+        if not _ensure_final_table_exists(client, self.project_id, dataset_id, final_table_id, table_schema):
+            return False
+
+        partition_field = table_schema.partition_field
+        df_final = df.copy()
+
+        try:
+            df_existing = _read_partition_rows(client, final_table_full_id_for_sql, partitions, table_schema)
+        except Exception as e:
+            logger.error(f"Erro ao ler as partições afetadas de {final_table_full_id_for_sql}: {e}")
+            return False
+
+        rows_new = len(df_final)
+        if not df_existing.empty:
+            df_existing[partition_field] = pd.to_datetime(df_existing[partition_field])
+            legacy_rows = superseded_legacy_rows(table_schema, df_existing, df_final)
+            if legacy_rows.any():
+                logger.info(f"{int(legacy_rows.sum())} linhas legadas de {final_table_full_id_for_sql} substituídas pelas novas.")
+                df_existing = df_existing[~legacy_rows]
+            df_final = pd.concat([df_final, df_existing], ignore_index=True)
+            df_final = df_final.drop_duplicates(subset=list(table_schema.merge_keys), keep="first")
+
+        # Sem esquema no job: a tabela final já o define e o Parquet tipado é casado por nome de coluna
+        # (numa tabela migrada do layout antigo, a ordem das colunas difere da do esquema registrado)
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition="WRITE_TRUNCATE",
+            create_disposition="CREATE_NEVER"
+        )
+
+        logger.info(
+            f"Reescrevendo {len(partitions)} partições de {final_table_full_id_for_sql} "
+            f"({len(df_final)} linhas, {len(df_final) - rows_new} já existentes mantidas)."
+        )
+
+        def _overwrite_partition(partition_group: Tuple[pd.Timestamp, pd.DataFrame]) -> bool:
+            partition_date, df_partition = partition_group
+            partition_ref = f"{full_table_id}${partition_date.strftime('%Y%m%d')}"
+            try:
+                parquet_buffer = _to_parquet_buffer(table_schema.to_arrow(df_partition))
+                load_job = client.load_table_from_file(parquet_buffer, partition_ref, job_config=job_config)
+                load_job.result()
+                record_bigquery_job(load_job)
+                if load_job.errors:
+                    logger.error(f"Carga da partição {partition_ref} falhou: {load_job.errors}")
+                    return False
+                return True
+            except Exception as e:
+                logger.error(f"Erro ao reescrever a partição {partition_ref}: {e}")
+                return False
+
+        resultados = run_concurrently(
+            _overwrite_partition,
+            list(df_final.groupby(partition_field, sort=True)),
+            max_workers=max_workers,
+            thread_name_prefix="bq-partition"
+        )
+        if not all(resultados):
+            logger.error(f"{resultados.count(False)} de {len(resultados)} partições de {final_table_full_id_for_sql} falharam.")
+            return False
+
+        logger.info(f"Partições de {final_table_full_id_for_sql} reescritas com sucesso.")
+        return True
+
+    def delete_staging(self, dataset_id: str, staging_table_id: str) -> bool:
+        table_ref_full = f"{self.project_id}.{dataset_id}.{staging_table_id}"
+        try:
+            client = self.client or get_bigquery_client(self.project_id)
+            client.delete_table(table_ref_full, not_found_ok=True)
+            _KNOWN_TABLES.discard(table_ref_full)
+            logger.info(f"Tabela de staging {table_ref_full} deletada.")
+            return True
+        except Exception as e:
+            logger.warning(f"Erro ao deletar tabela de staging {table_ref_full}: {e}")
+            return False
+
+    def series_watermarks(self, dataset_id: str, final_table_id: str) -> Optional[Dict[int, date]]:
+        watermark_sql = f"""
+        SELECT codigo_serie, MAX(data_referencia) AS watermark
+        FROM `{self.project_id}.{dataset_id}.{final_table_id}`
+        GROUP BY codigo_serie
+        """
+        client = self.client or get_bigquery_client(self.project_id)
+        try:
+            watermark_job = client.query(watermark_sql)
+            rows = watermark_job.result()
+        except NotFound:
+            return None
+        record_bigquery_job(watermark_job)
+        return {int(row["codigo_serie"]): row["watermark"] for row in rows if row["watermark"] is not None}
+
+
+def get_warehouse_backend(
+    project_id: str,
+    client: Optional[bigquery.Client] = None,
+    gcp_location: str = "southamerica-east1"
+) -> WarehouseBackend:
+    """Único ponto de escolha do backend: o cliente injetado, senão o warehouse local configurado
+    (LOCAL_WAREHOUSE_PATH, lido uma vez por processo), senão o BigQuery do projeto."""
+    if client is None:
+        warehouse = get_local_warehouse()
+        if warehouse is not None:
+            return LocalBackend(warehouse)
+    return BigQueryBackend(project_id, gcp_location, client)
@@ -0,0 +1,30 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def run_concurrently(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    thread_name_prefix: str = "pipeline"
+) -> List[R]:
+    """Executa func para cada item com no máximo max_workers threads, preservando a ordem dos itens."""
+    items = list(items)
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    workers = min(max_workers, len(items))
+    logger.info(f"Executando {len(items)} tarefas com {workers} workers em paralelo.")
+    # Cada tarefa roda numa cópia do contexto de quem chamou (ex.: a etapa de métricas corrente)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
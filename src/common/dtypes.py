@@ -0,0 +1,30 @@
+import logging
+from typing import Iterable
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ARROW_STRING_DTYPE = "string[pyarrow]"
+
+
+def to_compact_dtypes(
+    df: pd.DataFrame,
+    category_columns: Iterable[str] = (),
+    int32_columns: Iterable[str] = (),
+    string_columns: Iterable[str] = ()
+) -> pd.DataFrame:
+    """Converte colunas para representações compactas: categorias para texto repetitivo,
+    inteiros de 32 bits para códigos e strings Arrow para texto de alta cardinalidade."""
+    dtypes = {}
+    dtypes.update({col: "category" for col in category_columns if col in df.columns})
+    dtypes.update({col: "int32" for col in int32_columns if col in df.columns})
+    dtypes.update({col: ARROW_STRING_DTYPE for col in string_columns if col in df.columns})
+    if not dtypes:
+        return df
+
+    bytes_before = df.memory_usage(deep=True).sum()
+    df_compact = df.astype(dtypes)
+    bytes_after = df_compact.memory_usage(deep=True).sum()
+    logger.debug(f"Dtypes compactos: {bytes_before} -> {bytes_after} bytes em memória.")
+    return df_compact
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_STORE_PATH_ENV = "FINGERPRINT_STORE_PATH"
+
+_STORE: Optional["FingerprintStore"] = None
+_STORE_CONFIGURED = False
+_STORE_LOCK = threading.Lock()
+
+
+def compute_dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """Hash SHA-256 do conteúdo canônico do DataFrame (colunas e linhas ordenadas, índice ignorado)."""
+    columns = sorted(df.columns)
+    canonical = df[columns].sort_values(by=columns, na_position="last").reset_index(drop=True)
+
+    digest = hashlib.sha256()
+    digest.update("|".join(columns).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(canonical, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_key(pipeline: str, series: str, window: str) -> str:
+    return f"{pipeline}:{series}:{window}"
+
+
+class FingerprintStore:
+    """Último fingerprint carregado com sucesso por série/janela, persistido em SQLite."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT fingerprint FROM fingerprints WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, fingerprint: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?)", (key, fingerprint, time.time())
+            )
+
+    def is_unchanged(self, key: str, fingerprint: str) -> bool:
+        return self.get(key) == fingerprint
+
+
+def configure_fingerprint_store(path: Optional[str]) -> Optional[FingerprintStore]:
+    """Ativa (ou desativa, com path=None) o armazenamento de fingerprints do processo."""
+    global _STORE, _STORE_CONFIGURED
+    with _STORE_LOCK:
+        _STORE = FingerprintStore(path) if path else None
+        _STORE_CONFIGURED = True
+        return _STORE
+
+
+def get_fingerprint_store() -> Optional[FingerprintStore]:
+    """Retorna o armazenamento configurado; na primeira chamada usa FINGERPRINT_STORE_PATH, se existir."""
+    global _STORE, _STORE_CONFIGURED
+    with _STORE_LOCK:
+        if not _STORE_CONFIGURED:
+            path = os.getenv(FINGERPRINT_STORE_PATH_ENV)
+            _STORE = FingerprintStore(path) if path else None
+            _STORE_CONFIGURED = True
+            if _STORE is not None:
+                logger.info(f"Fingerprints de carga ativados em {path}.")
+        return _STORE
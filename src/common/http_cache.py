@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_DIR_ENV = "HTTP_CACHE_DIR"
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+_CACHE: Optional["HttpCache"] = None
+_CACHE_CONFIGURED = False
+_CACHE_LOCK = threading.Lock()
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status_code: int
+    body: bytes
+    headers: dict
+    stored_at: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("Last-Modified")
+
+    def to_response(self) -> requests.Response:
+        """Reconstrói um requests.Response equivalente ao armazenado."""
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.url = self.url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        response.from_cache = True
+        return response
+
+
+class HttpCache:
+    """Cache de respostas HTTP em disco (SQLite), com revalidação por ETag/Last-Modified e evicção LRU por tamanho.
+
+    Cada operação abre sua própria conexão, então a mesma instância pode ser usada por várias
+    threads e o mesmo diretório por vários processos (o SQLite serializa as escritas).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "http_cache.sqlite")
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    body BLOB NOT NULL,
+                    headers TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, status_code, body, headers, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        url, status_code, body, headers, stored_at = row
+        return CacheEntry(url, status_code, body, json.loads(headers), stored_at)
+
+    def put(self, key: str, response: requests.Response) -> None:
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        body = response.content
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, body, json.dumps(headers), now, now, len(body)),
+            )
+            self._evict(conn)
+
+    def refresh(self, key: str) -> None:
+        """Marca a entrada como revalidada (resposta 304), reiniciando seu TTL."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE entries SET stored_at = ?, last_access = ? WHERE key = ?", (now, now, key))
+
+    def total_bytes(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info(f"Cache HTTP: {evicted} entradas removidas (LRU) para respeitar o limite de {self.max_bytes} bytes.")
+
+
+def build_cache_key(url: str, params: Optional[dict] = None) -> str:
+    """Chave do cache: URL completa com parâmetros em ordem canônica."""
+    return requests.Request("GET", url, params=sorted((params or {}).items())).prepare().url
+
+
+def configure_http_cache(directory: Optional[str], max_bytes: int = HTTP_CACHE_MAX_BYTES) -> Optional[HttpCache]:
+    """Ativa (ou desativa, com directory=None) o cache HTTP compartilhado do processo."""
+    global _CACHE, _CACHE_CONFIGURED
+    with _CACHE_LOCK:
+        _CACHE = HttpCache(directory, max_bytes) if directory else None
+        _CACHE_CONFIGURED = True
+        return _CACHE
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Retorna o cache configurado; na primeira chamada usa a variável de ambiente HTTP_CACHE_DIR, se existir."""
+    global _CACHE, _CACHE_CONFIGURED
+    with _CACHE_LOCK:
+        if not _CACHE_CONFIGURED:
+            directory = os.getenv(HTTP_CACHE_DIR_ENV)
+            _CACHE = HttpCache(directory) if directory else None
+            _CACHE_CONFIGURED = True
+            if _CACHE is not None:
+                logger.info(f"Cache HTTP em disco ativado em {directory}.")
+        return _CACHE
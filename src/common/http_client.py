@@ -0,0 +1,189 @@
+import json
+import logging
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.common.concurrency import DEFAULT_MAX_WORKERS
+from src.common.http_cache import build_cache_key, get_http_cache
+from src.common.metrics import record_bytes_downloaded
+from src.common.rate_control import THROTTLE_STATUS_CODES, get_host_controller
+
+logger = logging.getLogger(__name__)
+
+# Conexões keep-alive por host; com pool_block=True funciona também como limite de conexões simultâneas
+HTTP_POOL_MAXSIZE = DEFAULT_MAX_WORKERS * 2
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_FACTOR = 1.0
+HTTP_BACKOFF_JITTER = 0.5
+HTTP_BACKOFF_MAX = 60
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+class ThrottleAwareRetry(Retry):
+    """Retry do urllib3 que avisa o controle de taxa do host a cada tentativa com 429/503."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and _pool is not None and response.status in THROTTLE_STATUS_CODES:
+            get_host_controller(_pool.host).on_throttle()
+        return super().increment(
+            method=method, url=url, response=response, error=error, _pool=_pool, _stacktrace=_stacktrace
+        )
+
+
+def build_http_session(
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    max_retries: int = HTTP_MAX_RETRIES,
+    backoff_factor: float = HTTP_BACKOFF_FACTOR
+) -> requests.Session:
+    """Cria uma sessão HTTP com pool de conexões, retry com backoff exponencial + jitter e Retry-After."""
+    retry = ThrottleAwareRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        backoff_max=HTTP_BACKOFF_MAX,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Devolve a última resposta para o raise_for_status dos extratores
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_maxsize,
+        pool_block=True,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """Retorna a sessão HTTP compartilhada do processo, criando-a na primeira chamada."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            logger.info(f"Criando sessão HTTP compartilhada (pool por host: {HTTP_POOL_MAXSIZE}, retries: {HTTP_MAX_RETRIES}).")
+            _SESSION = build_http_session()
+        return _SESSION
+
+
+def close_http_session() -> None:
+    """Fecha a sessão compartilhada; a próxima chamada a get_http_session cria uma nova."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
+
+
+def record_response_bytes(response: requests.Response) -> None:
+    """Registra na etapa de métricas corrente os bytes lidos da rede (compactados) para a resposta."""
+    raw = getattr(response, "raw", None)
+    downloaded = raw.tell() if raw is not None and hasattr(raw, "tell") else None
+    if isinstance(downloaded, int):
+        record_bytes_downloaded(downloaded)
+
+
+def _controlled_get(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    """GET sob o controle de taxa do host: circuito, vaga de concorrência e token antes de ir à rede."""
+    controller = get_host_controller(urlsplit(url).hostname or "")
+    is_probe = controller.check_circuit()
+    try:
+        controller.acquire()
+        try:
+            response = session.get(url, **kwargs)
+        finally:
+            controller.release()
+    except Exception:
+        # Qualquer erro conta como falha do host (conexão, timeout, corpo truncado, redirecionamentos...)
+        controller.record_result(failed=True, is_probe=is_probe)
+        raise
+    except BaseException:
+        controller.abandon(is_probe)
+        raise
+    controller.record_result(failed=response.status_code in RETRY_STATUS_CODES, is_probe=is_probe)
+    return response
+
+
+def http_get(
+    url: str,
+    params: Optional[dict] = None,
+    timeout: float = 30,
+    cache_ttl: Optional[float] = None,
+    stream: bool = False
+) -> requests.Response:
+    """GET pela sessão compartilhada; com cache_ttl e cache ativo, reutiliza/revalida respostas em disco.
+
+    Respostas em streaming (stream=True) nunca passam pelo cache, pois o corpo não é lido aqui.
+    Requisições que vão à rede passam pelo controle de taxa do host e levantam CircuitOpenError
+    enquanto o circuito dele estiver aberto.
+    """
+    session = get_http_session()
+    cache = get_http_cache() if cache_ttl is not None and not stream else None
+    if cache is None:
+        response = _controlled_get(session, url, params=params, timeout=timeout, stream=stream)
+        if not stream:
+            record_response_bytes(response)
+        return response
+
+    key = build_cache_key(url, params)
+    entry = cache.get(key)
+    if entry is not None and time.time() - entry.stored_at < cache_ttl:
+        logger.debug(f"Cache HTTP (hit): {key}")
+        return entry.to_response()
+
+    conditional_headers = {}
+    if entry is not None:
+        if entry.etag:
+            conditional_headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            conditional_headers["If-Modified-Since"] = entry.last_modified
+
+    response = _controlled_get(session, url, params=params, timeout=timeout, headers=conditional_headers or None)
+    record_response_bytes(response)
+
+    if entry is not None and response.status_code == 304:
+        logger.debug(f"Cache HTTP (revalidado): {key}")
+        cache.refresh(key)
+        return entry.to_response()
+
+    if _is_cacheable(response):
+        cache.put(key, response)
+    else:
+        logger.debug(f"Cache HTTP: resposta {response.status_code} de {key} não armazenada.")
+    return response
+
+
+def _is_cacheable(response: requests.Response) -> bool:
+    """Só respostas 200 com corpo JSON válido vão para o cache.
+
+    Uma página HTML de manutenção servida com 200 seria devolvida a cada nova tentativa (inclusive
+    às da task do Airflow) até o TTL expirar.
+    """
+    if response.status_code != 200 or "json" not in response.headers.get("Content-Type", "").lower():
+        return False
+    try:
+        json.loads(response.content)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,85 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, List, Union
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[Union[str, bytes]], encoding: str = "utf-8") -> Iterator[Any]:
+    """Itera sobre os elementos de um array JSON recebido em pedaços, sem materializar o corpo inteiro.
+
+    Levanta ValueError se o conteúdo não for um array ou se terminar antes do fechamento (corpo truncado).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    chunk_iter = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+    started = False
+
+    def _read_more() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = next(chunk_iter)
+        except StopIteration:
+            exhausted = True
+            buffer = buffer[pos:] + decoder.decode(b"", final=True)
+            pos = 0
+            return False
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if _read_more() or pos < len(buffer):
+                continue
+            if not started:
+                raise ValueError("Conteúdo JSON vazio: array esperado.")
+            raise ValueError("JSON truncado: array não foi fechado.")
+
+        char = buffer[pos]
+        if not started:
+            if char != "[":
+                raise ValueError(f"Array JSON esperado, encontrado {char!r}.")
+            started = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+
+        try:
+            value, end = _DECODER.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if _read_more():
+                continue
+            raise ValueError("JSON truncado ou inválido no meio do array.")
+
+        # Um escalar no fim do buffer pode estar incompleto (ex.: número cortado entre pedaços)
+        if end >= len(buffer) and not exhausted and not isinstance(value, (dict, list)):
+            _read_more()
+            continue
+
+        pos = end
+        yield value
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Agrupa um iterável em listas de até batch_size elementos."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,81 @@
+import logging
+import os
+from datetime import date
+from typing import Iterable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.common.schemas import TABLE_SCHEMAS
+
+logger = logging.getLogger(__name__)
+
+LANDING_ZONE_DIR_ENV = "LANDING_ZONE_DIR"
+# Snappy é descompactado em paralelo pelo BigQuery; grupos de linhas grandes reduzem overhead de metadados
+PARQUET_COMPRESSION = "snappy"
+PARQUET_ROW_GROUP_SIZE = 500_000
+DATE_COLUMNS = ("data_referencia",)
+
+
+def get_landing_zone_dir() -> Optional[str]:
+    """Diretório raiz da landing zone; None desativa a escrita (carga direta do DataFrame)."""
+    return os.getenv(LANDING_ZONE_DIR_ENV) or None
+
+
+def landing_path(base_dir: str, source: str, series: str, run_date: Optional[date] = None) -> str:
+    """Caminho do arquivo de uma execução: {base}/{source}/{series}/run_date=AAAA-MM-DD/{series}.parquet."""
+    run_date = run_date or date.today()
+    return os.path.join(base_dir, source, series, f"run_date={run_date.isoformat()}", f"{series}.parquet")
+
+
+def dataframe_to_arrow(df: pd.DataFrame, date_columns: Iterable[str] = DATE_COLUMNS) -> pa.Table:
+    """Converte para Arrow gravando colunas de data como DATE (date32), o tipo esperado no BigQuery."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for column in date_columns:
+        if column in table.column_names and pa.types.is_timestamp(table.schema.field(column).type):
+            index = table.schema.get_field_index(column)
+            table = table.set_column(index, column, table.column(column).cast(pa.date32()))
+    return table
+
+
+def write_landing_parquet(
+    df: pd.DataFrame,
+    source: str,
+    series: str,
+    run_date: Optional[date] = None,
+    base_dir: Optional[str] = None
+) -> str:
+    """Grava o Parquet da execução; fontes com esquema registrado (bcb, ibge) usam exatamente os tipos dele."""
+    base_dir = base_dir or get_landing_zone_dir()
+    if not base_dir:
+        raise ValueError(f"Landing zone não configurada (defina {LANDING_ZONE_DIR_ENV}).")
+
+    table_schema = TABLE_SCHEMAS.get(source)
+    table = table_schema.to_arrow(df) if table_schema is not None else dataframe_to_arrow(df)
+    path = landing_path(base_dir, source, series, run_date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Escrita atômica: reexecuções nunca deixam um arquivo parcial no lugar do anterior
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    pq.write_table(
+        table,
+        tmp_path,
+        compression=PARQUET_COMPRESSION,
+        row_group_size=PARQUET_ROW_GROUP_SIZE
+    )
+    os.replace(tmp_path, path)
+    logger.info(f"[{source}] {len(df)} linhas de '{series}' gravadas na landing zone: {path}")
+    return path
+
+
+def read_landing_parquet(
+    source: str,
+    series: str,
+    run_date: date,
+    base_dir: Optional[str] = None
+) -> pd.DataFrame:
+    base_dir = base_dir or get_landing_zone_dir()
+    if not base_dir:
+        raise ValueError(f"Landing zone não configurada (defina {LANDING_ZONE_DIR_ENV}).")
+    return pd.read_parquet(landing_path(base_dir, source, series, run_date))
@@ -0,0 +1,317 @@
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from src.common.schemas import BCB_SCHEMA, LEGACY_MERGE_KEYS, TableSchema
+from src.common.warehouse_backend import WarehouseBackend, merge_source_conditions
+
+logger = logging.getLogger(__name__)
+
+LOCAL_WAREHOUSE_PATH_ENV = "LOCAL_WAREHOUSE_PATH"
+# Tipos do esquema registrado -> afinidade de tipo no SQLite (datas como texto AAAA-MM-DD)
+SQLITE_TYPES = {"DATE": "TEXT", "INT64": "INTEGER", "FLOAT64": "REAL", "STRING": "TEXT"}
+
+_WAREHOUSE: Optional["LocalWarehouse"] = None
+_WAREHOUSE_CONFIGURED = False
+_WAREHOUSE_LOCK = threading.Lock()
+
+
+def _to_iso_dates(values: pd.Series) -> pd.Series:
+    """Datas como texto AAAA-MM-DD (comparáveis em ordem lexicográfica), NaT como NULL."""
+    datetimes = pd.to_datetime(values)
+    iso = pd.Series(datetimes.to_numpy().astype("datetime64[D]").astype(str), index=values.index, dtype=object)
+    return iso.where(datetimes.notna(), None)
+
+
+class LocalWarehouse:
+    """Backend embutido (SQLite) com a mesma semântica das operações do BigQuery usadas pelos pipelines.
+
+    Cada tabela "dataset.tabela" vira uma tabela SQLite com esse nome; a tabela final segue o esquema
+    registrado do pipeline, com as chaves do MERGE como chave primária, e o MERGE vira um upsert.
+    Serve para executar e medir o pipeline completo sem GCP.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS _datasets (dataset_id TEXT PRIMARY KEY)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _table_name(dataset_id: str, table_id: str) -> str:
+        return f'"{dataset_id}.{table_id}"'
+
+    def ensure_dataset(self, dataset_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO _datasets VALUES (?)", (dataset_id,))
+
+    def ensure_final_table(self, dataset_id: str, table_id: str, table_schema: TableSchema = BCB_SCHEMA) -> None:
+        """Cria a tabela final; se ela já existe em outro layout, recria com o esquema e copia as linhas.
+
+        A chave primária do SQLite não muda com ALTER TABLE, por isso a tabela é reconstruída. Colunas
+        novas ficam NULL nas linhas copiadas (linhas legadas, substituídas quando a chave antiga é recarregada).
+        """
+        table_name = self._table_name(dataset_id, table_id)
+        with self._connect() as conn:
+            info = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+            if info:
+                existing_columns = [row[1] for row in info]
+                primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0]
+                if set(table_schema.column_names) <= set(existing_columns) and primary_key == list(table_schema.merge_keys):
+                    return
+                logger.warning(
+                    f"Tabela {dataset_id}.{table_id} no layout antigo (colunas {existing_columns}); "
+                    f"migrando para o esquema '{table_schema.pipeline}'."
+                )
+                legacy_name = self._table_name(dataset_id, f"{table_id}__legado")
+                conn.execute(f"ALTER TABLE {table_name} RENAME TO {legacy_name}")
+                self._create_final_table(conn, table_name, table_schema)
+                copied = ", ".join(column for column in table_schema.column_names if column in existing_columns)
+                conn.execute(f"INSERT INTO {table_name} ({copied}) SELECT {copied} FROM {legacy_name}")
+                conn.execute(f"DROP TABLE {legacy_name}")
+            else:
+                self._create_final_table(conn, table_name, table_schema)
+
+    @staticmethod
+    def _create_final_table(conn: sqlite3.Connection, table_name: str, table_schema: TableSchema) -> None:
+        columns = ", ".join(f"{column.name} {SQLITE_TYPES[column.bq_type]}" for column in table_schema.columns)
+        conn.execute(
+            f"""
+            CREATE TABLE {table_name} (
+                {columns},
+                PRIMARY KEY ({', '.join(table_schema.merge_keys)})
+            )
+            """
+        )
+
+    def table_exists(self, dataset_id: str, table_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"{dataset_id}.{table_id}",)
+            ).fetchone()
+        return row is not None
+
+    def load_table(self, df: pd.DataFrame, dataset_id: str, table_id: str) -> int:
+        """Substitui a tabela pelo conteúdo do DataFrame (equivalente a WRITE_TRUNCATE)."""
+        df_local = df.copy()
+        if "data_referencia" in df_local.columns:
+            df_local["data_referencia"] = _to_iso_dates(df_local["data_referencia"])
+        with self._connect() as conn:
+            df_local.to_sql(f"{dataset_id}.{table_id}", conn, if_exists="replace", index=False, chunksize=100_000)
+        return len(df_local)
+
+    def drop_table(self, dataset_id: str, table_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self._table_name(dataset_id, table_id)}")
+
+    def merge(
+        self,
+        dataset_id: str,
+        staging_table_id: str,
+        final_table_id: str,
+        table_schema: TableSchema = BCB_SCHEMA,
+        source_conditions: Optional[Iterable[str]] = None
+    ) -> int:
+        """Upsert da staging (filtrada por source_conditions) na final pelas chaves do esquema; retorna as linhas afetadas.
+
+        Linhas legadas com a mesma chave antiga de alguma linha da staging são removidas antes.
+        """
+        conditions = list(source_conditions) if source_conditions is not None else merge_source_conditions(table_schema)
+        source_filter = f"WHERE {' AND '.join(conditions)}"
+        columns = ", ".join(table_schema.column_names)
+        final_table = self._table_name(dataset_id, final_table_id)
+        with self._connect() as conn:
+            if table_schema.added_merge_keys:
+                conn.execute(
+                    f"""
+                    DELETE FROM {final_table}
+                    WHERE ({' OR '.join(f'{key} IS NULL' for key in table_schema.added_merge_keys)})
+                    AND EXISTS (
+                        SELECT 1 FROM {self._table_name(dataset_id, staging_table_id)} AS source
+                        {source_filter}
+                        AND {' AND '.join(f'source.{key} = {final_table}.{key}' for key in LEGACY_MERGE_KEYS)}
+                    )
+                    """
+                )
+            cursor = conn.execute(
+                f"""
+                INSERT INTO {final_table} ({columns})
+                SELECT DISTINCT {columns} FROM {self._table_name(dataset_id, staging_table_id)}
+                {source_filter}
+                {self._upsert_clause(table_schema)}
+                """
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def _upsert_clause(table_schema: TableSchema) -> str:
+        updates = ", ".join(f"{column} = excluded.{column}" for column in table_schema.update_columns)
+        return f"ON CONFLICT ({', '.join(table_schema.merge_keys)}) DO UPDATE SET {updates}"
+
+    def overwrite_partitions(
+        self,
+        df: pd.DataFrame,
+        dataset_id: str,
+        final_table_id: str,
+        table_schema: TableSchema = BCB_SCHEMA
+    ) -> int:
+        """Grava, em uma transação, as linhas do DataFrame nas datas que ele cobre, substituindo as de mesma chave.
+
+        Mesmo resultado da reescrita de partições do BigQuery, que mantém as linhas já gravadas
+        cuja chave não está no DataFrame.
+        """
+        df_local = table_schema.select(df).copy()
+        df_local[table_schema.partition_field] = _to_iso_dates(df_local[table_schema.partition_field])
+        df_local = df_local.dropna(subset=[table_schema.partition_field]).drop_duplicates(
+            subset=list(table_schema.merge_keys), keep="first"
+        )
+        placeholders = ", ".join("?" for _ in table_schema.columns)
+        with self._connect() as conn:
+            if table_schema.added_merge_keys:
+                legacy_keys = df_local[list(LEGACY_MERGE_KEYS)].drop_duplicates()
+                conn.executemany(
+                    f"DELETE FROM {self._table_name(dataset_id, final_table_id)} "
+                    f"WHERE ({' OR '.join(f'{key} IS NULL' for key in table_schema.added_merge_keys)}) "
+                    f"AND {' AND '.join(f'{key} = ?' for key in LEGACY_MERGE_KEYS)}",
+                    legacy_keys.astype(object).itertuples(index=False, name=None)
+                )
+            conn.executemany(
+                f"INSERT INTO {self._table_name(dataset_id, final_table_id)} ({', '.join(table_schema.column_names)}) "
+                f"VALUES ({placeholders}) {self._upsert_clause(table_schema)}",
+                df_local.astype(object).where(df_local.notna(), None).itertuples(index=False, name=None)
+            )
+        return len(df_local)
+
+    def series_watermarks(self, dataset_id: str, table_id: str) -> Dict[int, date]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT codigo_serie, MAX(data_referencia) FROM {self._table_name(dataset_id, table_id)} "
+                "GROUP BY codigo_serie"
+            ).fetchall()
+        return {int(code): date.fromisoformat(watermark) for code, watermark in rows if watermark is not None}
+
+    def read_table(self, dataset_id: str, table_id: str) -> pd.DataFrame:
+        with self._connect() as conn:
+            df = pd.read_sql_query(f"SELECT * FROM {self._table_name(dataset_id, table_id)}", conn)
+        if "data_referencia" in df.columns:
+            df["data_referencia"] = pd.to_datetime(df["data_referencia"])
+        return df
+
+
+class LocalBackend(WarehouseBackend):
+    """Operações dos pipelines sobre o LocalWarehouse, com os mesmos retornos e logs do backend BigQuery."""
+
+    def __init__(self, warehouse: LocalWarehouse):
+        self.warehouse = warehouse
+
+    def load_staging(self, df: pd.DataFrame, dataset_id: str, staging_table_id: str, table_schema: TableSchema) -> bool:
+        try:
+            self.warehouse.ensure_dataset(dataset_id)
+            rows = self.warehouse.load_table(df, dataset_id, staging_table_id)
+            logger.info(f"{rows} linhas carregadas na staging local {dataset_id}.{staging_table_id}.")
+            return True
+        except Exception as e:
+            logger.error(f"Erro durante o carregamento da staging local {dataset_id}.{staging_table_id}: {e}")
+            return False
+
+    def load_staging_file(self, parquet_path: str, dataset_id: str, staging_table_id: str, table_schema: TableSchema) -> bool:
+        try:
+            df = table_schema.select(pd.read_parquet(parquet_path))
+        except Exception as e:
+            logger.error(f"Erro ao ler o arquivo {parquet_path} para a staging local: {e}")
+            return False
+        return self.load_staging(df, dataset_id, staging_table_id, table_schema)
+
+    def merge(
+        self,
+        dataset_id: str,
+        staging_table_id: str,
+        final_table_id: str,
+        table_schema: TableSchema,
+        source_conditions: List[str],
+        partition_type: str,
+        report_unpruned_bytes: bool
+    ) -> bool:
+        try:
+            self.warehouse.ensure_dataset(dataset_id)
+            self.warehouse.ensure_final_table(dataset_id, final_table_id, table_schema)
+            rows_affected = self.warehouse.merge(
+                dataset_id, staging_table_id, final_table_id, table_schema, source_conditions=source_conditions
+            )
+            logger.info(f"MERGE local para {dataset_id}.{final_table_id} concluído. Linhas afetadas: {rows_affected}.")
+            return True
+        except Exception as e:
+            logger.error(f"Erro durante o MERGE local para {dataset_id}.{final_table_id}: {e}")
+            return False
+
+    def overwrite_partitions(
+        self,
+        df: pd.DataFrame,
+        dataset_id: str,
+        final_table_id: str,
+        table_schema: TableSchema,
+        max_workers: int
+    ) -> bool:
+        try:
+            self.warehouse.ensure_dataset(dataset_id)
+            self.warehouse.ensure_final_table(dataset_id, final_table_id, table_schema)
+            rows = self.warehouse.overwrite_partitions(df, dataset_id, final_table_id, table_schema)
+            logger.info(f"{rows} linhas reescritas nas partições de {dataset_id}.{final_table_id} (backend local).")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao reescrever partições locais de {dataset_id}.{final_table_id}: {e}")
+            return False
+
+    def delete_staging(self, dataset_id: str, staging_table_id: str) -> bool:
+        try:
+            self.warehouse.drop_table(dataset_id, staging_table_id)
+            logger.info(f"Tabela de staging local {dataset_id}.{staging_table_id} deletada.")
+            return True
+        except Exception as e:
+            logger.warning(f"Erro ao deletar tabela de staging local {dataset_id}.{staging_table_id}: {e}")
+            return False
+
+    def series_watermarks(self, dataset_id: str, final_table_id: str) -> Optional[Dict[int, date]]:
+        if not self.warehouse.table_exists(dataset_id, final_table_id):
+            return None
+        return self.warehouse.series_watermarks(dataset_id, final_table_id)
+
+
+def configure_local_warehouse(path: Optional[str]) -> Optional[LocalWarehouse]:
+    """Ativa (ou desativa, com path=None) o backend local no lugar do BigQuery."""
+    global _WAREHOUSE, _WAREHOUSE_CONFIGURED
+    with _WAREHOUSE_LOCK:
+        _WAREHOUSE = LocalWarehouse(path) if path else None
+        _WAREHOUSE_CONFIGURED = True
+        return _WAREHOUSE
+
+
+def get_local_warehouse() -> Optional[LocalWarehouse]:
+    """Retorna o backend local configurado; na primeira chamada usa LOCAL_WAREHOUSE_PATH, se existir."""
+    global _WAREHOUSE, _WAREHOUSE_CONFIGURED
+    with _WAREHOUSE_LOCK:
+        if not _WAREHOUSE_CONFIGURED:
+            path = os.getenv(LOCAL_WAREHOUSE_PATH_ENV)
+            _WAREHOUSE = LocalWarehouse(path) if path else None
+            _WAREHOUSE_CONFIGURED = True
+            if _WAREHOUSE is not None:
+                logger.info(f"Backend local (SQLite) ativado em {path}; o BigQuery não será usado.")
+        return _WAREHOUSE
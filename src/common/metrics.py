@@ -0,0 +1,269 @@
+import abc
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Destinos separados por vírgula: "jsonl:/caminho.jsonl", "prometheus:/caminho.prom", "statsd:host:porta"
+PIPELINE_METRICS_SINKS_ENV = "PIPELINE_METRICS_SINKS"
+STATSD_PREFIX = "pipeline"
+# Estados do circuit breaker (src.common.rate_control) como número, para gauges
+CIRCUIT_STATE_CODES = {"closed": 0, "half_open": 1, "open": 2}
+
+_CURRENT_STAGE: ContextVar[Optional["StageMetrics"]] = ContextVar("pipeline_stage", default=None)
+_SINKS: List["MetricsSink"] = []
+_SINKS_CONFIGURED = False
+_SINKS_LOCK = threading.Lock()
+
+
+@dataclass
+class StageMetrics:
+    """Medições de uma etapa (extract, transform, stage_load, merge, cleanup...) de um pipeline."""
+    pipeline: str
+    series: str
+    stage: str
+    started_at: float = field(default_factory=time.time)
+    duration_s: float = 0.0
+    status: str = "ok"
+    rows: Optional[int] = None
+    bytes_downloaded: int = 0
+    bytes_processed: int = 0
+    job_ids: List[str] = field(default_factory=list)
+    throttled_requests: int = 0
+    # Último estado do controle de taxa de cada host usado na etapa (circuito, taxa, concorrência)
+    http_hosts: Dict[str, dict] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Etapas com requisições paralelas (ex.: backfill em janelas) somam de várias threads
+        self._lock = threading.Lock()
+
+    def add(self, bytes_downloaded: int = 0, bytes_processed: int = 0, job_id: Optional[str] = None) -> None:
+        with self._lock:
+            self.bytes_downloaded += bytes_downloaded
+            self.bytes_processed += bytes_processed
+            if job_id:
+                self.job_ids.append(job_id)
+
+    def set_host_state(self, host: str, state: dict, throttled: bool = False) -> None:
+        with self._lock:
+            self.http_hosts[host] = dict(state)
+            if throttled:
+                self.throttled_requests += 1
+
+    def mark_failed(self) -> None:
+        self.status = "erro"
+
+    def mark_skipped(self) -> None:
+        self.status = "ignorado"
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if not key.startswith("_")}
+
+
+class MetricsSink(abc.ABC):
+    """Destino das métricas de cada etapa concluída; subclasses sem emit falham ao ser instanciadas."""
+
+    @abc.abstractmethod
+    def emit(self, metrics: StageMetrics) -> None:
+        ...
+
+
+class JsonLinesSink(MetricsSink):
+    """Uma linha JSON por etapa, anexada ao arquivo."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: StageMetrics) -> None:
+        line = json.dumps(metrics.to_dict(), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class PrometheusTextfileSink(MetricsSink):
+    """Arquivo no formato do textfile collector do node_exporter, com o último valor de cada etapa.
+
+    O arquivo inteiro é reescrito atomicamente a cada etapa, como o collector exige.
+    """
+
+    GAUGES = (
+        ("pipeline_stage_duration_seconds", "Duração da etapa em segundos", "duration_s"),
+        ("pipeline_stage_rows", "Linhas processadas na etapa", "rows"),
+        ("pipeline_stage_bytes_downloaded", "Bytes baixados das APIs na etapa", "bytes_downloaded"),
+        ("pipeline_stage_bytes_processed", "Bytes processados pelo BigQuery na etapa", "bytes_processed"),
+        ("pipeline_stage_throttled_requests", "Respostas 429/503 recebidas na etapa", "throttled_requests"),
+        ("pipeline_stage_success", "1 se a última execução da etapa não falhou", "success"),
+        ("pipeline_stage_last_run_timestamp_seconds", "Início da última execução da etapa", "started_at"),
+    )
+    HOST_GAUGES = (
+        ("pipeline_http_host_rate_per_second", "Taxa de requisições permitida pelo controle adaptativo", "rate_per_second"),
+        ("pipeline_http_host_concurrency_limit", "Requisições simultâneas permitidas pelo controle adaptativo", "concurrency_limit"),
+        ("pipeline_http_host_circuit_state", "Circuito do host: 0 fechado, 1 meio-aberto, 2 aberto", "circuit_state"),
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._latest: Dict[Tuple[str, str, str], dict] = {}
+        self._hosts: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: StageMetrics) -> None:
+        values = metrics.to_dict()
+        values["success"] = 0 if metrics.status == "erro" else 1
+        with self._lock:
+            self._latest[(metrics.pipeline, metrics.series, metrics.stage)] = values
+            for host, state in metrics.http_hosts.items():
+                self._hosts[host] = {**state, "circuit_state": CIRCUIT_STATE_CODES.get(state.get("circuit_state"), 0)}
+            lines = []
+            for name, help_text, key in self.GAUGES:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for (pipeline, series, stage), stage_values in sorted(self._latest.items()):
+                    if stage_values.get(key) is None:
+                        continue
+                    labels = f'pipeline="{pipeline}",series="{series}",stage="{stage}"'
+                    lines.append(f"{name}{{{labels}}} {stage_values[key]}")
+            for name, help_text, key in self.HOST_GAUGES:
+                if not self._hosts:
+                    break
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for host, state in sorted(self._hosts.items()):
+                    lines.append(f'{name}{{host="{host}"}} {state[key]}')
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, self.path)
+
+
+class StatsdSink(MetricsSink):
+    """Envia as medições por UDP para um agente StatsD local (sem confirmação de entrega)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, prefix: str = STATSD_PREFIX):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, metrics: StageMetrics) -> None:
+        base = f"{self.prefix}.{metrics.pipeline}.{metrics.series}.{metrics.stage}"
+        lines = [f"{base}.duration:{metrics.duration_s * 1000:.0f}|ms"]
+        if metrics.rows is not None:
+            lines.append(f"{base}.rows:{metrics.rows}|c")
+        if metrics.bytes_downloaded:
+            lines.append(f"{base}.bytes_downloaded:{metrics.bytes_downloaded}|c")
+        if metrics.bytes_processed:
+            lines.append(f"{base}.bytes_processed:{metrics.bytes_processed}|c")
+        if metrics.throttled_requests:
+            lines.append(f"{base}.throttled_requests:{metrics.throttled_requests}|c")
+        for host, state in metrics.http_hosts.items():
+            host_base = f"{self.prefix}.http.{host.replace('.', '_')}"
+            lines.append(f"{host_base}.rate_per_second:{state['rate_per_second']}|g")
+            lines.append(f"{host_base}.concurrency_limit:{state['concurrency_limit']}|g")
+            lines.append(f"{host_base}.circuit_state:{CIRCUIT_STATE_CODES.get(state['circuit_state'], 0)}|g")
+        lines.append(f"{base}.{metrics.status}:1|c")
+        try:
+            self._socket.sendto("\n".join(lines).encode("utf-8"), self.address)
+        except OSError as e:
+            logger.debug(f"Falha ao enviar métricas StatsD para {self.address}: {e}")
+
+
+def build_sink(spec: str) -> MetricsSink:
+    kind, _, target = spec.strip().partition(":")
+    if kind == "jsonl":
+        return JsonLinesSink(target)
+    if kind == "prometheus":
+        return PrometheusTextfileSink(target)
+    if kind == "statsd":
+        host, _, port = target.rpartition(":")
+        return StatsdSink(host or "127.0.0.1", int(port or 8125))
+    raise ValueError(f"Destino de métricas desconhecido: {spec!r}")
+
+
+def configure_metrics_sinks(sinks: Optional[List[MetricsSink]]) -> None:
+    """Define os destinos das métricas do processo (None ou [] desativa)."""
+    global _SINKS, _SINKS_CONFIGURED
+    with _SINKS_LOCK:
+        _SINKS = list(sinks or [])
+        _SINKS_CONFIGURED = True
+
+
+def get_metrics_sinks() -> List[MetricsSink]:
+    """Destinos configurados; na primeira chamada usa PIPELINE_METRICS_SINKS, se existir."""
+    global _SINKS, _SINKS_CONFIGURED
+    with _SINKS_LOCK:
+        if not _SINKS_CONFIGURED:
+            specs = [spec for spec in os.getenv(PIPELINE_METRICS_SINKS_ENV, "").split(",") if spec.strip()]
+            _SINKS = [build_sink(spec) for spec in specs]
+            _SINKS_CONFIGURED = True
+            if _SINKS:
+                logger.info(f"Métricas por etapa enviadas para: {', '.join(specs)}")
+        return _SINKS
+
+
+def current_stage() -> Optional[StageMetrics]:
+    return _CURRENT_STAGE.get()
+
+
+def record_bytes_downloaded(num_bytes: int) -> None:
+    """Soma bytes baixados à etapa corrente (sem efeito fora de uma etapa)."""
+    metrics = _CURRENT_STAGE.get()
+    if metrics is not None and num_bytes:
+        metrics.add(bytes_downloaded=num_bytes)
+
+
+def record_http_host_state(host: str, state: dict, throttled: bool = False) -> None:
+    """Registra na etapa corrente o estado do controle de taxa de um host e, se for o caso, um throttling."""
+    metrics = _CURRENT_STAGE.get()
+    if metrics is not None:
+        metrics.set_host_state(host, state, throttled=throttled)
+
+
+def record_bigquery_job(job) -> None:
+    """Registra o ID e os bytes processados de um job do BigQuery na etapa corrente."""
+    metrics = _CURRENT_STAGE.get()
+    if metrics is None:
+        return
+    job_id = getattr(job, "job_id", None)
+    bytes_processed = getattr(job, "total_bytes_processed", None)
+    metrics.add(
+        bytes_processed=bytes_processed if isinstance(bytes_processed, int) else 0,
+        job_id=job_id if isinstance(job_id, str) else None
+    )
+
+
+@contextmanager
+def stage(pipeline: str, series: str, name: str) -> Iterator[StageMetrics]:
+    """Mede uma etapa: tempo de parede e o que as operações dentro dela registrarem.
+
+    Exceções marcam a etapa como falha e são propagadas; falhas sinalizadas por retorno
+    devem ser marcadas com mark_failed().
+    """
+    metrics = StageMetrics(pipeline=pipeline, series=series, stage=name)
+    token = _CURRENT_STAGE.set(metrics)
+    start = time.perf_counter()
+    try:
+        yield metrics
+    except BaseException:
+        metrics.mark_failed()
+        raise
+    finally:
+        metrics.duration_s = time.perf_counter() - start
+        _CURRENT_STAGE.reset(token)
+        _emit(metrics)
+
+
+def _emit(metrics: StageMetrics) -> None:
+    for sink in get_metrics_sinks():
+        try:
+            sink.emit(metrics)
+        except Exception as e:
+            logger.warning(f"Falha ao emitir métricas da etapa {metrics.stage} em {type(sink).__name__}: {e}")
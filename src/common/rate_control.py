@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from src.common.metrics import current_stage, record_http_host_state
+
+logger = logging.getLogger(__name__)
+
+# Teto por host, compartilhado pelo processo (caminhos síncrono e assíncrono): requisições por
+# segundo, rajada e requisições simultâneas. O controle adaptativo opera abaixo desses valores
+HOST_RATE_PER_SECOND = 10.0
+HOST_BURST = 10
+HOST_MAX_CONCURRENCY = 8
+
+# AIMD: cada sinal de throttling (429/503) multiplica taxa e concorrência pelo fator; cada resposta
+# bem-sucedida devolve uma fração do teto de taxa e ~1 requisição simultânea por janela completa
+RATE_CONTROL_DECREASE_FACTOR = 0.5
+RATE_CONTROL_RATE_RECOVERY = 0.05
+RATE_CONTROL_MIN_RATE_PER_SECOND = 0.2
+# Rajadas de 429 das requisições já em andamento contam como um único sinal dentro deste intervalo
+RATE_CONTROL_DECREASE_INTERVAL_SECONDS = 1.0
+# Espera entre tentativas de ocupar uma vaga no caminho assíncrono
+RATE_CONTROL_POLL_SECONDS = 0.01
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Circuit breaker: abre após N requisições seguidas falharem (já esgotados os retries), recusa
+# novas requisições por um tempo e depois deixa passar uma sonda; cada sonda que falha dobra a espera
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = 30.0
+CIRCUIT_OPEN_MAX_SECONDS = 300.0
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+_CONTROLLERS: Dict[str, "HostRateController"] = {}
+_CONTROLLERS_LOCK = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Requisição recusada sem ir à rede: o circuito do host está aberto."""
+
+
+class TokenBucket:
+    """Token bucket com reserva: cada requisição consome um token e espera o tempo da dívida, se houver.
+
+    O estado fica sob um lock de thread (e não de asyncio), para valer entre event loops e threads.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Consome um token e retorna quantos segundos esperar antes de usá-lo."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def set_rate(self, rate_per_second: float) -> None:
+        """Muda a taxa de reposição; tokens já acumulados continuam valendo."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate_per_second
+
+    def drain(self) -> None:
+        """Descarta a rajada acumulada (após throttling, a próxima requisição espera a nova taxa)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HostRateController:
+    """Taxa e concorrência adaptativas (AIMD) e circuit breaker para um host.
+
+    Uso por requisição lógica (os retries de uma mesma requisição não passam pelo circuito):
+
+        is_probe = controller.check_circuit()  # CircuitOpenError se o host está suspenso
+        controller.acquire()                    # ou await acquire_async(): vaga + token
+        try:
+            response = ...
+        finally:
+            controller.release()
+        controller.record_result(failed=..., is_probe=is_probe)
+
+    Qualquer exceção conta como falha; cancelamento chama abandon(is_probe).
+
+    Sinais de throttling de cada tentativa vão para on_throttle().
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate_per_second: float = HOST_RATE_PER_SECOND,
+        burst: int = HOST_BURST,
+        max_concurrency: int = HOST_MAX_CONCURRENCY
+    ):
+        self.host = host
+        self.max_rate = rate_per_second
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.concurrency_limit = float(max_concurrency)
+        self.circuit_state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = CIRCUIT_OPEN_SECONDS
+        self._opened_at = 0.0
+        self._last_decrease = float("-inf")
+        self._probe_in_flight = False
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._slot_released = threading.Condition(self._lock)
+
+    @property
+    def rate_per_second(self) -> float:
+        return self.bucket.rate
+
+    def snapshot(self) -> dict:
+        return {
+            "circuit_state": self.circuit_state,
+            "rate_per_second": round(self.bucket.rate, 3),
+            "concurrency_limit": int(self.concurrency_limit),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+    def _publish(self, throttled: bool = False) -> None:
+        record_http_host_state(self.host, self.snapshot(), throttled=throttled)
+
+    # Circuit breaker
+
+    def check_circuit(self) -> bool:
+        """Libera a requisição ou levanta CircuitOpenError; no meio-aberto, só uma sonda por vez passa.
+
+        Retorna se a requisição liberada é a sonda, para ser repassado a record_result/abandon: o
+        circuito pode mudar de estado enquanto ela está em andamento.
+        """
+        is_probe = False
+        with self._lock:
+            if self.circuit_state == CIRCUIT_OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    rejected = f"circuito aberto para {self.host}; nova sonda em {remaining:.0f}s"
+                else:
+                    self.circuit_state = CIRCUIT_HALF_OPEN
+                    logger.info(f"Circuito de {self.host} meio-aberto: enviando requisição de sonda.")
+                    rejected = None
+            else:
+                rejected = None
+            if rejected is None and self.circuit_state == CIRCUIT_HALF_OPEN:
+                if self._probe_in_flight:
+                    rejected = f"circuito de {self.host} aguardando o resultado da sonda"
+                else:
+                    self._probe_in_flight = True
+                    is_probe = True
+        if rejected:
+            metrics = current_stage()
+            if metrics is not None:
+                metrics.mark_skipped()
+            self._publish()
+            raise CircuitOpenError(rejected)
+        return is_probe
+
+    def record_result(self, failed: bool, is_probe: bool = False) -> None:
+        """Resultado final de uma requisição: 5xx/429 após os retries, conexão ou timeout contam como falha.
+
+        Só a sonda (is_probe, vindo de check_circuit) reabre o circuito meio-aberto ou libera a próxima
+        sonda; uma requisição liberada antes de o circuito abrir apenas conta a falha.
+        """
+        with self._lock:
+            if is_probe:
+                self._probe_in_flight = False
+            if not failed:
+                self.consecutive_failures = 0
+                if self.circuit_state != CIRCUIT_CLOSED:
+                    logger.info(f"Circuito de {self.host} fechado: sonda bem-sucedida.")
+                self.circuit_state = CIRCUIT_CLOSED
+                self.open_seconds = CIRCUIT_OPEN_SECONDS
+                self._increase()
+            else:
+                self.consecutive_failures += 1
+                if is_probe and self.circuit_state == CIRCUIT_HALF_OPEN:
+                    self.open_seconds = min(self.open_seconds * 2, CIRCUIT_OPEN_MAX_SECONDS)
+                    self._open()
+                elif self.circuit_state == CIRCUIT_CLOSED and self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                    self._open()
+        self._publish()
+
+    def abandon(self, is_probe: bool = False) -> None:
+        """Requisição interrompida sem resultado (ex.: cancelada): se era a sonda, libera-a sem contar falha."""
+        if is_probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self.circuit_state = CIRCUIT_OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(
+            f"Circuito aberto para {self.host} após {self.consecutive_failures} falhas seguidas; "
+            f"requisições suspensas por {self.open_seconds:.0f}s."
+        )
+
+    # AIMD
+
+    def on_throttle(self) -> None:
+        """429/503 em qualquer tentativa: reduz taxa e concorrência (no máximo uma vez por intervalo)."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= RATE_CONTROL_DECREASE_INTERVAL_SECONDS:
+                self._last_decrease = now
+                self.concurrency_limit = max(1.0, self.concurrency_limit * RATE_CONTROL_DECREASE_FACTOR)
+                rate = max(RATE_CONTROL_MIN_RATE_PER_SECOND, self.bucket.rate * RATE_CONTROL_DECREASE_FACTOR)
+                self.bucket.set_rate(rate)
+                self.bucket.drain()
+                logger.warning(
+                    f"Throttling em {self.host}: taxa reduzida para {rate:.2f} req/s e "
+                    f"{int(self.concurrency_limit)} requisições simultâneas."
+                )
+        self._publish(throttled=True)
+
+    def _increase(self) -> None:
+        if self.concurrency_limit < self.max_concurrency:
+            self.concurrency_limit = min(
+                float(self.max_concurrency), self.concurrency_limit + 1 / self.concurrency_limit
+            )
+            self._slot_released.notify_all()
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate * RATE_CONTROL_RATE_RECOVERY))
+
+    # Vagas de concorrência
+
+    def _try_acquire_slot(self) -> bool:
+        with self._lock:
+            if self._in_flight >= int(self.concurrency_limit):
+                return False
+            self._in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        with self._slot_released:
+            while self._in_flight >= int(self.concurrency_limit):
+                self._slot_released.wait()
+            self._in_flight += 1
+        self.bucket.wait()
+
+    async def acquire_async(self) -> None:
+        # O estado é compartilhado com threads e outros event loops, então a espera é por polling
+        while not self._try_acquire_slot():
+            await asyncio.sleep(RATE_CONTROL_POLL_SECONDS)
+        await self.bucket.acquire()
+
+    def release(self) -> None:
+        with self._slot_released:
+            self._in_flight -= 1
+            self._slot_released.notify_all()
+
+
+def configure_host_rate_limit(
+    host: str,
+    rate_per_second: float,
+    burst: Optional[int] = None,
+    max_concurrency: int = HOST_MAX_CONCURRENCY
+) -> HostRateController:
+    """Define o teto de requisições por segundo (e simultâneas) de um host para todo o processo."""
+    controller = HostRateController(
+        host, rate_per_second, burst if burst is not None else max(int(rate_per_second), 1), max_concurrency
+    )
+    with _CONTROLLERS_LOCK:
+        _CONTROLLERS[host] = controller
+    return controller
+
+
+def get_host_controller(host: str) -> HostRateController:
+    with _CONTROLLERS_LOCK:
+        if host not in _CONTROLLERS:
+            _CONTROLLERS[host] = HostRateController(host)
+        return _CONTROLLERS[host]
+
+
+def get_rate_control_states() -> Dict[str, dict]:
+    """Estado atual de cada host já usado no processo (circuito, taxa, concorrência)."""
+    with _CONTROLLERS_LOCK:
+        controllers = list(_CONTROLLERS.values())
+    return {controller.host: controller.snapshot() for controller in controllers}
+
+
+def reset_rate_controllers() -> None:
+    """Descarta limites e estados de todos os hosts (volta aos valores padrão)."""
+    with _CONTROLLERS_LOCK:
+        _CONTROLLERS.clear()
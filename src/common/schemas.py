@@ -0,0 +1,136 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Tipos do BigQuery usados nas tabelas dos pipelines -> tipo Arrow gravado no Parquet da carga
+ARROW_TYPES = {
+    "DATE": pa.date32(),
+    "INT64": pa.int64(),
+    "FLOAT64": pa.float64(),
+    "STRING": pa.string(),
+}
+
+# Chave das tabelas finais criadas antes do registro de esquemas, todas no layout do BCB. Numa tabela
+# migrada, as linhas antigas ficam com NULL nas chaves acrescentadas depois (ex.: localidade_codigo)
+LEGACY_MERGE_KEYS = ("data_referencia", "codigo_serie")
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    name: str
+    bq_type: str
+    description: str = ""
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    """Esquema das tabelas de staging e final de um pipeline.
+
+    merge_keys identificam uma linha na tabela final (chave do MERGE e da deduplicação); as demais
+    colunas são atualizadas quando a chave já existe.
+    """
+    pipeline: str
+    columns: Tuple[ColumnSpec, ...]
+    merge_keys: Tuple[str, ...]
+    partition_field: str = "data_referencia"
+    clustering_fields: Tuple[str, ...] = ("codigo_serie",)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    @property
+    def update_columns(self) -> List[str]:
+        return [column.name for column in self.columns if column.name not in self.merge_keys]
+
+    @property
+    def added_merge_keys(self) -> List[str]:
+        """Chaves que não existiam no layout antigo; NULL nelas marca uma linha legada."""
+        return [key for key in self.merge_keys if key not in LEGACY_MERGE_KEYS]
+
+    @property
+    def arrow_schema(self) -> pa.Schema:
+        return pa.schema([pa.field(column.name, ARROW_TYPES[column.bq_type]) for column in self.columns])
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Colunas do esquema, na ordem do esquema; falta de coluna é erro, colunas extras são descartadas."""
+        missing = [name for name in self.column_names if name not in df.columns]
+        if missing:
+            raise ValueError(f"Colunas ausentes para o esquema '{self.pipeline}': {missing}")
+        extra = [name for name in df.columns if name not in self.column_names]
+        if extra:
+            logger.warning(f"Colunas fora do esquema '{self.pipeline}' descartadas: {extra}")
+        return df[self.column_names]
+
+    def to_arrow(self, df: pd.DataFrame) -> pa.Table:
+        """Converte coluna a coluna para os tipos do esquema, sem inferência de dtypes do pandas."""
+        df = self.select(df)
+        arrays = [_to_arrow_array(df[column.name], column.bq_type) for column in self.columns]
+        return pa.Table.from_arrays(arrays, schema=self.arrow_schema)
+
+
+def superseded_legacy_rows(table_schema: TableSchema, existing: pd.DataFrame, incoming: pd.DataFrame) -> pd.Series:
+    """Linhas legadas de existing cuja chave antiga aparece em incoming (serão substituídas pelas novas)."""
+    added_keys = table_schema.added_merge_keys
+    if not added_keys or existing.empty or incoming.empty:
+        return pd.Series(False, index=existing.index)
+    legacy = existing[added_keys].isna().any(axis=1).to_numpy()
+    keys = list(LEGACY_MERGE_KEYS)
+    covered = pd.MultiIndex.from_frame(existing[keys]).isin(pd.MultiIndex.from_frame(incoming[keys]))
+    return pd.Series(legacy & covered, index=existing.index)
+
+
+def _to_arrow_array(values: pd.Series, bq_type: str) -> pa.Array:
+    if bq_type == "DATE":
+        days = pd.to_datetime(values).to_numpy(dtype="datetime64[D]")
+        return pa.array(days, type=pa.date32(), from_pandas=True)
+    if bq_type == "INT64":
+        # Cast seguro do Arrow: inteiros de qualquer largura e floats inteiros passam, 1.5 é erro
+        return pa.array(values, from_pandas=True).cast(pa.int64())
+    if bq_type == "FLOAT64":
+        return pa.array(values.to_numpy(dtype="float64", na_value=np.nan), type=pa.float64(), from_pandas=True)
+    # Texto: categorias, strings Arrow e objetos (inclusive códigos numéricos) viram string
+    strings = values.astype("string[pyarrow]")
+    return pa.array(strings.array).cast(pa.string())
+
+
+BCB_SCHEMA = TableSchema(
+    pipeline="bcb",
+    columns=(
+        ColumnSpec("data_referencia", "DATE", "Data de referência do indicador"),
+        ColumnSpec("codigo_serie", "INT64", "Código da série numérica do BCB SGS"),
+        ColumnSpec("valor_serie", "FLOAT64", "Valor do indicador na data de referência"),
+    ),
+    merge_keys=("data_referencia", "codigo_serie"),
+)
+
+IBGE_SCHEMA = TableSchema(
+    pipeline="ibge",
+    columns=(
+        ColumnSpec("data_referencia", "DATE", "Primeiro dia do período de referência"),
+        ColumnSpec("codigo_agregado", "STRING", "Código do agregado (tabela) do SIDRA"),
+        ColumnSpec("codigo_serie", "INT64", "Código da variável no agregado"),
+        ColumnSpec("nome_variavel_principal", "STRING", "Nome da variável"),
+        ColumnSpec("valor_serie", "FLOAT64", "Valor da variável no período e localidade"),
+        ColumnSpec("unidade_medida", "STRING", "Unidade de medida do valor"),
+        ColumnSpec("localidade_codigo", "STRING", "Código IBGE da localidade"),
+        ColumnSpec("localidade_nome", "STRING", "Nome da localidade"),
+    ),
+    merge_keys=("data_referencia", "codigo_serie", "localidade_codigo"),
+    clustering_fields=("codigo_serie", "localidade_codigo"),
+)
+
+TABLE_SCHEMAS: Dict[str, TableSchema] = {schema.pipeline: schema for schema in (BCB_SCHEMA, IBGE_SCHEMA)}
+
+
+def get_table_schema(pipeline: str) -> TableSchema:
+    try:
+        return TABLE_SCHEMAS[pipeline]
+    except KeyError:
+        raise ValueError(f"Esquema desconhecido para o pipeline '{pipeline}'. Disponíveis: {sorted(TABLE_SCHEMAS)}")
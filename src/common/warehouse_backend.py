@@ -0,0 +1,87 @@
+import abc
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.common.schemas import TableSchema
+
+
+class WarehouseBackend(abc.ABC):
+    """Destino das operações de src.common.bigquery_operations: BigQuery ou o warehouse local (SQLite).
+
+    As funções públicas de bigquery_operations validam a entrada e preparam o que é comum aos dois
+    (colunas do esquema, filtro da staging, linhas a gravar) e escolhem o backend em um só lugar,
+    get_warehouse_backend; o backend só executa. Falhas são registradas e devolvidas como False.
+    """
+
+    @abc.abstractmethod
+    def load_staging(self, df: pd.DataFrame, dataset_id: str, staging_table_id: str, table_schema: TableSchema) -> bool:
+        """Substitui a staging pelo DataFrame, já restrito às colunas do esquema."""
+
+    @abc.abstractmethod
+    def load_staging_file(self, parquet_path: str, dataset_id: str, staging_table_id: str, table_schema: TableSchema) -> bool:
+        """Substitui a staging pelo conteúdo de um Parquet da landing zone."""
+
+    @abc.abstractmethod
+    def merge(
+        self,
+        dataset_id: str,
+        staging_table_id: str,
+        final_table_id: str,
+        table_schema: TableSchema,
+        source_conditions: List[str],
+        partition_type: str,
+        report_unpruned_bytes: bool
+    ) -> bool:
+        """Upsert da staging, filtrada por source_conditions, na tabela final (criada se preciso).
+
+        partition_type e report_unpruned_bytes só têm efeito em backends particionados.
+        """
+
+    @abc.abstractmethod
+    def overwrite_partitions(
+        self,
+        df: pd.DataFrame,
+        dataset_id: str,
+        final_table_id: str,
+        table_schema: TableSchema,
+        max_workers: int
+    ) -> bool:
+        """Grava as linhas nas datas que elas cobrem, mantendo as demais linhas dessas datas.
+
+        df já vem de prepare_partition_rows: sem data nula e sem chave repetida.
+        """
+
+    @abc.abstractmethod
+    def delete_staging(self, dataset_id: str, staging_table_id: str) -> bool:
+        """Remove a staging; inexistente não é erro."""
+
+    @abc.abstractmethod
+    def series_watermarks(self, dataset_id: str, final_table_id: str) -> Optional[Dict[int, date]]:
+        """MAX(data_referencia) por codigo_serie; None se a tabela final não existe. Erros são levantados."""
+
+
+def merge_source_conditions(table_schema: TableSchema, series_codes: Optional[Iterable[int]] = None) -> List[str]:
+    """Filtro das linhas da staging consumidas pelo MERGE, o mesmo SQL nos dois backends.
+
+    Linha sem data não tem partição nem casa com nenhuma chave (NULL = NULL é falso): seria
+    reinserida a cada MERGE. Em staging compartilhada por várias séries, cada tabela final consome
+    apenas as suas.
+    """
+    conditions = [f"{table_schema.partition_field} IS NOT NULL"]
+    if series_codes:
+        conditions.append(f"codigo_serie IN ({', '.join(str(int(code)) for code in series_codes)})")
+    return conditions
+
+
+def prepare_partition_rows(df: pd.DataFrame, table_schema: TableSchema) -> pd.DataFrame:
+    """Linhas a gravar por reescrita de partições: colunas do esquema, data preenchida, uma linha por chave.
+
+    Levanta ValueError se faltar coluna do esquema.
+    """
+    partition_field = table_schema.partition_field
+    df_final = table_schema.select(df).copy()
+    df_final[partition_field] = pd.to_datetime(df_final[partition_field])
+    df_final = df_final.dropna(subset=[partition_field])
+    return df_final.drop_duplicates(subset=list(table_schema.merge_keys), keep="first").reset_index(drop=True)
@@ -0,0 +1,68 @@
+"""Catálogo e configuração do pipeline IBGE.
+
+Importado pela DAG durante o parse: só biblioteca padrão, sem pandas, BigQuery ou acesso às
+Variables do Airflow. As Variables são lidas em tempo de execução, por get_ibge_settings().
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# A periodicidade de cada agregado (mensal, trimestral, anual) vem dos metadados da API; a chave
+# opcional "period_type" a substitui
+IBGE_INDICATORS_TO_PROCESS = [
+    {
+        "indicator_name_table": "ipca_variacao_mensal_brasil",
+        "aggregate_code": "1737",
+        "variable_code": "63",
+        "variable_name_meta": "IPCA - Variação Mensal (Índice Geral, Brasil)",
+        "periods": "202301-202412",
+        "localities": "N1[all]",
+        "classification_filter": "315[7169]"
+    },
+    {
+        "indicator_name_table": "taxa_desocupacao_trimestral_brasil",
+        "aggregate_code": "4099",
+        "variable_code": "4099",
+        "variable_name_meta": "Taxa de Desocupação Trimestral (Brasil)",
+        "periods": "202301-202402",
+        "localities": "N1[all]"
+    },
+    {
+        "indicator_name_table": "pib_anual_valores_correntes_brasil",
+        "aggregate_code": "5938",
+        "variable_code": "37",
+        "variable_name_meta": "PIB Anual a Preços Correntes (Brasil)",
+        "periods": "2020-2022",
+        "localities": "N1[all]"
+    },
+    {
+        "indicator_name_table": "populacao_estimada_anual_brasil",
+        "aggregate_code": "6579",
+        "variable_code": "9324",
+        "variable_name_meta": "População Estimada Anual (Brasil)",
+        "periods": "2020-2022",
+        "localities": "N1[all]"
+    }
+]
+
+BIGQUERY_DATASET_IBGE_DEFAULT = "dados_publicos_ibge"
+GCP_LOCATION_DEFAULT = "southamerica-east1"
+
+
+@dataclass(frozen=True)
+class IbgeSettings:
+    project_id: Optional[str]
+    dataset_id: str
+    location: str
+
+
+@lru_cache(maxsize=1)
+def get_ibge_settings() -> IbgeSettings:
+    """Lê GCP_PROJECT_ID, BIGQUERY_DATASET_IBGE e GCP_LOCATION uma vez por processo, na primeira chamada."""
+    from airflow.models import Variable
+
+    return IbgeSettings(
+        project_id=Variable.get("GCP_PROJECT_ID", default_var=None),
+        dataset_id=Variable.get("BIGQUERY_DATASET_IBGE", default_var=BIGQUERY_DATASET_IBGE_DEFAULT),
+        location=Variable.get("GCP_LOCATION", default_var=GCP_LOCATION_DEFAULT),
+    )
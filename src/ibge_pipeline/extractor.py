@@ -1,23 +1,98 @@
+import asyncio
+import itertools
+import threading
 import requests
 import pandas as pd
 import logging
-from typing import Optional, Union, List
+from typing import Dict, Iterator, Optional, Union, List
 
 from src.common.utils import setup_logging
+from src.common.async_http import AsyncHttpClient
+from src.common.concurrency import run_concurrently
+from src.common.http_client import http_get, record_response_bytes
+from src.common.json_stream import iter_batches, iter_json_array
+from src.common.rate_control import CircuitOpenError
+from src.ibge_pipeline.sharding import IBGE_MAX_VALUES_PER_REQUEST, IbgeShard, count_variables, plan_ibge_shards
 
 logger = setup_logging()
 logger = logging.getLogger(__name__)
 
 IBGE_AGGREGATE_API_BASE_URL = "https://servicodados.ibge.gov.br/api/v3/agregados"
+# Validade das respostas no cache HTTP em disco (usado apenas quando HTTP_CACHE_DIR está configurado)
+IBGE_CACHE_TTL_SECONDS = 24 * 60 * 60
+# A periodicidade de um agregado praticamente não muda
+IBGE_METADATA_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+# Registros por DataFrame no modo streaming e tamanho dos pedaços lidos do socket
+IBGE_STREAM_BATCH_SIZE = 50_000
+IBGE_STREAM_CHUNK_BYTES = 1024 * 1024
+# Requisições simultâneas ao servidor do IBGE quando uma consulta é dividida em shards
+IBGE_SHARD_MAX_WORKERS = 4
 
+# Filtro de classificação: "315[7169]", lista de filtros ou {classificação: categorias}
+ClassificationFilter = Union[str, List[str], Dict[str, Union[str, List[str]]]]
 
-def fetch_ibge_aggregate_data(
+# Periodicidade por agregado, lida uma vez por processo
+_PERIOD_TYPES: Dict[str, str] = {}
+_PERIOD_TYPES_LOCK = threading.Lock()
+
+
+def fetch_ibge_period_type(aggregate_code: str) -> Optional[str]:
+    """Periodicidade do agregado segundo os metadados (periodicidade.frequencia: "mensal", "trimestral", "anual").
+
+    None se os metadados não puderem ser lidos ou não trouxerem a frequência; só respostas válidas
+    são memorizadas, então uma falha é tentada de novo na próxima chamada.
+    """
+    with _PERIOD_TYPES_LOCK:
+        if aggregate_code in _PERIOD_TYPES:
+            return _PERIOD_TYPES[aggregate_code]
+
+    request_url = f"{IBGE_AGGREGATE_API_BASE_URL}/{aggregate_code}/metadados"
+    response = None
+    try:
+        response = http_get(request_url, timeout=30, cache_ttl=IBGE_METADATA_CACHE_TTL_SECONDS)
+        response.raise_for_status()
+        frequencia = (response.json().get("periodicidade") or {}).get("frequencia")
+    except Exception as e:
+        _log_ibge_error(e, request_url, response)
+        return None
+
+    if not isinstance(frequencia, str) or not frequencia:
+        logger.warning(f"[IBGE] Metadados do agregado {aggregate_code} sem periodicidade.frequencia.")
+        return None
+    period_type = frequencia.lower()
+    logger.info(f"[IBGE] Periodicidade do agregado {aggregate_code}: {period_type}.")
+    with _PERIOD_TYPES_LOCK:
+        _PERIOD_TYPES[aggregate_code] = period_type
+    return period_type
+
+
+def clear_ibge_metadata_cache() -> None:
+    """Descarta as periodicidades memorizadas (útil em testes)."""
+    with _PERIOD_TYPES_LOCK:
+        _PERIOD_TYPES.clear()
+
+
+def format_classification_filter(classification_filter: Optional[ClassificationFilter]) -> Optional[str]:
+    """Monta o parâmetro classificacao da API de agregados (ex.: {"315": ["7169"], "2": "all"} -> "315[7169]|2[all]")."""
+    if not classification_filter:
+        return None
+    if isinstance(classification_filter, str):
+        return classification_filter
+    if isinstance(classification_filter, dict):
+        return "|".join(
+            f"{classification}[{','.join(map(str, categories)) if isinstance(categories, (list, tuple)) else categories}]"
+            for classification, categories in classification_filter.items()
+        )
+    return "|".join(str(item) for item in classification_filter)
+
+
+def _build_ibge_request(
     aggregate_code: str,
     variable_codes: Union[str, List[str]],
-    periods: str = "all",
-    localities_specifier: str = "N1[all]"
-) -> pd.DataFrame:
-    
+    periods: str,
+    localities_specifier: str,
+    classification_filter: Optional[ClassificationFilter] = None
+) -> tuple:
     variables_segment = "|".join(variable_codes) if isinstance(variable_codes, list) else str(variable_codes)
     url_path = f"{aggregate_code}/periodos/{periods}/variaveis/{variables_segment}"
     request_url = f"{IBGE_AGGREGATE_API_BASE_URL}/{url_path}"
@@ -26,44 +101,244 @@ def fetch_ibge_aggregate_data(
         "localidades": localities_specifier,
         "view": "flat"
     }
+    # Filtro aplicado no servidor: a API devolve só as categorias que serão gravadas
+    classificacao = format_classification_filter(classification_filter)
+    if classificacao:
+        params["classificacao"] = classificacao
+    return request_url, params
+
+
+def fetch_ibge_aggregate_data(
+    aggregate_code: str,
+    variable_codes: Union[str, List[str]],
+    periods: str = "all",
+    localities_specifier: str = "N1[all]",
+    period_type: Optional[str] = None,
+    max_values_per_request: Optional[int] = IBGE_MAX_VALUES_PER_REQUEST,
+    max_workers: int = IBGE_SHARD_MAX_WORKERS,
+    classification_filter: Optional[ClassificationFilter] = None
+) -> Optional[pd.DataFrame]:
+    """Consulta um agregado em view=flat; consultas grandes são divididas em shards buscados em paralelo.
+
+    O resultado mantém a linha de cabeçalho do view=flat uma única vez, no topo. DataFrame vazio
+    significa que a API não tem dados; None, que a extração falhou (basta um shard falhar, para não
+    carregar um resultado parcial). max_values_per_request=None desativa a divisão.
+    classification_filter restringe as categorias no servidor (parâmetro classificacao).
+    """
+    shards = _plan_shards(variable_codes, periods, localities_specifier, period_type, max_values_per_request)
+    if len(shards) == 1:
+        return _fetch_ibge_request(
+            aggregate_code, variable_codes, shards[0].periods, shards[0].localities, classification_filter
+        )
+
+    # Todas as requisições vão para o mesmo host: max_workers é o limite de conexões simultâneas a ele
+    frames = run_concurrently(
+        lambda shard: _fetch_ibge_request(
+            aggregate_code, variable_codes, shard.periods, shard.localities, classification_filter
+        ),
+        shards,
+        max_workers=max_workers,
+        thread_name_prefix=f"ibge-{aggregate_code}"
+    )
+
+    return _combine_shard_frames(frames, aggregate_code)
+
+
+async def fetch_ibge_aggregate_data_async(
+    client: AsyncHttpClient,
+    aggregate_code: str,
+    variable_codes: Union[str, List[str]],
+    periods: str = "all",
+    localities_specifier: str = "N1[all]",
+    period_type: Optional[str] = None,
+    max_values_per_request: Optional[int] = IBGE_MAX_VALUES_PER_REQUEST,
+    classification_filter: Optional[ClassificationFilter] = None
+) -> Optional[pd.DataFrame]:
+    """Versão assíncrona de fetch_ibge_aggregate_data; os shards concorrem sob os limites do cliente."""
+    shards = _plan_shards(variable_codes, periods, localities_specifier, period_type, max_values_per_request)
+    frames = await asyncio.gather(*(
+        _fetch_ibge_request_async(
+            client, aggregate_code, variable_codes, shard.periods, shard.localities, classification_filter
+        )
+        for shard in shards
+    ))
+    if len(shards) == 1:
+        return frames[0]
+    return _combine_shard_frames(list(frames), aggregate_code)
+
+
+def _combine_shard_frames(frames: List[Optional[pd.DataFrame]], aggregate_code: str) -> Optional[pd.DataFrame]:
+    failed = sum(df is None for df in frames)
+    if failed:
+        logger.error(f"[IBGE] {failed} de {len(frames)} requisições do agregado {aggregate_code} falharam. Resultado descartado.")
+        return None
 
+    non_empty = [df for df in frames if not df.empty]
+    if not non_empty:
+        logger.warning(f"[IBGE] Nenhum dado retornado nas {len(frames)} requisições do agregado {aggregate_code}.")
+        return pd.DataFrame()
+
+    # Cada resposta view=flat começa com a linha de cabeçalho; fica só a do primeiro shard
+    df = pd.concat([non_empty[0]] + [frame.iloc[1:] for frame in non_empty[1:]], ignore_index=True)
+    logger.info(f"[IBGE] {len(df)} registros consolidados de {len(frames)} requisições do agregado {aggregate_code}.")
+    return df
+
+
+def _plan_shards(
+    variable_codes: Union[str, List[str]],
+    periods: str,
+    localities_specifier: str,
+    period_type: Optional[str],
+    max_values_per_request: Optional[int]
+) -> List[IbgeShard]:
+    if not max_values_per_request:
+        return [IbgeShard(periods, localities_specifier)]
+    return plan_ibge_shards(
+        periods, localities_specifier, period_type,
+        variable_count=count_variables(variable_codes), max_values=max_values_per_request
+    )
+
+
+def _fetch_ibge_request(
+    aggregate_code: str,
+    variable_codes: Union[str, List[str]],
+    periods: str,
+    localities_specifier: str,
+    classification_filter: Optional[ClassificationFilter] = None
+) -> Optional[pd.DataFrame]:
+    """Uma requisição à API; DataFrame vazio para resposta vazia e None em caso de falha."""
+    request_url, params = _build_ibge_request(
+        aggregate_code, variable_codes, periods, localities_specifier, classification_filter
+    )
     logger.info(f"[IBGE] Requisição: {request_url} | Parâmetros: {params}")
 
+    response = None
     try:
-        response = requests.get(request_url, params=params, timeout=90)
-        response.raise_for_status()
+        response = http_get(request_url, params=params, timeout=90, cache_ttl=IBGE_CACHE_TTL_SECONDS)
+        return _ibge_response_to_frame(response, request_url, aggregate_code)
+    except Exception as e:
+        _log_ibge_error(e, request_url, response)
+    return None
 
-        if not response.text or response.text == "[]":
-            logger.warning(f"[IBGE] Resposta vazia da API: {request_url}")
-            return pd.DataFrame()
 
-        data_json = response.json()
-        if not data_json:
-            logger.warning(f"[IBGE] JSON vazio retornado da API: {request_url}")
-            return pd.DataFrame()
+async def _fetch_ibge_request_async(
+    client: AsyncHttpClient,
+    aggregate_code: str,
+    variable_codes: Union[str, List[str]],
+    periods: str,
+    localities_specifier: str,
+    classification_filter: Optional[ClassificationFilter] = None
+) -> Optional[pd.DataFrame]:
+    request_url, params = _build_ibge_request(
+        aggregate_code, variable_codes, periods, localities_specifier, classification_filter
+    )
+    logger.info(f"[IBGE] Requisição: {request_url} | Parâmetros: {params}")
 
-        df = pd.DataFrame(data_json)
-        logger.info(f"[IBGE] {len(df)} registros retornados para o agregado {aggregate_code}.")
-        return df
+    response = None
+    try:
+        response = await client.get(request_url, params=params, timeout=90)
+        return _ibge_response_to_frame(response, request_url, aggregate_code)
+    except Exception as e:
+        _log_ibge_error(e, request_url, response)
+    return None
 
-    except requests.exceptions.HTTPError as e:
-        logger.exception(f"[IBGE] HTTPError para {request_url}: {e}")
-        _log_response_content(response)
 
-    except requests.exceptions.ConnectionError as e:
-        logger.exception(f"[IBGE] ConnectionError para {request_url}: {e}")
+def _ibge_response_to_frame(response, request_url: str, aggregate_code: str) -> pd.DataFrame:
+    response.raise_for_status()
 
-    except requests.exceptions.Timeout as e:
-        logger.exception(f"[IBGE] Timeout para {request_url}: {e}")
+    if not response.text or response.text == "[]":
+        logger.warning(f"[IBGE] Resposta vazia da API: {request_url}")
+        return pd.DataFrame()
 
-    except ValueError as e:
-        logger.exception(f"[IBGE] Erro ao decodificar JSON: {e}")
+    data_json = response.json()
+    if not data_json:
+        logger.warning(f"[IBGE] JSON vazio retornado da API: {request_url}")
+        return pd.DataFrame()
+
+    df = pd.DataFrame(data_json)
+    logger.info(f"[IBGE] {len(df)} registros retornados para o agregado {aggregate_code}.")
+    return df
+
+
+def _log_ibge_error(error: Exception, request_url: str, response) -> None:
+    if isinstance(error, CircuitOpenError):
+        logger.warning(f"[IBGE] Requisição ignorada ({request_url}): {error}")
+    elif isinstance(error, requests.exceptions.HTTPError):
+        logger.exception(f"[IBGE] HTTPError para {request_url}: {error}")
+        _log_response_content(response)
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        logger.exception(f"[IBGE] ConnectionError para {request_url}: {error}")
+    elif isinstance(error, requests.exceptions.Timeout):
+        logger.exception(f"[IBGE] Timeout para {request_url}: {error}")
+    elif isinstance(error, ValueError):
+        logger.exception(f"[IBGE] Erro ao decodificar JSON: {error}")
         _log_response_content(response)
+    else:
+        logger.exception(f"[IBGE] Erro inesperado ao requisitar {request_url}: {error}")
 
-    except Exception as e:
-        logger.exception(f"[IBGE] Erro inesperado ao requisitar {request_url}: {e}")
 
-    return pd.DataFrame()
+def fetch_ibge_aggregate_data_batches(
+    aggregate_code: str,
+    variable_codes: Union[str, List[str]],
+    periods: str = "all",
+    localities_specifier: str = "N1[all]",
+    batch_size: int = IBGE_STREAM_BATCH_SIZE,
+    period_type: Optional[str] = None,
+    max_values_per_request: Optional[int] = IBGE_MAX_VALUES_PER_REQUEST,
+    classification_filter: Optional[ClassificationFilter] = None
+) -> Iterator[pd.DataFrame]:
+    """Versão em streaming: lê o array view=flat incrementalmente e emite DataFrames de até batch_size linhas.
+
+    Consultas grandes são divididas nos mesmos shards de fetch_ibge_aggregate_data, lidos em
+    sequência; a linha de cabeçalho aparece uma vez, no primeiro lote. Nenhum lote significa que a
+    API não tem dados; falhas, antes ou depois do primeiro lote, são registradas e propagadas, para
+    que o chamador não trate erro como ausência de dados nem carregue um resultado parcial.
+    """
+    shards = _plan_shards(variable_codes, periods, localities_specifier, period_type, max_values_per_request)
+
+    total = 0
+    for shard in shards:
+        request_url, params = _build_ibge_request(
+            aggregate_code, variable_codes, shard.periods, shard.localities, classification_filter
+        )
+        logger.info(f"[IBGE] Requisição (streaming): {request_url} | Parâmetros: {params}")
+
+        response = None
+        try:
+            response = http_get(request_url, params=params, timeout=90, stream=True)
+            response.raise_for_status()
+
+            records = iter_json_array(response.iter_content(chunk_size=IBGE_STREAM_CHUNK_BYTES))
+            if total > 0:
+                # Cabeçalho já emitido por um shard anterior
+                records = itertools.islice(records, 1, None)
+            for batch in iter_batches(records, batch_size):
+                total += len(batch)
+                yield pd.DataFrame.from_records(batch)
+
+        except Exception as e:
+            if total > 0:
+                logger.error(f"[IBGE] Streaming interrompido após {total} registros de {request_url}: {e}")
+                raise
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"[IBGE] Requisição ignorada ({request_url}): {e}")
+            elif isinstance(e, requests.exceptions.HTTPError):
+                logger.exception(f"[IBGE] HTTPError para {request_url}: {e}")
+            elif isinstance(e, ValueError):
+                logger.exception(f"[IBGE] Erro ao decodificar JSON: {e}")
+            else:
+                logger.exception(f"[IBGE] Erro inesperado ao requisitar {request_url}: {e}")
+            raise
+
+        finally:
+            if response is not None:
+                record_response_bytes(response)
+                response.close()
+
+    if total == 0:
+        logger.warning(f"[IBGE] JSON vazio retornado da API para o agregado {aggregate_code}.")
+    else:
+        logger.info(f"[IBGE] {total} registros lidos em streaming para o agregado {aggregate_code}.")
 
 
 def _log_response_content(response: Optional[requests.Response]) -> None:
@@ -1,58 +1,81 @@
+import asyncio
 import logging
-from airflow.models import Variable
+import os
+import pandas as pd
+from datetime import date
+from typing import Dict, List, Optional
 from google.cloud import bigquery
 
 from src.common.utils import setup_logging
-from src.common.bigquery_operations import load_df_to_staging_table, merge_data_to_final_table
-from src.ibge_pipeline.extractor import fetch_ibge_aggregate_data
-from src.ibge_pipeline.transformer import transform_ibge_data
+from src.common.async_http import AsyncHttpClient, run_async
+from src.common.concurrency import DEFAULT_MAX_WORKERS, run_concurrently
+from src.common.bigquery_operations import (
+    LOAD_STRATEGY_MERGE,
+    LOAD_STRATEGY_PARTITION_OVERWRITE,
+    PARTITION_OVERWRITE_MAX_PARTITIONS,
+    delete_staging_table,
+    get_affected_partitions,
+    load_df_to_staging_table,
+    load_parquet_to_staging_table,
+    merge_data_to_final_table,
+    overwrite_final_table_partitions
+)
+from src.common.fingerprint import compute_dataframe_fingerprint, fingerprint_key, get_fingerprint_store
+from src.common.landing_zone import get_landing_zone_dir, landing_path, write_landing_parquet
+from src.common.metrics import StageMetrics, stage
+from src.ibge_pipeline.config import IBGE_INDICATORS_TO_PROCESS, get_ibge_settings
+from src.ibge_pipeline.extractor import (
+    fetch_ibge_aggregate_data,
+    fetch_ibge_aggregate_data_async,
+    fetch_ibge_aggregate_data_batches,
+    fetch_ibge_period_type,
+    format_classification_filter
+)
+from src.ibge_pipeline.transformer import transform_ibge_data, transform_ibge_data_batches
 
 # Setup
 setup_logging()
 logger = logging.getLogger(__name__)
 
-GCP_PROJECT_ID = Variable.get("GCP_PROJECT_ID")
-BIGQUERY_DATASET_IBGE = Variable.get("BIGQUERY_DATASET_IBGE", default_var="dados_publicos_ibge")
-GCP_LOCATION = Variable.get("GCP_LOCATION", default_var="southamerica-east1")
-
-IBGE_INDICATORS_TO_PROCESS = [
-    {
-        "indicator_name_table": "ipca_variacao_mensal_brasil",
-        "aggregate_code": "1737",
-        "variable_code": "63",
-        "variable_name_meta": "IPCA - Variação Mensal (Índice Geral, Brasil)",
-        "periods": "202301-202412",
-        "localities": "N1[all]",
-        "classification_filter": "315[7169]"
-    },
-    {
-        "indicator_name_table": "taxa_desocupacao_trimestral_brasil",
-        "aggregate_code": "4099",
-        "variable_code": "4099",
-        "variable_name_meta": "Taxa de Desocupação Trimestral (Brasil)",
-        "periods": "202301-202402",
-        "localities": "N1[all]"
-    },
-    {
-        "indicator_name_table": "pib_anual_valores_correntes_brasil",
-        "aggregate_code": "5938",
-        "variable_code": "37",
-        "variable_name_meta": "PIB Anual a Preços Correntes (Brasil)",
-        "periods": "2020-2022",
-        "localities": "N1[all]"
-    },
-    {
-        "indicator_name_table": "populacao_estimada_anual_brasil",
-        "aggregate_code": "6579",
-        "variable_code": "9324",
-        "variable_name_meta": "População Estimada Anual (Brasil)",
-        "periods": "2020-2022",
-        "localities": "N1[all]"
-    }
-]
+IBGE_LANDING_SOURCE = "ibge"
+# Estratégia padrão de escrita; cada indicador pode sobrescrever com a chave "load_strategy"
+IBGE_LOAD_STRATEGY = LOAD_STRATEGY_MERGE
+
+
+
+def _record_extraction(metrics: StageMetrics, df_raw: Optional[pd.DataFrame]) -> None:
+    if df_raw is not None:
+        metrics.rows = len(df_raw)
+    elif metrics.status != "ignorado":  # circuito aberto: a etapa já foi marcada como ignorada
+        metrics.mark_failed()
+
+
+def _resolve_period_type(config: dict) -> Optional[str]:
+    """Periodicidade do indicador: a chave "period_type" do catálogo, se houver, ou a dos metadados do agregado.
+
+    Sem ela, códigos AAAAMM de 01 a 04 seriam lidos como trimestres, e as datas gravadas de uma
+    série mensal estariam erradas; por isso None faz o indicador falhar.
+    """
+    period_type = config.get("period_type") or fetch_ibge_period_type(config["aggregate_code"])
+    if period_type is None:
+        logger.error(
+            f"[{config['indicator_name_table']}] Periodicidade do agregado {config['aggregate_code']} desconhecida. "
+            f"Defina \"period_type\" no catálogo ou tente novamente."
+        )
+    return period_type
+
 
+def run_full_ibge_pipeline_for_indicator(
+    config: dict,
+    client: Optional[bigquery.Client] = None,
+    df_raw: Optional[pd.DataFrame] = None,
+    extracted: bool = False
+) -> bool:
+    """Executa um indicador; False se qualquer etapa falhar, inclusive a extração.
 
-def run_full_ibge_pipeline_for_indicator(config: dict) -> bool:
+    Com df_raw (já extraído por _extract_indicators_async), começa pela transformação; extracted=True
+    indica que df_raw=None é uma extração que falhou.
+    """
     name = config["indicator_name_table"]
     agg_code = config["aggregate_code"]
     var_code = config["variable_code"]
@@ -60,71 +83,288 @@ def run_full_ibge_pipeline_for_indicator(config: dict) -> bool:
     periods = config["periods"]
     localities = config["localities"]
     filter_code = config.get("classification_filter")
+    compact = config.get("compact_dtypes", False)
+    load_strategy = config.get("load_strategy", IBGE_LOAD_STRATEGY)
 
     logger.info(f"--- Iniciando pipeline IBGE: {name} ---")
 
     staging_id = f"ibge_{name}_staging"
     final_id = f"ibge_{name}"
 
-    df_raw = fetch_ibge_aggregate_data(
-        aggregate_code=agg_code,
-        variable_codes=var_code,
-        periods=periods,
-        localities_specifier=localities
-    )
-    if df_raw.empty:
-        logger.warning(f"[{name}] Nenhum dado extraído. Pulando.")
-        return True
+    period_type = _resolve_period_type(config)
+    if period_type is None:
+        return False
+
+    if config.get("stream"):
+        # Agregados grandes (ex.: N6[all]) são lidos e transformados em lotes, sem carregar o JSON inteiro;
+        # extração e transformação se intercalam e são medidas como uma etapa só
+        with stage(IBGE_LANDING_SOURCE, name, "extract_transform") as metrics:
+            try:
+                df_transformed = transform_ibge_data_batches(
+                    fetch_ibge_aggregate_data_batches(
+                        aggregate_code=agg_code,
+                        variable_codes=var_code,
+                        periods=periods,
+                        localities_specifier=localities,
+                        period_type=period_type,
+                        classification_filter=filter_code
+                    ),
+                    aggregate_code=agg_code,
+                    variable_code=var_code,
+                    variable_name=var_name,
+                    period_type=period_type,
+                    compact=compact
+                )
+                metrics.rows = len(df_transformed)
+            except Exception as e:
+                logger.error(f"[{name}] Falha na extração/transformação em streaming: {e}")
+                _record_extraction(metrics, None)
+                return False
+    else:
+        if df_raw is None and not extracted:
+            with stage(IBGE_LANDING_SOURCE, name, "extract") as metrics:
+                df_raw = fetch_ibge_aggregate_data(
+                    aggregate_code=agg_code,
+                    variable_codes=var_code,
+                    periods=periods,
+                    localities_specifier=localities,
+                    period_type=period_type,
+                    classification_filter=filter_code
+                )
+                _record_extraction(metrics, df_raw)
+        if df_raw is None:
+            logger.error(f"[{name}] Falha na extração.")
+            return False
+        if df_raw.empty:
+            logger.warning(f"[{name}] Nenhum dado extraído. Pulando.")
+            return True
+
+        with stage(IBGE_LANDING_SOURCE, name, "transform") as metrics:
+            df_transformed = transform_ibge_data(
+                df_raw=df_raw,
+                aggregate_code=agg_code,
+                variable_code=var_code,
+                variable_name=var_name,
+                period_type=period_type,
+                compact=compact
+            )
+            metrics.rows = len(df_transformed)
 
-    df_transformed = transform_ibge_data(
-        df_raw=df_raw,
-        aggregate_code=agg_code,
-        variable_code=var_code,
-        variable_name=var_name
-    )
     if df_transformed.empty:
         logger.warning(f"[{name}] DataFrame transformado está vazio. Pulando.")
         return True
 
-    if not load_df_to_staging_table(df_transformed, GCP_PROJECT_ID, BIGQUERY_DATASET_IBGE, staging_id, gcp_location=GCP_LOCATION):
-        logger.error(f"[{name}] Falha ao carregar staging.")
-        return False
+    fp_store = get_fingerprint_store()
+    fp_key = fingerprint_key(
+        IBGE_LANDING_SOURCE, name, f"{periods}|{localities}|{format_classification_filter(filter_code) or ''}"
+    )
+    fingerprint = compute_dataframe_fingerprint(df_transformed) if fp_store else None
+    if fp_store and fp_store.is_unchanged(fp_key, fingerprint):
+        logger.info(f"[{name}] Conteúdo idêntico à última carga bem-sucedida. Etapas do BigQuery ignoradas.")
+        return True
 
-    if not merge_data_to_final_table(GCP_PROJECT_ID, BIGQUERY_DATASET_IBGE, staging_id, final_id, gcp_location=GCP_LOCATION):
-        logger.error(f"[{name}] Falha na operação MERGE.")
-        return False
+    if _use_partition_overwrite(df_transformed, name, load_strategy):
+        if not _overwrite_partitions(df_transformed, name, final_id, client=client):
+            return False
+    else:
+        if not _load_staging(df_transformed, name, staging_id, client=client):
+            logger.error(f"[{name}] Falha ao carregar staging.")
+            return False
 
-    try:
-        bigquery.Client(project=GCP_PROJECT_ID).delete_table(
-            f"{GCP_PROJECT_ID}.{BIGQUERY_DATASET_IBGE}.{staging_id}", not_found_ok=True
-        )
-        logger.info(f"[{name}] Tabela de staging '{staging_id}' deletada com sucesso.")
-    except Exception as e:
-        logger.warning(f"[{name}] Erro ao deletar tabela de staging: {e}")
+        if not _merge_and_cleanup(name, staging_id, final_id, client=client):
+            return False
+
+    if fp_store:
+        fp_store.put(fp_key, fingerprint)
 
     logger.info(f"--- Pipeline IBGE: {name} finalizado com sucesso ---")
     return True
 
 
-def run_all_ibge_pipelines():
+def _load_staging(
+    df: pd.DataFrame,
+    name: str,
+    staging_id: str,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Carrega a staging a partir da landing zone em Parquet, quando configurada, ou direto do DataFrame."""
+    settings = get_ibge_settings()
+    with stage(IBGE_LANDING_SOURCE, name, "stage_load") as metrics:
+        metrics.rows = len(df)
+        landing_dir = get_landing_zone_dir()
+        if not landing_dir:
+            loaded = load_df_to_staging_table(df, settings.project_id, settings.dataset_id, staging_id, gcp_location=settings.location, client=client, pipeline=IBGE_LANDING_SOURCE)
+        else:
+            try:
+                path = write_landing_parquet(df, IBGE_LANDING_SOURCE, name, base_dir=landing_dir)
+                loaded = load_parquet_to_staging_table(path, settings.project_id, settings.dataset_id, staging_id, gcp_location=settings.location, client=client, pipeline=IBGE_LANDING_SOURCE)
+            except Exception as e:
+                logger.error(f"[{name}] Falha ao gravar a landing zone: {e}")
+                loaded = False
+        if not loaded:
+            metrics.mark_failed()
+        return loaded
+
+
+def _use_partition_overwrite(df: pd.DataFrame, name: str, load_strategy: str) -> bool:
+    if load_strategy != LOAD_STRATEGY_PARTITION_OVERWRITE:
+        return False
+    n_partitions = len(get_affected_partitions(df))
+    if n_partitions > PARTITION_OVERWRITE_MAX_PARTITIONS:
+        logger.info(f"[{name}] {n_partitions} partições afetadas; usando MERGE em vez de reescrita de partições.")
+        return False
+    return True
+
+
+def _overwrite_partitions(
+    df: pd.DataFrame,
+    name: str,
+    final_id: str,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Reescreve as partições afetadas da tabela final, sem staging nem MERGE."""
+    settings = get_ibge_settings()
+    with stage(IBGE_LANDING_SOURCE, name, "partition_overwrite") as metrics:
+        metrics.rows = len(df)
+        landing_dir = get_landing_zone_dir()
+        if landing_dir:
+            try:
+                write_landing_parquet(df, IBGE_LANDING_SOURCE, name, base_dir=landing_dir)
+            except Exception as e:
+                logger.error(f"[{name}] Falha ao gravar a landing zone: {e}")
+                metrics.mark_failed()
+                return False
+
+        if not overwrite_final_table_partitions(df, settings.project_id, settings.dataset_id, final_id, gcp_location=settings.location, client=client, pipeline=IBGE_LANDING_SOURCE):
+            logger.error(f"[{name}] Falha na reescrita das partições da tabela final.")
+            metrics.mark_failed()
+            return False
+        return True
+
+
+def _merge_and_cleanup(
+    name: str,
+    staging_id: str,
+    final_id: str,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    settings = get_ibge_settings()
+    with stage(IBGE_LANDING_SOURCE, name, "merge") as metrics:
+        if not merge_data_to_final_table(settings.project_id, settings.dataset_id, staging_id, final_id, gcp_location=settings.location, client=client, pipeline=IBGE_LANDING_SOURCE):
+            logger.error(f"[{name}] Falha na operação MERGE.")
+            metrics.mark_failed()
+            return False
+
+    with stage(IBGE_LANDING_SOURCE, name, "cleanup") as metrics:
+        if not delete_staging_table(settings.project_id, settings.dataset_id, staging_id, client=client):
+            logger.warning(f"[{name}] Tabela de staging '{staging_id}' não foi removida.")
+            metrics.mark_failed()
+    return True
+
+
+def reload_ibge_indicator_from_landing(
+    name: str,
+    run_date: date,
+    client: Optional[bigquery.Client] = None
+) -> bool:
+    """Recarrega um indicador a partir do Parquet de uma execução anterior, sem extrair nem transformar."""
+    settings = get_ibge_settings()
+    landing_dir = get_landing_zone_dir()
+    if not landing_dir:
+        logger.error("Landing zone não configurada. Não é possível recarregar.")
+        return False
+
+    path = landing_path(landing_dir, IBGE_LANDING_SOURCE, name, run_date)
+    if not os.path.exists(path):
+        logger.error(f"[{name}] Arquivo da landing zone não encontrado: {path}")
+        return False
+
+    staging_id = f"ibge_{name}_staging"
+    logger.info(f"--- Recarregando {name} a partir de {path} ---")
+    with stage(IBGE_LANDING_SOURCE, name, "stage_load") as metrics:
+        if not load_parquet_to_staging_table(path, settings.project_id, settings.dataset_id, staging_id, gcp_location=settings.location, client=client, pipeline=IBGE_LANDING_SOURCE):
+            logger.error(f"[{name}] Falha ao carregar staging.")
+            metrics.mark_failed()
+            return False
+    return _merge_and_cleanup(name, staging_id, f"ibge_{name}", client=client)
+
+
+def _extract_indicators_async(indicators: List[dict]) -> List[Optional[pd.DataFrame]]:
+    """Extrai os indicadores (e seus shards) em um único event loop, sob os limites por host.
+
+    Indicadores em streaming ficam de fora (None) e são extraídos no próprio pipeline; para os demais,
+    None indica falha na extração.
+    """
+    async def _extract_all() -> List[Optional[pd.DataFrame]]:
+        async with AsyncHttpClient() as http:
+            async def _extract(config: dict, period_type: Optional[str]) -> Optional[pd.DataFrame]:
+                if config.get("stream"):
+                    return None
+                with stage(IBGE_LANDING_SOURCE, config["indicator_name_table"], "extract") as metrics:
+                    df_raw = None
+                    if period_type is not None:
+                        df_raw = await fetch_ibge_aggregate_data_async(
+                            http,
+                            aggregate_code=config["aggregate_code"],
+                            variable_codes=config["variable_code"],
+                            periods=config["periods"],
+                            localities_specifier=config["localities"],
+                            period_type=period_type,
+                            classification_filter=config.get("classification_filter")
+                        )
+                    _record_extraction(metrics, df_raw)
+                return df_raw
+
+            return list(await asyncio.gather(*(
+                _extract(config, period_type) for config, period_type in zip(indicators, period_types)
+            )))
+
+    # Metadados lidos antes do event loop (requisição síncrona, memorizada por agregado)
+    period_types = [None if config.get("stream") else _resolve_period_type(config) for config in indicators]
+    logger.info(f"Extraindo {len(indicators)} indicadores de forma assíncrona.")
+    return run_async(_extract_all())
+
+
+def run_all_ibge_pipelines(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    client: Optional[bigquery.Client] = None,
+    async_extract: bool = False
+) -> Dict[str, bool]:
+    """Executa todos os indicadores; async_extract=True extrai todos em um event loop antes de transformar e carregar."""
     logger.info("==== Execução de todos os pipelines IBGE iniciada ====")
 
-    if not GCP_PROJECT_ID or not BIGQUERY_DATASET_IBGE:
+    settings = get_ibge_settings()
+    if not settings.project_id or not settings.dataset_id:
         logger.error("Variáveis de ambiente GCP_PROJECT_ID ou BIGQUERY_DATASET_IBGE não estão definidas. Abortando.")
-        return
+        return {}
+
+    def _run_indicador(item: tuple) -> bool:
+        indicador, df_raw = item
+        try:
+            return run_full_ibge_pipeline_for_indicator(
+                indicador, client=client, df_raw=df_raw, extracted=async_extract
+            )
+        except Exception as e:
+            logger.exception(f"[{indicador['indicator_name_table']}] Erro inesperado no pipeline: {e}")
+            return False
+
+    raw_frames = _extract_indicators_async(IBGE_INDICATORS_TO_PROCESS) if async_extract else None
+    items = list(zip(IBGE_INDICATORS_TO_PROCESS, raw_frames or [None] * len(IBGE_INDICATORS_TO_PROCESS)))
+    sucessos = run_concurrently(_run_indicador, items, max_workers=max_workers, thread_name_prefix="ibge")
+    resultados = {
+        indicador["indicator_name_table"]: sucesso
+        for indicador, sucesso in zip(IBGE_INDICATORS_TO_PROCESS, sucessos)
+    }
 
-    sucesso_geral = True
-    for indicador in IBGE_INDICATORS_TO_PROCESS:
-        sucesso = run_full_ibge_pipeline_for_indicator(indicador)
+    for name, sucesso in resultados.items():
         if not sucesso:
-            logger.error(f"[{indicador['indicator_name_table']}] Pipeline falhou.")
-            sucesso_geral = False
-        logger.info("-" * 80)
+            logger.error(f"[{name}] Pipeline falhou.")
 
-    if sucesso_geral:
+    if all(resultados.values()):
         logger.info("Todos os pipelines do IBGE foram executados com sucesso.")
     else:
         logger.error("Um ou mais pipelines do IBGE falharam. Verifique os logs.")
+    return resultados
 
 
 if __name__ == "__main__":
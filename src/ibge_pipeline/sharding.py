@@ -0,0 +1,172 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Valores (localidades x períodos x variáveis) por requisição. A API recusa consultas acima de
+# 100.000 valores, e consultas municipais perto desse limite já estouram o timeout
+IBGE_MAX_VALUES_PER_REQUEST = 50_000
+
+# Municípios por UF (código IBGE da UF -> quantidade), usados para estimar o tamanho dos shards de N6
+IBGE_MUNICIPALITIES_PER_UF = {
+    11: 52, 12: 22, 13: 62, 14: 15, 15: 144, 16: 16, 17: 139,
+    21: 217, 22: 224, 23: 184, 24: 167, 25: 223, 26: 185, 27: 102, 28: 75, 29: 417,
+    31: 853, 32: 78, 33: 92, 35: 645,
+    41: 399, 42: 295, 43: 497,
+    50: 79, 51: 141, 52: 246, 53: 1,
+}
+IBGE_LOCALITY_LEVEL_COUNTS = {"N1": 1, "N2": 5, "N3": 27, "N6": sum(IBGE_MUNICIPALITIES_PER_UF.values())}
+IBGE_MUNICIPALITY_LEVEL = "N6"
+
+_LOCALITY_PATTERN = re.compile(r"^(?P<level>N\d+)\[(?P<selection>[^\[\]]+)\]$")
+_MUNICIPALITIES_IN_UF_PATTERN = re.compile(r"^N6\[N3\[(?P<uf>\d{2})\]\]$")
+_PERIOD_FORMATS = {
+    # tipo de período -> (dígitos do código, subperíodos por ano)
+    "anual": (4, 1), "annual": (4, 1),
+    "mensal": (6, 12), "monthly": (6, 12),
+    "trimestral": (6, 4), "quarterly": (6, 4),
+}
+
+
+@dataclass(frozen=True)
+class IbgeShard:
+    periods: str
+    localities: str
+
+
+def count_variables(variable_codes: Union[str, List[str]]) -> int:
+    if isinstance(variable_codes, list):
+        return max(len(variable_codes), 1)
+    return max(len(str(variable_codes).split("|")), 1)
+
+
+def estimate_locality_count(localities_specifier: str) -> Optional[int]:
+    """Número de localidades de um especificador simples (ex.: N6[all], N6[N3[33]], N6[3304557,3550308])."""
+    uf_match = _MUNICIPALITIES_IN_UF_PATTERN.match(localities_specifier)
+    if uf_match:
+        return IBGE_MUNICIPALITIES_PER_UF.get(int(uf_match.group("uf")))
+    match = _LOCALITY_PATTERN.match(localities_specifier)
+    if not match:
+        return None
+    if match.group("selection") == "all":
+        return IBGE_LOCALITY_LEVEL_COUNTS.get(match.group("level"))
+    return len(match.group("selection").split(","))
+
+
+def expand_ibge_periods(periods: str, period_type: Optional[str]) -> Optional[List[str]]:
+    """Lista explícita de períodos de "202301-202412", "2020|2021" etc.; None se não for enumerável.
+
+    Relativos ("-6") e "all" dependem do último período publicado e não são expandidos.
+    """
+    period_format = _PERIOD_FORMATS.get((period_type or "").lower())
+    if period_format is None or not periods or periods == "all" or periods.startswith("-"):
+        return None
+    digits, per_year = period_format
+
+    expanded = []
+    for token in periods.split("|"):
+        start, _, end = token.partition("-")
+        end = end or start
+        if len(start) != digits or len(end) != digits or not (start.isdigit() and end.isdigit()):
+            return None
+        first, last = _period_index(start, per_year), _period_index(end, per_year)
+        if first is None or last is None or last < first:
+            return None
+        expanded.extend(_period_code(index, per_year) for index in range(first, last + 1))
+    return expanded
+
+
+def _period_index(code: str, per_year: int) -> Optional[int]:
+    if per_year == 1:
+        return int(code)
+    subperiod = int(code[4:])
+    if not 1 <= subperiod <= per_year:
+        return None
+    return int(code[:4]) * per_year + subperiod - 1
+
+
+def _period_code(index: int, per_year: int) -> str:
+    if per_year == 1:
+        return str(index)
+    return f"{index // per_year}{index % per_year + 1:02d}"
+
+
+def _relative_period_count(periods: str) -> Optional[int]:
+    if periods.startswith("-") and periods[1:].isdigit():
+        return int(periods[1:])
+    return None
+
+
+def _format_periods(periods: List[str], period_type: Optional[str]) -> str:
+    """Comprime uma lista ordenada de períodos em faixas contíguas ("202301-202306|202309")."""
+    _, per_year = _PERIOD_FORMATS[(period_type or "").lower()]
+    runs = []
+    for code in periods:
+        index = _period_index(code, per_year)
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return "|".join(
+        _period_code(first, per_year) if first == last else f"{_period_code(first, per_year)}-{_period_code(last, per_year)}"
+        for first, last in runs
+    )
+
+
+def _split_localities(localities_specifier: str, max_localities: int) -> List[str]:
+    """Divide N6[all] por UF e listas de códigos em pedaços de até max_localities; o resto fica inteiro."""
+    match = _LOCALITY_PATTERN.match(localities_specifier)
+    if not match:
+        return [localities_specifier]
+    level, selection = match.group("level"), match.group("selection")
+    if selection == "all":
+        if level != IBGE_MUNICIPALITY_LEVEL:
+            return [localities_specifier]
+        return [f"{level}[N3[{uf}]]" for uf in IBGE_MUNICIPALITIES_PER_UF]
+    codes = selection.split(",")
+    size = max(max_localities, 1)
+    return [f"{level}[{','.join(codes[i:i + size])}]" for i in range(0, len(codes), size)]
+
+
+def plan_ibge_shards(
+    periods: str,
+    localities_specifier: str,
+    period_type: Optional[str] = None,
+    variable_count: int = 1,
+    max_values: int = IBGE_MAX_VALUES_PER_REQUEST
+) -> List[IbgeShard]:
+    """Divide uma consulta de agregado em requisições de até max_values valores.
+
+    Primeiro separa as localidades (municípios por UF, listas de códigos em pedaços) e depois, em
+    cada shard de localidades, os períodos em faixas contíguas. Consultas que cabem em uma
+    requisição, ou cujo tamanho não pode ser estimado, voltam como um único shard inalterado.
+    """
+    period_list = expand_ibge_periods(periods, period_type)
+    period_count = len(period_list) if period_list is not None else _relative_period_count(periods)
+    locality_count = estimate_locality_count(localities_specifier)
+    if locality_count is None:
+        return [IbgeShard(periods, localities_specifier)]
+    if period_count is not None and locality_count * period_count * variable_count <= max_values:
+        return [IbgeShard(periods, localities_specifier)]
+
+    # Sem a contagem de períodos ("all"), divide as localidades o máximo possível
+    max_localities = max_values // (variable_count * (period_count or max_values))
+    shards = []
+    for localities in _split_localities(localities_specifier, max_localities):
+        shard_localities = estimate_locality_count(localities) or 1
+        periods_per_shard = max(max_values // (shard_localities * variable_count), 1)
+        if period_list is None or len(period_list) <= periods_per_shard:
+            shards.append(IbgeShard(periods, localities))
+            continue
+        for start in range(0, len(period_list), periods_per_shard):
+            chunk = period_list[start:start + periods_per_shard]
+            shards.append(IbgeShard(_format_periods(chunk, period_type), localities))
+
+    if len(shards) > 1:
+        logger.info(
+            f"[IBGE] Consulta {localities_specifier} / {periods} dividida em {len(shards)} requisições "
+            f"(até {max_values} valores cada)."
+        )
+    return shards
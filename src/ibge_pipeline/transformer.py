@@ -2,7 +2,10 @@ import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
+
+from src.common.dtypes import to_compact_dtypes
+from src.common.schemas import IBGE_SCHEMA
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +31,121 @@ def _parse_ibge_period_to_date(period_code: str) -> Optional[datetime]:
         return None
 
 
+IBGE_MONTHLY_PERIOD_TYPES = {"mensal", "monthly"}
+IBGE_QUARTERLY_PERIOD_TYPES = {"trimestral", "quarterly"}
+
+
+def _parse_unique_ibge_periods(periods: pd.Series, period_type: str) -> pd.Series:
+    """Aplica as regras de conversão de período, de forma vetorizada, a uma série de códigos distintos."""
+    # Valores que não são str ficam com comprimento NaN, como o retorno None da versão escalar
+    lengths = periods.str.len()
+    is_digits = periods.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    annual = is_digits & (lengths == 4)
+    six_digits = is_digits & (lengths == 6)
+
+    year = pd.to_numeric(periods.where(annual | six_digits).str[:4], errors="coerce")
+    code = pd.to_numeric(periods.where(six_digits).str[4:6], errors="coerce")
+
+    quarter = code.between(1, 4)
+    month_code = code.between(1, 12)
+    if period_type in IBGE_MONTHLY_PERIOD_TYPES:
+        month = code.where(month_code)
+    elif period_type in IBGE_QUARTERLY_PERIOD_TYPES:
+        month = ((code - 1) * 3 + 1).where(quarter)
+    else:
+        month = ((code - 1) * 3 + 1).where(quarter, code.where(month_code))
+    month = month.where(~annual, 1)
+
+    valid = (annual | six_digits) & month.notna()
+    parsed = pd.Series(pd.NaT, index=periods.index, dtype="datetime64[us]")
+    if valid.any():
+        parts = pd.DataFrame({"year": year[valid], "month": month[valid], "day": 1})
+        parsed.loc[valid] = pd.to_datetime(parts, errors="coerce").astype("datetime64[us]")
+    return parsed
+
+
+def parse_ibge_periods(periods: pd.Series, period_type: Optional[str] = None) -> pd.Series:
+    """Versão vetorizada de _parse_ibge_period_to_date para uma coluna inteira de códigos de período.
+
+    Sem period_type, códigos de 6 dígitos seguem a mesma regra ambígua da versão escalar
+    (01-04 = trimestre, 05-12 = mês). Com period_type da periodicidade do agregado
+    ("mensal" ou "trimestral"), o sufixo é interpretado apenas como mês ou apenas como trimestre.
+    Códigos inválidos viram NaT e são reportados em um único aviso.
+    """
+    # Há poucos períodos distintos mesmo em milhões de linhas: converte os únicos e replica por índice
+    codes, uniques = pd.factorize(periods.astype(object), use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed_uniques = _parse_unique_ibge_periods(uniques, (period_type or "").lower())
+
+    known = codes >= 0
+    values = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[us]")
+    values[known] = parsed_uniques.to_numpy()[codes[known]]
+    parsed = pd.Series(values, index=periods.index)
+
+    invalid_mask = parsed_uniques.isna() & uniques.map(lambda value: isinstance(value, str))
+    if invalid_mask.any():
+        counts = np.bincount(codes[known], minlength=len(uniques))
+        invalid_examples = uniques[invalid_mask].tolist()
+        logger.warning(
+            f"[IBGE] {int(counts[invalid_mask.to_numpy()].sum())} períodos inválidos convertidos para NaT. Ex: {invalid_examples[:5]}"
+        )
+    return parsed
+
+
+# Layout e chave da tabela final vêm do esquema registrado: uma linha por período, variável e localidade
+IBGE_OUTPUT_COLUMNS = IBGE_SCHEMA.column_names
+IBGE_DEDUP_KEYS = list(IBGE_SCHEMA.merge_keys)
+IBGE_CATEGORY_COLUMNS = ["codigo_agregado", "nome_variavel_principal", "unidade_medida", "localidade_nome"]
+IBGE_STRING_COLUMNS = ["localidade_codigo"]
+
+
+def _to_compact_ibge_dtypes(df_out: pd.DataFrame) -> pd.DataFrame:
+    return to_compact_dtypes(
+        df_out,
+        category_columns=IBGE_CATEGORY_COLUMNS,
+        int32_columns=["codigo_serie"],
+        string_columns=IBGE_STRING_COLUMNS
+    )
+
+
+def _transform_ibge_rows(
+    df: pd.DataFrame,
+    aggregate_code: str,
+    variable_code: str,
+    variable_name: str,
+    period_type: Optional[str] = None
+) -> pd.DataFrame:
+    """Converte linhas de dados do formato view=flat (sem o cabeçalho) para o layout final, sem deduplicar."""
+    df_out = pd.DataFrame()
+    df_out["data_referencia"] = parse_ibge_periods(df["D2C"], period_type)
+    df_out["valor_serie"] = pd.to_numeric(df["V"].replace("...", np.nan), errors="coerce")
+    # D1C é o código da localidade; NC é só o nível territorial (o mesmo para todos os municípios)
+    df_out["localidade_codigo"] = df.get("D1C", pd.Series([None] * len(df)))
+    df_out["localidade_nome"] = df.get("D1N", pd.Series(["Brasil"] * len(df)))
+    df_out["unidade_medida"] = df.get("MN", pd.Series([None] * len(df)))
+    df_out["codigo_agregado"] = aggregate_code
+    df_out["codigo_serie"] = int(variable_code)
+    df_out["nome_variavel_principal"] = variable_name
+
+    original_len = len(df_out)
+    df_out.dropna(subset=["data_referencia", "valor_serie"], inplace=True)
+    if len(df_out) < original_len:
+        logger.warning(f"[IBGE] {original_len - len(df_out)} registros descartados por valores nulos.")
+
+    for col in IBGE_OUTPUT_COLUMNS:
+        if col not in df_out.columns:
+            df_out[col] = None
+
+    return df_out[IBGE_OUTPUT_COLUMNS]
+
+
 def transform_ibge_data(
     df_raw: pd.DataFrame,
     aggregate_code: str,
     variable_code: str,
-    variable_name: str
+    variable_name: str,
+    period_type: Optional[str] = None,
+    compact: bool = False
 ) -> pd.DataFrame:
     
     if df_raw.empty or len(df_raw) < 2:
@@ -43,31 +156,10 @@ def transform_ibge_data(
     logger.info(f"[IBGE] Transformando {len(df)} registros de {aggregate_code} ({variable_code})")
 
     try:
-        df_out = pd.DataFrame()
-        df_out["data_referencia"] = df["D2C"].apply(_parse_ibge_period_to_date)
-        df_out["valor_serie"] = pd.to_numeric(df["V"].replace("...", np.nan), errors="coerce")
-        df_out["localidade_codigo"] = df.get("NC", df.get("D1C", pd.Series([None] * len(df))))
-        df_out["localidade_nome"] = df.get("D1N", pd.Series(["Brasil"] * len(df)))
-        df_out["unidade_medida"] = df.get("MN", pd.Series([None] * len(df)))
-        df_out["codigo_agregado"] = aggregate_code
-        df_out["codigo_serie"] = int(variable_code)
-        df_out["nome_variavel_principal"] = variable_name
-
-        original_len = len(df_out)
-        df_out.dropna(subset=["data_referencia", "valor_serie"], inplace=True)
-        if len(df_out) < original_len:
-            logger.warning(f"[IBGE] {original_len - len(df_out)} registros descartados por valores nulos.")
-
-        cols = [
-            "data_referencia", "codigo_agregado", "codigo_serie",
-            "nome_variavel_principal", "valor_serie", "unidade_medida",
-            "localidade_codigo", "localidade_nome"
-        ]
-        for col in cols:
-            if col not in df_out.columns:
-                df_out[col] = None
-
-        df_out = df_out[cols].drop_duplicates(subset=["data_referencia", "codigo_serie"])
+        df_out = _transform_ibge_rows(df, aggregate_code, variable_code, variable_name, period_type)
+        df_out = df_out.drop_duplicates(subset=IBGE_DEDUP_KEYS)
+        if compact:
+            df_out = _to_compact_ibge_dtypes(df_out)
         logger.info(f"[IBGE] Transformação concluída: {len(df_out)} registros válidos.")
         return df_out
 
@@ -76,3 +168,41 @@ def transform_ibge_data(
     except Exception as e:
         logger.exception(f"[IBGE] Erro inesperado na transformação de {aggregate_code} - {variable_code}: {e}")
     return pd.DataFrame()
+
+
+def transform_ibge_data_batches(
+    batches: Iterable[pd.DataFrame],
+    aggregate_code: str,
+    variable_code: str,
+    variable_name: str,
+    period_type: Optional[str] = None,
+    compact: bool = False
+) -> pd.DataFrame:
+    """Transforma lotes do extrator em streaming um a um; apenas a saída tipada é acumulada.
+
+    A primeira linha do primeiro lote é o cabeçalho do view=flat, como em transform_ibge_data.
+    """
+    transformed = []
+    total_raw = 0
+    try:
+        for i, batch in enumerate(batches):
+            df = batch.iloc[1:] if i == 0 else batch
+            df = df.reset_index(drop=True)
+            if df.empty:
+                continue
+            total_raw += len(df)
+            transformed.append(_transform_ibge_rows(df, aggregate_code, variable_code, variable_name, period_type))
+
+    except KeyError as e:
+        logger.error(f"[IBGE] Coluna ausente no lote: {e}.")
+        return pd.DataFrame()
+
+    if not transformed:
+        logger.warning("[IBGE] Nenhum lote com linhas de dados recebido.")
+        return pd.DataFrame()
+
+    df_out = pd.concat(transformed, ignore_index=True).drop_duplicates(subset=IBGE_DEDUP_KEYS).reset_index(drop=True)
+    if compact:
+        df_out = _to_compact_ibge_dtypes(df_out)
+    logger.info(f"[IBGE] Transformação em lotes concluída: {total_raw} registros lidos, {len(df_out)} válidos.")
+    return df_out
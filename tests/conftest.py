@@ -0,0 +1,44 @@
+import pytest
+
+from src.bcb_pipeline.config import get_bcb_settings
+from src.common import http_cache, http_client
+from src.common.rate_control import configure_host_rate_limit, reset_rate_controllers
+from src.ibge_pipeline.config import get_ibge_settings
+from tests.fake_api_server import FakeApiConfig, FakeApiServer
+
+
+@pytest.fixture(autouse=True)
+def airflow_variables(monkeypatch):
+    """Variables do Airflow via ambiente, relidas a cada teste (as configurações são cacheadas por processo)."""
+    monkeypatch.setenv("AIRFLOW_VAR_GCP_PROJECT_ID", "test")
+    get_bcb_settings.cache_clear()
+    get_ibge_settings.cache_clear()
+    yield
+    get_bcb_settings.cache_clear()
+    get_ibge_settings.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def rate_controllers():
+    """Controle de taxa por host é global ao processo: cada teste começa com circuitos fechados."""
+    reset_rate_controllers()
+    yield
+    reset_rate_controllers()
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Servidor local no lugar das APIs do BCB e do IBGE, com sessão HTTP sem espera entre retries."""
+    # Sem limitar a taxa do servidor local; testes de controle de taxa reconfiguram o host
+    configure_host_rate_limit("127.0.0.1", 1000, burst=1000)
+    server = FakeApiServer(FakeApiConfig()).start()
+    monkeypatch.setattr("src.bcb_pipeline.extractor.BCB_API_BASE_URL", server.bcb_url)
+    monkeypatch.setattr("src.ibge_pipeline.extractor.IBGE_AGGREGATE_API_BASE_URL", server.ibge_url)
+    monkeypatch.setattr(http_cache, "_CACHE", None)
+    monkeypatch.setattr(http_cache, "_CACHE_CONFIGURED", True)
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_JITTER", 0)
+    http_client.close_http_session()
+    monkeypatch.setattr(http_client, "_SESSION", http_client.build_http_session(backoff_factor=0))
+    yield server
+    http_client.close_http_session()
+    server.stop()
@@ -0,0 +1,271 @@
+"""Servidor HTTP local que imita a API SGS do BCB e a API de agregados do IBGE.
+
+Gera respostas sintéticas e determinísticas nas mesmas URLs das APIs reais, com tamanho, latência,
+falhas (429/5xx) e corpos truncados configuráveis, para testar e medir extração, retry e streaming.
+"""
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+BCB_PATH = re.compile(r"^/dados/serie/bcdata\.sgs\.(?P<code>\d+)/dados$")
+IBGE_PATH = re.compile(
+    r"^/api/v3/agregados/(?P<aggregate>\d+)/periodos/(?P<periods>[^/]+)/variaveis/(?P<variables>[^/]+)$"
+)
+IBGE_METADATA_PATH = re.compile(r"^/api/v3/agregados/(?P<aggregate>\d+)/metadados$")
+BCB_DATE_FORMAT = "%d/%m/%Y"
+IBGE_UF_CODES = [11, 12, 13, 14, 15, 16, 17, 21, 22, 23, 24, 25, 26, 27, 28, 29, 31, 32, 33, 35, 41, 42, 43, 50, 51, 52, 53]
+MUNICIPALITIES_IN_UF = re.compile(r"^N6\[N3\[(?P<uf>\d{2})\]\]$")
+LOCALITY_CODES = re.compile(r"^N\d+\[(?P<codes>[\d,]+)\]$")
+CLASSIFICATION = re.compile(r"^(?P<classification>\d+)\[(?P<categories>[^\]]+)\]$")
+IBGE_FIRST_CATEGORY = 7169
+
+
+@dataclass
+class FakeApiConfig:
+    latency_seconds: float = 0.0
+    # As primeiras fail_first requisições recebem fail_status (com Retry-After, se definido)
+    fail_first: int = 0
+    fail_status: int = 503
+    retry_after: Optional[int] = None
+    # Corta o corpo pela metade e fecha a conexão, como uma transferência interrompida
+    truncate: bool = False
+    # Janela máxima aceita pelo SGS para séries diárias; acima disso responde 400
+    bcb_max_window_years: Optional[int] = 10
+    # Municípios do universo simulado, distribuídos entre as UFs; filtrados pelo parâmetro localidades
+    ibge_localities: int = 27
+    ibge_default_periods: int = 12
+    # Categorias da classificação do agregado (ex.: subitens do IPCA); 0 = sem classificação.
+    # Sem o parâmetro classificacao, todas são devolvidas
+    ibge_categories: int = 0
+    # periodicidade.frequencia devolvida em /agregados/{id}/metadados
+    ibge_frequency: str = "mensal"
+    chunk_bytes: int = 64 * 1024
+
+
+@dataclass
+class FakeApiServer:
+    config: FakeApiConfig = field(default_factory=FakeApiConfig)
+    requests: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def bcb_url(self) -> str:
+        return self.base_url + "/dados/serie/bcdata.sgs.{series_code}/dados"
+
+    @property
+    def ibge_url(self) -> str:
+        return self.base_url + "/api/v3/agregados"
+
+    @property
+    def request_count(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def start(self) -> "FakeApiServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _build_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-api", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _register(self, path: str) -> int:
+        with self._lock:
+            self.requests.append(path)
+            return len(self.requests)
+
+
+def bcb_payload(series_code: int, start: datetime, end: datetime) -> list:
+    days = (end - start).days + 1
+    return [
+        {
+            "data": (start + timedelta(days=offset)).strftime(BCB_DATE_FORMAT),
+            "valor": f"{(series_code * 7 + offset) % 1000 / 100:.2f}",
+        }
+        for offset in range(max(days, 0))
+    ]
+
+
+def _expand_periods(periods: str, default_count: int) -> List[str]:
+    if periods.startswith("-"):
+        count = int(periods[1:]) if periods[1:].isdigit() else default_count
+        return [f"{2000 + index // 12}{index % 12 + 1:02d}" for index in range(count)]
+    expanded = []
+    for token in filter(None, periods.split("|")):
+        start, _, end = token.partition("-")
+        if not end:
+            expanded.append(start)
+        elif len(start) == 4:
+            expanded.extend(str(year) for year in range(int(start), int(end) + 1))
+        else:
+            # Faixas de 6 dígitos tratadas como meses (AAAAMM)
+            first = int(start[:4]) * 12 + int(start[4:]) - 1
+            last = int(end[:4]) * 12 + int(end[4:]) - 1
+            expanded.extend(f"{index // 12}{index % 12 + 1:02d}" for index in range(first, last + 1))
+    return expanded
+
+
+def ibge_locality_codes(specifier: str, count: int) -> List[str]:
+    """Códigos do universo de count municípios selecionados por N6[all], N6[N3[uf]] ou N6[c1,c2,...]."""
+    universe = [f"{IBGE_UF_CODES[index % len(IBGE_UF_CODES)]}{index:05d}" for index in range(count)]
+    uf_match = MUNICIPALITIES_IN_UF.match(specifier or "")
+    if uf_match:
+        return [code for code in universe if code.startswith(uf_match.group("uf"))]
+    codes_match = LOCALITY_CODES.match(specifier or "")
+    if codes_match:
+        return codes_match.group("codes").split(",")
+    return universe
+
+
+def ibge_categories(classificacao: Optional[str], count: int) -> List[Optional[str]]:
+    """Categorias devolvidas: as pedidas em "315[7169,7170]" (ou todas com [all]); [None] sem classificação."""
+    all_categories = [str(IBGE_FIRST_CATEGORY + index) for index in range(count)]
+    match = CLASSIFICATION.match(classificacao or "")
+    if match and match.group("categories") != "all":
+        return match.group("categories").split(",")
+    return all_categories or [None]
+
+
+def ibge_flat_payload(
+    aggregate: str,
+    periods: List[str],
+    variables: List[str],
+    localities: List[str],
+    categories: Optional[List[Optional[str]]] = None
+) -> list:
+    categories = categories or [None]
+    header = {
+        "NC": "Nível Territorial (Código)", "NN": "Nível Territorial", "MC": "Unidade de Medida (Código)",
+        "MN": "Unidade de Medida", "V": "Valor", "D1C": "Localidade (Código)", "D1N": "Localidade",
+        "D2C": "Mês (Código)", "D2N": "Mês", "D3C": "Variável (Código)", "D3N": "Variável",
+    }
+    if categories != [None]:
+        header.update({"D4C": "Categoria (Código)", "D4N": "Categoria"})
+    rows = [header]
+    for variable in variables:
+        for period in periods:
+            for codigo in localities:
+                for category in categories:
+                    row = {
+                        "NC": "6", "NN": "Município", "MC": "2", "MN": "%",
+                        "V": f"{(int(aggregate) + int(period) + int(codigo) + int(category or 0)) % 1000 / 100:.2f}",
+                        "D1C": codigo, "D1N": f"Município {codigo}",
+                        "D2C": period, "D2N": period, "D3C": variable, "D3N": f"Variável {variable}",
+                    }
+                    if category is not None:
+                        row.update({"D4C": category, "D4N": f"Categoria {category}"})
+                    rows.append(row)
+    return rows
+
+
+def _build_handler(server: FakeApiServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            config = server.config
+            request_number = server._register(self.path)
+            if config.latency_seconds:
+                time.sleep(config.latency_seconds)
+
+            if request_number <= config.fail_first:
+                headers = {"Retry-After": str(config.retry_after)} if config.retry_after is not None else {}
+                self._send_json(config.fail_status, {"erro": "falha simulada"}, headers)
+                return
+
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            path = unquote(url.path)
+
+            bcb_match = BCB_PATH.match(path)
+            if bcb_match:
+                self._serve_bcb(int(bcb_match.group("code")), query)
+                return
+
+            ibge_match = IBGE_PATH.match(path)
+            if ibge_match and query.get("view") == "flat":
+                payload = ibge_flat_payload(
+                    ibge_match.group("aggregate"),
+                    _expand_periods(ibge_match.group("periods"), config.ibge_default_periods),
+                    ibge_match.group("variables").split("|"),
+                    ibge_locality_codes(query.get("localidades"), config.ibge_localities),
+                    ibge_categories(query.get("classificacao"), config.ibge_categories),
+                )
+                self._send_json(200, payload)
+                return
+
+            metadata_match = IBGE_METADATA_PATH.match(path)
+            if metadata_match:
+                self._send_json(200, {
+                    "id": int(metadata_match.group("aggregate")),
+                    "periodicidade": {"frequencia": config.ibge_frequency},
+                })
+                return
+
+            self._send_json(404, {"erro": f"rota desconhecida: {path}"})
+
+        def _serve_bcb(self, series_code: int, query: dict) -> None:
+            try:
+                start = datetime.strptime(query["dataInicial"], BCB_DATE_FORMAT)
+                end = datetime.strptime(query["dataFinal"], BCB_DATE_FORMAT)
+            except (KeyError, ValueError):
+                self._send_json(400, {"erro": "dataInicial/dataFinal ausentes ou inválidas"})
+                return
+            max_years = server.config.bcb_max_window_years
+            if max_years is not None and (end - start).days > 366 * max_years:
+                self._send_json(400, {"erro": f"janela maior que {max_years} anos"})
+                return
+            self._send_json(200, bcb_payload(series_code, start, end))
+
+        def _send_json(self, status: int, payload, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            truncate = server.config.truncate and status == 200
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if truncate:
+                # Sem Content-Length e com a conexão fechada: o cliente recebe um JSON incompleto
+                body = body[: len(body) // 2]
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            else:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            chunk = server.config.chunk_bytes
+            for offset in range(0, len(body), chunk):
+                self.wfile.write(body[offset: offset + chunk])
+
+    return Handler
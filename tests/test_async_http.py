@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from src.bcb_pipeline.extractor import fetch_bcb_series_data, fetch_bcb_series_data_async
+from src.common.async_http import AsyncHttpClient, run_async
+from src.common.local_warehouse import configure_local_warehouse
+from src.common.metrics import configure_metrics_sinks
+from src.common.rate_control import TokenBucket, configure_host_rate_limit
+from src.ibge_pipeline.extractor import fetch_ibge_aggregate_data, fetch_ibge_aggregate_data_async
+
+
+def _client(**kwargs) -> AsyncHttpClient:
+    return AsyncHttpClient(backoff_factor=0, backoff_jitter=0, **kwargs)
+
+
+async def _fetch_bcb(**client_kwargs) -> pd.DataFrame:
+    async with _client(**client_kwargs) as client:
+        return await fetch_bcb_series_data_async(client, 11, "01/01/2024", "10/01/2024")
+
+
+def test_token_bucket_spends_burst_then_waits():
+    bucket = TokenBucket(rate_per_second=10, capacity=2)
+
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.1, abs=0.02)
+    assert delays[3] == pytest.approx(0.2, abs=0.02)
+
+
+def test_async_bcb_matches_sync(fake_api):
+    df_async = run_async(_fetch_bcb())
+
+    pd.testing.assert_frame_equal(df_async, fetch_bcb_series_data(11, "01/01/2024", "10/01/2024"))
+
+
+def test_async_client_retries_transient_errors(fake_api):
+    fake_api.config.fail_first = 2
+
+    df = run_async(_fetch_bcb())
+
+    assert len(df) == 10
+    assert fake_api.request_count == 3
+
+
+def test_async_persistent_errors_return_none(fake_api):
+    fake_api.config.fail_first = 100
+
+    assert run_async(_fetch_bcb()) is None
+    assert fake_api.request_count == 5
+
+
+def test_async_truncated_body_returns_none(fake_api):
+    fake_api.config.truncate = True
+
+    assert run_async(_fetch_bcb()) is None
+
+
+def test_async_connection_errors_return_none(fake_api, monkeypatch):
+    monkeypatch.setattr("src.bcb_pipeline.extractor.BCB_API_BASE_URL", "http://127.0.0.1:9/{series_code}")
+
+    assert run_async(_fetch_bcb(max_retries=1)) is None
+
+
+def test_host_semaphore_limits_concurrency(fake_api):
+    fake_api.config.latency_seconds = 0.2
+
+    async def _fetch_four():
+        async with _client(max_connections_per_host=2) as client:
+            return await asyncio.gather(*(
+                fetch_bcb_series_data_async(client, code, "01/01/2024", "02/01/2024") for code in (1, 2, 3, 4)
+            ))
+
+    start = time.perf_counter()
+    frames = run_async(_fetch_four())
+
+    assert all(len(df) == 2 for df in frames)
+    assert time.perf_counter() - start >= 0.4
+
+
+def test_host_rate_limit_is_shared_across_clients(fake_api):
+    configure_host_rate_limit("127.0.0.1", 10, burst=1)
+
+    async def _fetch_with_two_clients():
+        async with _client() as first, _client() as second:
+            return await asyncio.gather(*(
+                fetch_bcb_series_data_async(client, 11, "01/01/2024", "02/01/2024")
+                for client in (first, second, first, second)
+            ))
+
+    start = time.perf_counter()
+    run_async(_fetch_with_two_clients())
+
+    assert time.perf_counter() - start >= 0.3 - 0.02
+
+
+def test_run_async_inside_running_loop(fake_api):
+    async def _caller():
+        return run_async(_fetch_bcb())
+
+    assert len(asyncio.run(_caller())) == 10
+
+
+def test_async_ibge_shards_match_sync(fake_api):
+    fake_api.config.ibge_localities = 270
+
+    async def _fetch():
+        async with _client() as client:
+            return await fetch_ibge_aggregate_data_async(
+                client, "1737", "63", "202301-202312", "N6[all]", period_type="mensal", max_values_per_request=20_000
+            )
+
+    df_async = run_async(_fetch())
+    df_sync = fetch_ibge_aggregate_data(
+        "1737", "63", "202301-202312", "N6[all]", period_type="mensal", max_values_per_request=20_000
+    )
+
+    assert (df_async["V"] == "Valor").sum() == 1
+    pd.testing.assert_frame_equal(df_async, df_sync)
+
+
+def test_run_all_bcb_with_async_extract(fake_api, tmp_path, monkeypatch):
+    from src.bcb_pipeline import main_bcb
+    from tests.test_metrics import ListSink
+
+    series = [{"name": "selic_diaria", "code": 11}, {"name": "dolar_ptax_venda", "code": 1}]
+    monkeypatch.setattr(main_bcb, "SERIES_TO_PROCESS", series)
+    sink = ListSink()
+    configure_metrics_sinks([sink])
+    warehouse = configure_local_warehouse(str(tmp_path / "warehouse.sqlite"))
+    try:
+        result = main_bcb.run_all_bcb_pipelines("01/01/2024", "31/01/2024", async_extract=True)
+    finally:
+        configure_local_warehouse(None)
+        configure_metrics_sinks(None)
+
+    assert result == {"selic_diaria": True, "dolar_ptax_venda": True}
+    assert len(warehouse.read_table(main_bcb.get_bcb_settings().dataset_id, "bcb_dolar_ptax_venda")) == 31
+    extract = {record.series: record for record in sink.records if record.stage == "extract"}
+    assert set(extract) == {"selic_diaria", "dolar_ptax_venda"}
+    assert all(record.rows == 31 and record.bytes_downloaded > 0 for record in extract.values())
@@ -1,9 +1,13 @@
 import pytest
 import requests
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 import pandas as pd
 
-from src.bcb_pipeline.extractor import fetch_bcb_series_data
+from src.bcb_pipeline.extractor import (
+    fetch_bcb_series_data,
+    fetch_bcb_series_data_chunked,
+    split_date_range,
+)
 
 
 @pytest.fixture
@@ -14,7 +18,7 @@ def sample_bcb_response():
     ]
 
 
-@patch("src.bcb_pipeline.extractor.requests.get")
+@patch("src.bcb_pipeline.extractor.http_get")
 def test_fetch_bcb_series_data_success(mock_get, sample_bcb_response):
     mock_get.return_value.status_code = 200
     mock_get.return_value.json.return_value = sample_bcb_response
@@ -28,7 +32,7 @@ def test_fetch_bcb_series_data_success(mock_get, sample_bcb_response):
     assert "valor" in df.columns
 
 
-@patch("src.bcb_pipeline.extractor.requests.get")
+@patch("src.bcb_pipeline.extractor.http_get")
 def test_fetch_bcb_series_data_empty(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.json.return_value = []
@@ -39,11 +43,62 @@ def test_fetch_bcb_series_data_empty(mock_get):
     assert df.empty
 
 
-@patch("src.bcb_pipeline.extractor.requests.get")
+@patch("src.bcb_pipeline.extractor.http_get")
 def test_fetch_bcb_series_data_http_error(mock_get):
     mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("HTTP Error")
 
-    df = fetch_bcb_series_data(series_code=11, start_date="01/01/2023")
-    
-    assert isinstance(df, pd.DataFrame)
+    assert fetch_bcb_series_data(series_code=11, start_date="01/01/2023") is None
+
+
+def test_split_date_range_in_windows():
+    windows = split_date_range("01/01/1986", "15/06/2010", window_years=10)
+    assert windows == [
+        ("01/01/1986", "31/12/1995"),
+        ("01/01/1996", "31/12/2005"),
+        ("01/01/2006", "15/06/2010"),
+    ]
+
+
+def test_split_date_range_single_window():
+    assert split_date_range("01/01/2024", "31/01/2024") == [("01/01/2024", "31/01/2024")]
+
+
+@patch("src.bcb_pipeline.extractor.fetch_bcb_series_data")
+def test_fetch_chunked_merges_and_deduplicates(mock_fetch):
+    def fetch_window(series_code, start, end):
+        if start == "01/01/1986":
+            return pd.DataFrame({"data": ["02/01/1986", "31/12/1995"], "valor": ["1", "2"]})
+        return pd.DataFrame({"data": ["31/12/1995", "02/01/1996"], "valor": ["2", "3"]})
+
+    mock_fetch.side_effect = fetch_window
+
+    df = fetch_bcb_series_data_chunked(11, "01/01/1986", "31/12/2005", window_years=10, max_workers=2)
+
+    assert mock_fetch.call_count == 2
+    assert df["data"].tolist() == ["02/01/1986", "31/12/1995", "02/01/1996"]
+
+
+@patch("src.bcb_pipeline.extractor.fetch_bcb_series_data")
+def test_fetch_chunked_all_windows_empty(mock_fetch):
+    mock_fetch.return_value = pd.DataFrame()
+    df = fetch_bcb_series_data_chunked(11, "01/01/1986", "31/12/2005")
     assert df.empty
+
+
+@patch("src.bcb_pipeline.extractor.http_get")
+def test_fetch_chunked_fails_when_a_window_fails(mock_get):
+    def get_window(url, params, **kwargs):
+        response = MagicMock()
+        if params["dataInicial"] == "01/01/1996":
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError("500 Server Error")
+        else:
+            response.json.return_value = [{"data": params["dataInicial"], "valor": "1"}]
+        return response
+
+    mock_get.side_effect = get_window
+
+    df = fetch_bcb_series_data_chunked(11, "01/01/1986", "31/12/2015", window_years=10, max_workers=1)
+
+    assert mock_get.call_count == 3
+    assert df is None
+
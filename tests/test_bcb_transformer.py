@@ -50,3 +50,14 @@ def test_transform_valid_data():
     assert result["codigo_serie"].iloc[0] == 11
     assert result["valor_serie"].iloc[1] == 13.70
     assert pd.to_datetime("01/01/2023", dayfirst=True) == result["data_referencia"].iloc[0]
+
+
+def test_transform_compact_dtypes():
+    df = pd.DataFrame({
+        "data": ["01/01/2023", "02/01/2023"],
+        "valor": ["13,65", "13,70"],
+        "coluna_extra": ["x", "y"]
+    })
+    result = transform_bcb_data(df, series_code=11, compact=True)
+    assert result["codigo_serie"].dtype == "int32"
+    assert list(result.columns) == ["data_referencia", "codigo_serie", "valor_serie"]
@@ -0,0 +1,398 @@
+import pytest
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date
+from unittest.mock import patch, MagicMock
+from google.cloud import bigquery
+from google.cloud.bigquery.table import Row
+from google.cloud.exceptions import NotFound
+
+from src.common.local_warehouse import LocalBackend, configure_local_warehouse
+from src.common.schemas import IBGE_SCHEMA
+from src.common.bigquery_operations import (
+    BigQueryBackend,
+    clear_bigquery_caches,
+    delete_staging_table,
+    ensure_bigquery_dataset_exists,
+    get_bigquery_client,
+    get_series_watermarks,
+    get_warehouse_backend,
+    load_df_to_staging_table,
+    load_parquet_to_staging_table,
+    merge_data_to_final_table,
+    overwrite_final_table_partitions,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    clear_bigquery_caches()
+    yield
+    clear_bigquery_caches()
+
+
+@pytest.fixture
+def mock_client():
+    client = MagicMock()
+    client.query.return_value.errors = None
+    client.query.return_value.num_dml_affected_rows = 1
+    client.load_table_from_file.return_value.errors = None
+    client.create_table.side_effect = lambda table, **kwargs: table
+    return client
+
+
+@patch("src.common.bigquery_operations.bigquery.Client")
+def test_get_bigquery_client_is_shared(mock_client_cls):
+    first = get_bigquery_client("projeto")
+    second = get_bigquery_client("projeto")
+    assert first is second
+    mock_client_cls.assert_called_once_with(project="projeto")
+
+
+def test_dataset_existence_is_memoized(mock_client):
+    ensure_bigquery_dataset_exists(mock_client, "dataset", "projeto")
+    ensure_bigquery_dataset_exists(mock_client, "dataset", "projeto")
+    assert mock_client.get_dataset.call_count == 1
+
+
+def test_dataset_created_when_not_found(mock_client):
+    mock_client.get_dataset.side_effect = NotFound("dataset")
+    ensure_bigquery_dataset_exists(mock_client, "dataset", "projeto")
+    ensure_bigquery_dataset_exists(mock_client, "dataset", "projeto")
+    assert mock_client.create_dataset.call_count == 1
+
+
+def test_final_table_created_once_across_merges(mock_client):
+    for _ in range(3):
+        assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client)
+    assert mock_client.create_table.call_count == 1
+    assert mock_client.get_dataset.call_count == 1
+    # Consulta de limites da staging + MERGE por execução
+    assert mock_client.query.call_count == 6
+
+
+def test_merge_filters_shared_staging_by_series(mock_client):
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client, series_codes=[11, 1])
+    merge_sql = mock_client.query.call_args.args[0]
+    assert "WHERE data_referencia IS NOT NULL AND codigo_serie IN (11, 1)" in merge_sql
+
+
+def test_merge_ignores_staging_rows_without_date(mock_client):
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client)
+    bounds_sql, merge_sql = (call.args[0] for call in mock_client.query.call_args_list)
+    assert "WHERE data_referencia IS NOT NULL" in bounds_sql
+    assert "WHERE data_referencia IS NOT NULL" in merge_sql
+
+
+def test_injected_client_selects_bigquery_backend(mock_client, tmp_path):
+    configure_local_warehouse(str(tmp_path / "warehouse.sqlite"))
+    try:
+        assert isinstance(get_warehouse_backend("projeto", client=mock_client), BigQueryBackend)
+        assert isinstance(get_warehouse_backend("projeto"), LocalBackend)
+    finally:
+        configure_local_warehouse(None)
+    assert isinstance(get_warehouse_backend("projeto"), BigQueryBackend)
+
+
+def _bounds_job(data_minima, data_maxima, codigos):
+    job = MagicMock()
+    job.result.return_value = [{"data_minima": data_minima, "data_maxima": data_maxima, "codigos": codigos}]
+    return job
+
+
+def _merge_job():
+    return MagicMock(errors=None, num_dml_affected_rows=1, total_bytes_processed=1024)
+
+
+def test_merge_prunes_target_to_staging_bounds(mock_client):
+    mock_client.query.side_effect = [_bounds_job(date(2024, 1, 1), date(2024, 3, 31), [433]), _merge_job()]
+
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client)
+    merge_sql = mock_client.query.call_args.args[0]
+    assert "target.data_referencia BETWEEN DATE '2024-01-01' AND DATE '2024-03-31'" in merge_sql
+    assert "target.codigo_serie IN (433)" in merge_sql
+
+
+def test_backfill_merge_is_split_in_windows_below_the_partition_limit(mock_client):
+    mock_client.query.side_effect = [_bounds_job(date(1986, 6, 4), date(2026, 10, 16), [11])] + [_merge_job() for _ in range(5)]
+
+    assert merge_data_to_final_table(
+        "projeto", "dataset", "stg", "final", client=mock_client, series_codes=[11], partition_type="MONTH"
+    )
+
+    merges = [call.args[0] for call in mock_client.query.call_args_list[1:]]
+    assert len(merges) == 5
+    assert "WHERE data_referencia IS NOT NULL AND codigo_serie IN (11) AND data_referencia BETWEEN DATE '1986-06-04' AND DATE '1996-05-31'" in merges[0]
+    assert "target.data_referencia BETWEEN DATE '1986-06-04' AND DATE '1996-05-31'" in merges[0]
+    assert "BETWEEN DATE '1996-06-01'" in merges[1]
+    assert "AND DATE '2026-10-16'" in merges[-1]
+    assert mock_client.create_table.call_args.args[0].time_partitioning.type_ == "MONTH"
+
+
+def test_backfill_merge_stops_at_the_first_failed_window(mock_client):
+    failed = _merge_job()
+    failed.errors = [{"message": "boom"}]
+    mock_client.query.side_effect = [_bounds_job(date(1986, 6, 4), date(2026, 10, 16), [11]), _merge_job(), failed]
+
+    assert not merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client)
+    assert mock_client.query.call_count == 3
+
+
+def test_merge_skipped_when_staging_has_no_rows_for_series(mock_client):
+    mock_client.query.side_effect = [_bounds_job(None, None, [])]
+
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client, series_codes=[11])
+    assert mock_client.query.call_count == 1
+
+
+def test_merge_reports_unpruned_bytes_with_dry_run(mock_client):
+    dry_run_job = MagicMock(total_bytes_processed=10 ** 9)
+    mock_client.query.side_effect = [_bounds_job(date(2024, 1, 1), date(2024, 1, 31), [11]), dry_run_job, _merge_job()]
+
+    assert merge_data_to_final_table(
+        "projeto", "dataset", "stg", "final", client=mock_client, report_unpruned_bytes=True
+    )
+    dry_run_call = mock_client.query.call_args_list[1]
+    assert dry_run_call.kwargs["job_config"].dry_run is True
+    assert "BETWEEN" not in dry_run_call.args[0]
+    assert "BETWEEN" in mock_client.query.call_args_list[2].args[0]
+
+
+def test_load_uses_injected_client(mock_client):
+    df = pd.DataFrame({"data_referencia": [pd.Timestamp("2024-01-01")], "codigo_serie": [11], "valor_serie": [1.0]})
+    with patch("src.common.bigquery_operations.bigquery.Client") as mock_client_cls:
+        assert load_df_to_staging_table(df, "projeto", "dataset", "stg", client=mock_client)
+        mock_client_cls.assert_not_called()
+    mock_client.load_table_from_file.assert_called_once()
+
+
+def _loaded_table(call) -> pa.Table:
+    return pq.read_table(call.args[0])
+
+
+def test_staging_load_serializes_the_registered_schema(mock_client):
+    df = pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01", "2024-02-01"]),
+        "codigo_agregado": pd.Series(["1737", "1737"], dtype="category"),
+        "codigo_serie": pd.Series([63, 63], dtype="int32"),
+        "nome_variavel_principal": "IPCA",
+        "valor_serie": [0.42, 0.83],
+        "unidade_medida": "%",
+        "localidade_codigo": ["3304557", "3550308"],
+        "localidade_nome": ["Rio de Janeiro", "São Paulo"],
+    })
+
+    assert load_df_to_staging_table(df, "projeto", "dataset", "stg", client=mock_client, pipeline="ibge")
+
+    call = mock_client.load_table_from_file.call_args
+    table = _loaded_table(call)
+    assert table.schema.field("data_referencia").type == pa.date32()
+    assert table.schema.field("codigo_serie").type == pa.int64()
+    assert table.schema.field("codigo_agregado").type == pa.string()
+    assert table.column("localidade_codigo").to_pylist() == ["3304557", "3550308"]
+    job_config = call.kwargs["job_config"]
+    assert job_config.source_format == "PARQUET"
+    assert [field.name for field in job_config.schema][-2:] == ["localidade_codigo", "localidade_nome"]
+
+
+def test_staging_is_not_partitioned_and_replaces_leftover_tables(mock_client):
+    df = pd.DataFrame({
+        "data_referencia": pd.date_range("1986-06-04", "2026-10-16"),
+        "codigo_serie": 11,
+        "valor_serie": 1.0,
+    })
+
+    assert load_df_to_staging_table(df, "projeto", "dataset", "stg", client=mock_client)
+
+    mock_client.delete_table.assert_called_once_with("projeto.dataset.stg", not_found_ok=True)
+    assert mock_client.load_table_from_file.call_args.kwargs["job_config"].time_partitioning is None
+
+
+def test_staging_load_rejects_frames_missing_schema_columns(mock_client):
+    df = pd.DataFrame({"data_referencia": [pd.Timestamp("2024-01-01")], "codigo_serie": [63], "valor_serie": [1.0]})
+
+    assert not load_df_to_staging_table(df, "projeto", "dataset", "stg", client=mock_client, pipeline="ibge")
+    mock_client.load_table_from_file.assert_not_called()
+
+
+def test_ibge_merge_keys_and_final_table_come_from_schema(mock_client):
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client, pipeline="ibge")
+
+    merge_sql = mock_client.query.call_args.args[0]
+    assert (
+        "ON target.data_referencia = source.data_referencia AND target.codigo_serie = source.codigo_serie "
+        "AND target.localidade_codigo = source.localidade_codigo"
+    ) in merge_sql
+    assert "target.localidade_nome = source.localidade_nome" in merge_sql
+    assert "target.localidade_codigo = source.localidade_codigo," not in merge_sql
+    assert "INSERT (data_referencia, codigo_agregado, codigo_serie" in merge_sql
+    table = mock_client.create_table.call_args.args[0]
+    assert len(table.schema) == 8
+    assert table.clustering_fields == ["codigo_serie", "localidade_codigo"]
+
+
+def test_delete_staging_table_failure_returns_false(mock_client):
+    mock_client.delete_table.side_effect = Exception("boom")
+    assert delete_staging_table("projeto", "dataset", "stg", client=mock_client) is False
+
+
+def test_get_series_watermarks(mock_client):
+    mock_client.query.return_value.result.return_value = [
+        {"codigo_serie": 11, "watermark": date(2024, 1, 31)},
+    ]
+    assert get_series_watermarks("projeto", "dataset", "final", client=mock_client) == {11: date(2024, 1, 31)}
+
+
+def test_get_series_watermarks_missing_table(mock_client):
+    mock_client.query.return_value.result.side_effect = NotFound("final")
+    assert get_series_watermarks("projeto", "dataset", "final", client=mock_client) == {}
+
+
+def test_load_parquet_to_staging_table(mock_client, tmp_path):
+    parquet_path = tmp_path / "selic.parquet"
+    pd.DataFrame({"valor_serie": [1.0]}).to_parquet(parquet_path)
+
+    assert load_parquet_to_staging_table(str(parquet_path), "projeto", "dataset", "stg", client=mock_client)
+
+    args, kwargs = mock_client.load_table_from_file.call_args
+    assert args[1] == "projeto.dataset.stg"
+    assert kwargs["job_config"].source_format == "PARQUET"
+
+
+def test_overwrite_rewrites_each_partition_with_other_series_rows(mock_client):
+    df = pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+        "codigo_serie": [11, 11],
+        "valor_serie": [13.65, 13.70],
+    })
+    columns = {"data_referencia": 0, "codigo_serie": 1, "valor_serie": 2}
+    outra_serie = Row((date(2024, 1, 1), 1, 4.95), columns)
+    valor_antigo = Row((date(2024, 1, 1), 11, 13.0), columns)
+    mock_client.query.return_value.result.return_value = [outra_serie, valor_antigo]
+
+    assert overwrite_final_table_partitions(df, "projeto", "dataset", "final", client=mock_client, max_workers=1)
+
+    query_params = mock_client.query.call_args.kwargs["job_config"].query_parameters
+    assert query_params[0].values == [date(2024, 1, 1), date(2024, 1, 2)]
+
+    loads = {call.args[1]: _loaded_table(call).to_pandas() for call in mock_client.load_table_from_file.call_args_list}
+    assert set(loads) == {"projeto.dataset.final$20240101", "projeto.dataset.final$20240102"}
+    partition = loads["projeto.dataset.final$20240101"].sort_values("codigo_serie")
+    assert partition[["codigo_serie", "valor_serie"]].values.tolist() == [[1, 4.95], [11, 13.65]]
+    job_config = mock_client.load_table_from_file.call_args.kwargs["job_config"]
+    assert job_config.write_disposition == "WRITE_TRUNCATE"
+
+
+def test_overwrite_refuses_too_many_partitions(mock_client):
+    df = pd.DataFrame({
+        "data_referencia": pd.date_range("2020-01-01", periods=500),
+        "codigo_serie": 11,
+        "valor_serie": 1.0,
+    })
+    assert not overwrite_final_table_partitions(df, "projeto", "dataset", "final", client=mock_client)
+    mock_client.load_table_from_file.assert_not_called()
+
+
+def _legacy_table(table, **kwargs):
+    """create_table(exists_ok=True) de uma tabela ibge_* criada no layout antigo do BCB."""
+    legacy = bigquery.Table("projeto.dataset.ibge_legado", schema=[
+        bigquery.SchemaField("data_referencia", "DATE"),
+        bigquery.SchemaField("codigo_serie", "INTEGER"),
+        bigquery.SchemaField("valor_serie", "FLOAT"),
+    ])
+    legacy.clustering_fields = ["codigo_serie"]
+    return legacy
+
+
+def test_ibge_merge_migrates_legacy_table(mock_client):
+    mock_client.create_table.side_effect = _legacy_table
+    mock_client.query.side_effect = [
+        _bounds_job(date(2024, 1, 1), date(2024, 3, 1), [63]), _merge_job(),
+        _bounds_job(date(2024, 4, 1), date(2024, 4, 1), [63]), _merge_job(),
+    ]
+
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "ibge_legado", client=mock_client, pipeline="ibge")
+
+    table, fields = mock_client.update_table.call_args.args
+    assert fields == ["schema", "clustering_fields"]
+    assert [field.name for field in table.schema][:3] == ["data_referencia", "codigo_serie", "valor_serie"]
+    assert len(table.schema) == 8
+    assert table.clustering_fields == ["codigo_serie", "localidade_codigo"]
+    merge_sql = mock_client.query.call_args.args[0]
+    assert "BEGIN TRANSACTION" in merge_sql and "COMMIT TRANSACTION" in merge_sql
+    assert "WHERE (target.localidade_codigo IS NULL) AND target.data_referencia BETWEEN" in merge_sql
+    assert "source.data_referencia = target.data_referencia AND source.codigo_serie = target.codigo_serie" in merge_sql
+    assert merge_sql.index("DELETE FROM") < merge_sql.index("MERGE")
+
+    # A limpeza acompanha só o MERGE que segue a migração; os seguintes são o MERGE simples
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "ibge_legado", client=mock_client, pipeline="ibge")
+    merge_sql = mock_client.query.call_args.args[0]
+    assert "DELETE" not in merge_sql and merge_sql.strip().startswith("MERGE")
+    mock_client.update_table.assert_called_once()
+
+
+def test_ibge_merge_on_current_table_has_no_legacy_cleanup(mock_client):
+    mock_client.query.side_effect = [_bounds_job(date(2024, 1, 1), date(2024, 3, 1), [63]), _merge_job()]
+
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "ibge_atual", client=mock_client, pipeline="ibge")
+
+    assert mock_client.query.call_args.args[0].strip().startswith("MERGE")
+    mock_client.update_table.assert_not_called()
+
+
+def test_legacy_cleanup_waits_for_staging_bounds(mock_client):
+    mock_client.create_table.side_effect = _legacy_table
+    mock_client.query.side_effect = [
+        RuntimeError("bounds indisponíveis"), _merge_job(),
+        _bounds_job(date(2024, 1, 1), date(2024, 3, 1), [63]), _merge_job(),
+    ]
+
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "ibge_legado", client=mock_client, pipeline="ibge")
+    assert "DELETE" not in mock_client.query.call_args.args[0]
+
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "ibge_legado", client=mock_client, pipeline="ibge")
+    assert "DELETE FROM" in mock_client.query.call_args.args[0]
+
+
+def test_bcb_merge_has_no_legacy_cleanup(mock_client):
+    assert merge_data_to_final_table("projeto", "dataset", "stg", "final", client=mock_client)
+
+    assert "DELETE" not in mock_client.query.call_args.args[0]
+    mock_client.update_table.assert_not_called()
+
+
+def test_final_table_with_conflicting_column_type_fails(mock_client):
+    def _conflicting(table, **kwargs):
+        return bigquery.Table("projeto.dataset.final_conflito", schema=[bigquery.SchemaField("codigo_serie", "STRING")])
+    mock_client.create_table.side_effect = _conflicting
+
+    assert not merge_data_to_final_table("projeto", "dataset", "stg", "final_conflito", client=mock_client)
+    mock_client.update_table.assert_not_called()
+
+
+def test_ibge_overwrite_replaces_legacy_rows(mock_client):
+    columns = {name: position for position, name in enumerate(IBGE_SCHEMA.column_names)}
+    legacy = Row((date(2024, 1, 1), None, 63, None, 0.9, None, None, None), columns)
+    other_date = Row((date(2024, 1, 1), None, 64, None, 1.0, None, None, None), columns)
+    mock_client.query.return_value.result.return_value = [legacy, other_date]
+    df = pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01", "2024-01-01"]),
+        "codigo_agregado": "1737",
+        "codigo_serie": 63,
+        "nome_variavel_principal": "IPCA",
+        "valor_serie": [0.4, 0.5],
+        "unidade_medida": "%",
+        "localidade_codigo": ["3304557", "3550308"],
+        "localidade_nome": ["Rio de Janeiro", "São Paulo"],
+    })
+
+    assert overwrite_final_table_partitions(
+        df, "projeto", "dataset", "ibge_legado_overwrite", client=mock_client, max_workers=1, pipeline="ibge"
+    )
+
+    call = mock_client.load_table_from_file.call_args
+    loaded = _loaded_table(call).to_pandas().sort_values(["codigo_serie", "valor_serie"])
+    assert loaded[["codigo_serie", "valor_serie"]].values.tolist() == [[63, 0.4], [63, 0.5], [64, 1.0]]
+    assert call.kwargs["job_config"].schema is None
+
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from src.common.concurrency import run_concurrently
+
+
+def test_run_concurrently_preserves_order():
+    def slow_square(x):
+        time.sleep(0.01 * (5 - x))
+        return x * x
+
+    result = run_concurrently(slow_square, [1, 2, 3, 4], max_workers=4)
+    assert result == [1, 4, 9, 16]
+
+
+def test_run_concurrently_sequential_when_single_worker():
+    threads = set()
+
+    def record_thread(x):
+        threads.add(threading.current_thread().name)
+        return x
+
+    result = run_concurrently(record_thread, [1, 2, 3], max_workers=1)
+    assert result == [1, 2, 3]
+    assert threads == {threading.current_thread().name}
+
+
+def test_run_concurrently_respects_max_workers():
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def track(x):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return x
+
+    run_concurrently(track, range(10), max_workers=3)
+    assert state["peak"] <= 3
+
+
+def test_run_concurrently_empty_items():
+    assert run_concurrently(lambda x: x, [], max_workers=4) == []
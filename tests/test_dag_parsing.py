@@ -0,0 +1,82 @@
+"""Custo de parse das DAGs: cada arquivo é importado em um interpretador novo, como no DagFileProcessor."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAG_FILES = ["bcb_pipeline_dag.py", "ibge_pipeline_dag.py"]
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "google.cloud.bigquery", "requests"]
+# Tempo do próprio arquivo da DAG, descontado o import do Airflow; só o import do pandas já passa disso
+DAG_PARSE_BUDGET_SECONDS = 0.3
+
+PARSE_SCRIPT = """
+import importlib.util, json, sys, time
+
+import pendulum
+from airflow.exceptions import AirflowException
+from airflow.models import Variable
+try:
+    from airflow.sdk import DAG, Variable as SdkVariable, task
+except ImportError:
+    from airflow import DAG
+    from airflow.decorators import task
+    SdkVariable = Variable
+
+variable_calls = []
+
+def _record_get(key, *args, **kwargs):
+    variable_calls.append(key)
+    raise RuntimeError(f"Variable.get({key!r}) durante o parse")
+
+Variable.get = _record_get
+SdkVariable.get = _record_get
+
+loaded_before = set(sys.modules)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("dag_under_test", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    "seconds": elapsed,
+    "new_modules": sorted(set(sys.modules) - loaded_before),
+    "variable_calls": variable_calls,
+    "task_ids": sorted(module.dag.task_ids),
+}))
+"""
+
+
+def _parse_dag(dag_file: str, dags_folder) -> dict:
+    # Mesmo layout do deploy: a DAG na pasta de DAGs com o código em <pasta>/src
+    shutil.copy(os.path.join(REPO_ROOT, "dags", dag_file), dags_folder / dag_file)
+    src_link = dags_folder / "src"
+    if not src_link.exists():
+        os.symlink(os.path.join(REPO_ROOT, "src"), src_link)
+    env = {key: value for key, value in os.environ.items() if not key.startswith("AIRFLOW_VAR_")}
+    completed = subprocess.run(
+        [sys.executable, "-c", PARSE_SCRIPT, str(dags_folder / dag_file)],
+        capture_output=True, text=True, env=env, cwd=str(dags_folder), timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("dag_file", DAG_FILES)
+def test_dag_parse_is_lightweight(dag_file, tmp_path):
+    result = _parse_dag(dag_file, tmp_path)
+
+    assert result["variable_calls"] == []
+    heavy = [
+        name for name in result["new_modules"]
+        if any(name == heavy or name.startswith(heavy + ".") for heavy in HEAVY_MODULES)
+    ]
+    assert heavy == []
+    assert not any(name.endswith("main_bcb") or name.endswith("main_ibge") for name in result["new_modules"])
+    assert len(result["task_ids"]) == 1
+    print(f"{dag_file}: parse em {result['seconds'] * 1000:.1f} ms")
+    assert result["seconds"] < DAG_PARSE_BUDGET_SECONDS
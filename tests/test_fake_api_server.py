@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from src.bcb_pipeline.extractor import fetch_bcb_series_data, fetch_bcb_series_data_chunked
+from src.ibge_pipeline.extractor import (
+    clear_ibge_metadata_cache,
+    fetch_ibge_aggregate_data,
+    fetch_ibge_aggregate_data_batches,
+    fetch_ibge_period_type,
+)
+
+
+def test_bcb_series_served_for_requested_window(fake_api):
+    df = fetch_bcb_series_data(11, "01/01/2024", "31/01/2024")
+
+    assert len(df) == 31
+    assert df["data"].iloc[0] == "01/01/2024"
+    assert fake_api.requests[0].startswith("/dados/serie/bcdata.sgs.11/dados?")
+
+
+def test_bcb_window_above_api_limit_is_rejected(fake_api):
+    assert fetch_bcb_series_data(11, "01/01/2000", "31/12/2024") is None
+
+
+def test_bcb_chunked_backfill_splits_into_accepted_windows(fake_api):
+    df = fetch_bcb_series_data_chunked(11, "01/01/1995", "31/12/2024", max_workers=4)
+
+    assert len(df) == (pd.Timestamp("2024-12-31") - pd.Timestamp("1995-01-01")).days + 1
+    assert df["data"].is_unique
+    assert fake_api.request_count == 3
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_transient_errors_are_retried(fake_api, status):
+    fake_api.config.fail_first = 2
+    fake_api.config.fail_status = status
+    fake_api.config.retry_after = 0
+
+    df = fetch_bcb_series_data(11, "01/01/2024", "10/01/2024")
+
+    assert len(df) == 10
+    assert fake_api.request_count == 3
+
+
+def test_persistent_errors_return_none(fake_api):
+    fake_api.config.fail_first = 100
+
+    assert fetch_bcb_series_data(11, "01/01/2024", "10/01/2024") is None
+    assert fake_api.request_count == 5
+
+
+def test_ibge_flat_view_includes_header_row(fake_api):
+    fake_api.config.ibge_localities = 5
+
+    df = fetch_ibge_aggregate_data("1737", "63", "202401|202402", "N6[all]")
+
+    assert len(df) == 1 + 5 * 2
+    assert df["V"].iloc[0] == "Valor"
+
+
+def test_ibge_truncated_body_returns_none(fake_api):
+    fake_api.config.truncate = True
+
+    assert fetch_ibge_aggregate_data("1737", "63", "-6", "N6[all]") is None
+
+
+def test_ibge_stream_truncated_mid_body_raises(fake_api):
+    fake_api.config.truncate = True
+    fake_api.config.ibge_localities = 200
+
+    batches = fetch_ibge_aggregate_data_batches("1737", "63", "-6", "N6[all]", batch_size=50)
+    with pytest.raises(ValueError):
+        list(batches)
+
+
+def test_ibge_stream_reads_all_rows_in_batches(fake_api):
+    fake_api.config.ibge_localities = 100
+
+    batches = list(fetch_ibge_aggregate_data_batches("1737", "63", "-3", "N6[all]", batch_size=120))
+
+    assert [len(batch) for batch in batches] == [120, 120, 61]
+
+
+def test_ibge_period_type_read_once_from_metadata(fake_api):
+    fake_api.config.ibge_frequency = "Trimestral"
+    clear_ibge_metadata_cache()
+
+    assert fetch_ibge_period_type("4099") == "trimestral"
+    assert fetch_ibge_period_type("4099") == "trimestral"
+
+    assert fake_api.requests == ["/api/v3/agregados/4099/metadados"]
+    clear_ibge_metadata_cache()
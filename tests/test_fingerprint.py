@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from src.common.fingerprint import (
+    FingerprintStore,
+    compute_dataframe_fingerprint,
+    configure_fingerprint_store,
+    fingerprint_key,
+    get_fingerprint_store,
+)
+
+
+@pytest.fixture
+def transformed_df():
+    return pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+        "codigo_serie": [11, 11],
+        "valor_serie": [13.65, 13.70],
+    })
+
+
+def test_fingerprint_ignores_row_and_column_order(transformed_df):
+    shuffled = transformed_df.iloc[::-1][["valor_serie", "codigo_serie", "data_referencia"]]
+    assert compute_dataframe_fingerprint(shuffled) == compute_dataframe_fingerprint(transformed_df)
+
+
+def test_fingerprint_detects_revised_value(transformed_df):
+    revised = transformed_df.copy()
+    revised.loc[1, "valor_serie"] = 13.71
+    assert compute_dataframe_fingerprint(revised) != compute_dataframe_fingerprint(transformed_df)
+
+
+def test_store_round_trip(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fp" / "fingerprints.sqlite"))
+    key = fingerprint_key("bcb", "selic_diaria", "01/01/2024")
+
+    assert store.get(key) is None
+    store.put(key, "abc")
+    assert store.is_unchanged(key, "abc")
+    assert not store.is_unchanged(key, "def")
+
+    reopened = FingerprintStore(store.path)
+    assert reopened.get(key) == "abc"
+
+
+def test_store_configured_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("FINGERPRINT_STORE_PATH", str(tmp_path / "fingerprints.sqlite"))
+    monkeypatch.setattr("src.common.fingerprint._STORE_CONFIGURED", False)
+    try:
+        assert isinstance(get_fingerprint_store(), FingerprintStore)
+    finally:
+        configure_fingerprint_store(None)
+    assert get_fingerprint_store() is None
@@ -0,0 +1,100 @@
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+
+from src.common.http_cache import HttpCache, build_cache_key, configure_http_cache
+from src.common.http_client import http_get
+
+
+def make_response(status_code=200, body=b'[{"data": "01/01/2024", "valor": "1"}]', headers=None, url="https://api.test/dados"):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers.update(headers or {"Content-Type": "application/json"})
+    response.url = url
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = configure_http_cache(str(tmp_path / "cache"))
+    yield cache
+    configure_http_cache(None)
+
+
+@pytest.fixture
+def mock_session():
+    with patch("src.common.http_client.get_http_session") as mock_get_session:
+        session = MagicMock()
+        mock_get_session.return_value = session
+        yield session
+
+
+def test_cache_key_is_independent_of_param_order():
+    assert build_cache_key("https://x/dados", {"a": 1, "b": 2}) == build_cache_key("https://x/dados", {"b": 2, "a": 1})
+    assert build_cache_key("https://x/dados", {"a": 1}) != build_cache_key("https://x/dados", {"a": 2})
+
+
+def test_fresh_entry_served_without_request(cache, mock_session):
+    mock_session.get.return_value = make_response()
+
+    first = http_get("https://api.test/dados", params={"formato": "json"}, cache_ttl=60)
+    second = http_get("https://api.test/dados", params={"formato": "json"}, cache_ttl=60)
+
+    assert mock_session.get.call_count == 1
+    assert second.json() == first.json()
+    assert getattr(second, "from_cache", False) is True
+
+
+def test_stale_entry_revalidated_with_etag(cache, mock_session):
+    mock_session.get.return_value = make_response(headers={"Content-Type": "application/json", "ETag": '"v1"'})
+    http_get("https://api.test/dados", cache_ttl=60)
+
+    mock_session.get.return_value = make_response(status_code=304, body=b"")
+    response = http_get("https://api.test/dados", cache_ttl=0)
+
+    assert mock_session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert response.status_code == 200
+    assert response.json()[0]["valor"] == "1"
+
+
+def test_errors_are_not_cached(cache, mock_session):
+    mock_session.get.return_value = make_response(status_code=503, body=b"")
+    http_get("https://api.test/dados", cache_ttl=60)
+    http_get("https://api.test/dados", cache_ttl=60)
+    assert mock_session.get.call_count == 2
+
+
+@pytest.mark.parametrize("body, headers", [
+    (b"<html>Sistema em manutencao</html>", {"Content-Type": "text/html"}),
+    (b"<html>Sistema em manutencao</html>", {"Content-Type": "application/json"}),
+    (b'[{"data": "01/01/2024"', {"Content-Type": "application/json"}),
+])
+def test_ok_response_without_valid_json_is_not_cached(cache, mock_session, body, headers):
+    mock_session.get.return_value = make_response(body=body, headers=headers)
+    http_get("https://api.test/dados", cache_ttl=60)
+
+    mock_session.get.return_value = make_response()
+    response = http_get("https://api.test/dados", cache_ttl=60)
+
+    assert mock_session.get.call_count == 2
+    assert response.json()[0]["valor"] == "1"
+
+
+def test_no_cache_without_ttl(cache, mock_session):
+    mock_session.get.return_value = make_response()
+    http_get("https://api.test/dados")
+    http_get("https://api.test/dados")
+    assert mock_session.get.call_count == 2
+
+
+def test_lru_eviction_respects_max_bytes(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=250)
+    for i in range(5):
+        cache.put(f"key-{i}", make_response(body=b"x" * 100))
+        cache.get("key-0")
+
+    assert cache.total_bytes() <= 250
+    assert cache.get("key-0") is not None
+    assert cache.get("key-1") is None
+    assert cache.get("key-4") is not None
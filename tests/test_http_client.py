@@ -0,0 +1,41 @@
+import pytest
+
+from src.common.http_client import (
+    HTTP_POOL_MAXSIZE,
+    RETRY_STATUS_CODES,
+    build_http_session,
+    close_http_session,
+    get_http_session,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    close_http_session()
+    yield
+    close_http_session()
+
+
+def test_get_http_session_is_shared():
+    assert get_http_session() is get_http_session()
+
+
+def test_session_retry_and_pool_configuration():
+    session = build_http_session(max_retries=3, backoff_factor=0.5)
+    adapter = session.get_adapter("https://api.bcb.gov.br")
+    retry = adapter.max_retries
+
+    assert retry.total == 3
+    assert retry.backoff_factor == 0.5
+    assert retry.backoff_jitter > 0
+    assert retry.respect_retry_after_header is True
+    assert set(RETRY_STATUS_CODES) <= set(retry.status_forcelist)
+    assert "GET" in retry.allowed_methods
+    assert retry.raise_on_status is False
+    assert adapter._pool_maxsize == HTTP_POOL_MAXSIZE
+    assert adapter._pool_block is True
+
+
+def test_session_negotiates_gzip():
+    session = build_http_session()
+    assert "gzip" in session.headers["Accept-Encoding"]
@@ -1,11 +1,19 @@
+import json
 import pytest
+import requests
 from unittest.mock import patch, MagicMock
 import pandas as pd
 
-from src.ibge_pipeline.extractor import fetch_ibge_aggregate_data
+from src.ibge_pipeline.extractor import (
+    clear_ibge_metadata_cache,
+    fetch_ibge_aggregate_data,
+    fetch_ibge_aggregate_data_batches,
+    fetch_ibge_period_type,
+    format_classification_filter,
+)
 
 
-@patch("src.ibge_pipeline.extractor.requests.get")
+@patch("src.ibge_pipeline.extractor.http_get")
 def test_ibge_extractor_success(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -19,7 +27,7 @@ def test_ibge_extractor_success(mock_get):
     assert "variavel" in df.columns
 
 
-@patch("src.ibge_pipeline.extractor.requests.get")
+@patch("src.ibge_pipeline.extractor.http_get")
 def test_ibge_extractor_empty_response_text(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -31,7 +39,7 @@ def test_ibge_extractor_empty_response_text(mock_get):
     assert df.empty
 
 
-@patch("src.ibge_pipeline.extractor.requests.get")
+@patch("src.ibge_pipeline.extractor.http_get")
 def test_ibge_extractor_empty_json(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -43,7 +51,7 @@ def test_ibge_extractor_empty_json(mock_get):
     assert df.empty
 
 
-@patch("src.ibge_pipeline.extractor.requests.get")
+@patch("src.ibge_pipeline.extractor.http_get")
 def test_ibge_extractor_json_decode_error(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -51,15 +59,92 @@ def test_ibge_extractor_json_decode_error(mock_get):
     mock_response.json.side_effect = ValueError("Invalid JSON")
     mock_get.return_value = mock_response
 
-    df = fetch_ibge_aggregate_data("1737", "63")
-    assert df.empty
+    assert fetch_ibge_aggregate_data("1737", "63") is None
 
 
-@patch("src.ibge_pipeline.extractor.requests.get")
+@patch("src.ibge_pipeline.extractor.http_get")
 def test_ibge_extractor_http_error(mock_get):
     mock_response = MagicMock()
     mock_response.raise_for_status.side_effect = Exception("Erro HTTP")
     mock_get.return_value = mock_response
 
-    df = fetch_ibge_aggregate_data("1737", "63")
-    assert df.empty
+    assert fetch_ibge_aggregate_data("1737", "63") is None
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_ibge_extractor_batches(mock_get):
+    records = [{"D2C": "Mês (Código)", "V": "Valor"}] + [{"D2C": f"2024{m:02d}", "V": str(m)} for m in range(1, 11)]
+    payload = json.dumps(records).encode("utf-8")
+    mock_response = MagicMock()
+    mock_response.iter_content.return_value = [payload[i:i + 16] for i in range(0, len(payload), 16)]
+    mock_get.return_value = mock_response
+
+    batches = list(fetch_ibge_aggregate_data_batches("1737", "63", batch_size=4))
+
+    assert [len(batch) for batch in batches] == [4, 4, 3]
+    assert batches[0]["D2C"].iloc[0] == "Mês (Código)"
+    assert mock_get.call_args.kwargs["stream"] is True
+    mock_response.close.assert_called_once()
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_ibge_extractor_batches_http_error(mock_get):
+    mock_response = MagicMock()
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("Erro HTTP")
+    mock_get.return_value = mock_response
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        list(fetch_ibge_aggregate_data_batches("1737", "63"))
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_ibge_extractor_batches_truncated_midstream_raises(mock_get):
+    payload = json.dumps([{"D2C": str(i)} for i in range(10)]).encode("utf-8")[:-10]
+    mock_response = MagicMock()
+    mock_response.iter_content.return_value = [payload]
+    mock_get.return_value = mock_response
+
+    with pytest.raises(ValueError):
+        list(fetch_ibge_aggregate_data_batches("1737", "63", batch_size=2))
+
+
+@pytest.mark.parametrize("classification_filter, expected", [
+    ("315[7169]", "315[7169]"),
+    (["315[7169]", "2[6794]"], "315[7169]|2[6794]"),
+    ({"315": ["7169", "7170"], "2": "all"}, "315[7169,7170]|2[all]"),
+])
+def test_format_classification_filter(classification_filter, expected):
+    assert format_classification_filter(classification_filter) == expected
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_ibge_extractor_sends_classification_filter(mock_get):
+    mock_response = MagicMock()
+    mock_response.text = "[]"
+    mock_get.return_value = mock_response
+
+    fetch_ibge_aggregate_data("1737", "63", "202301", "N1[all]", classification_filter={"315": [7169]})
+    assert mock_get.call_args.kwargs["params"]["classificacao"] == "315[7169]"
+
+    fetch_ibge_aggregate_data("1737", "63", "202301", "N1[all]")
+    assert "classificacao" not in mock_get.call_args.kwargs["params"]
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_ibge_period_type_failure_is_not_memoized(mock_get):
+    clear_ibge_metadata_cache()
+    mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error")
+    assert fetch_ibge_period_type("1737") is None
+
+    mock_get.return_value.raise_for_status.side_effect = None
+    mock_get.return_value.json.return_value = {"id": 1737, "periodicidade": {"frequencia": "mensal"}}
+    assert fetch_ibge_period_type("1737") == "mensal"
+    assert mock_get.call_args.args[0].endswith("/agregados/1737/metadados")
+    clear_ibge_metadata_cache()
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_ibge_period_type_missing_frequency(mock_get):
+    clear_ibge_metadata_cache()
+    mock_get.return_value.json.return_value = {"id": 1737}
+    assert fetch_ibge_period_type("1737") is None
@@ -0,0 +1,118 @@
+import pandas as pd
+
+from src.ibge_pipeline.extractor import fetch_ibge_aggregate_data, fetch_ibge_aggregate_data_batches
+from src.ibge_pipeline.sharding import (
+    IBGE_MUNICIPALITIES_PER_UF,
+    IbgeShard,
+    estimate_locality_count,
+    expand_ibge_periods,
+    plan_ibge_shards,
+)
+
+
+def test_small_query_is_a_single_unchanged_shard():
+    assert plan_ibge_shards("202301-202412", "N1[all]", "mensal") == [IbgeShard("202301-202412", "N1[all]")]
+
+
+def test_unknown_locality_specifier_is_not_split():
+    assert plan_ibge_shards("-120", "N1[all]|N6[all]", "mensal", max_values=10) == [IbgeShard("-120", "N1[all]|N6[all]")]
+
+
+def test_municipalities_are_split_by_uf():
+    shards = plan_ibge_shards("202301-202312", "N6[all]", "mensal")
+
+    assert [shard.localities for shard in shards] == [f"N6[N3[{uf}]]" for uf in IBGE_MUNICIPALITIES_PER_UF]
+    assert {shard.periods for shard in shards} == {"202301-202312"}
+
+
+def test_large_ufs_also_split_periods_within_the_limit():
+    shards = plan_ibge_shards("201501-202412", "N6[all]", "mensal", max_values=50_000)
+
+    for shard in shards:
+        periods = expand_ibge_periods(shard.periods, "mensal")
+        assert estimate_locality_count(shard.localities) * len(periods) <= 50_000
+    mg_periods = [
+        period for shard in shards if shard.localities == "N6[N3[31]]"
+        for period in expand_ibge_periods(shard.periods, "mensal")
+    ]
+    assert mg_periods == expand_ibge_periods("201501-202412", "mensal")
+    assert len([shard for shard in shards if shard.localities == "N6[N3[31]]"]) == 3
+
+
+def test_code_lists_are_chunked():
+    codes = ",".join(str(3300000 + i) for i in range(10))
+
+    shards = plan_ibge_shards("2020|2021", f"N6[{codes}]", "anual", max_values=4)
+
+    assert len(shards) == 5
+    assert all(len(shard.localities.split(",")) == 2 for shard in shards)
+
+
+def test_unknown_period_count_splits_localities_only():
+    shards = plan_ibge_shards("all", "N6[all]")
+
+    assert len(shards) == len(IBGE_MUNICIPALITIES_PER_UF)
+    assert {shard.periods for shard in shards} == {"all"}
+
+
+def test_expand_periods_by_period_type():
+    assert expand_ibge_periods("202303-202402", "trimestral") == ["202303", "202304", "202401", "202402"]
+    assert expand_ibge_periods("2020-2022|2024", "anual") == ["2020", "2021", "2022", "2024"]
+    assert expand_ibge_periods("202311-202402", "mensal") == ["202311", "202312", "202401", "202402"]
+    assert expand_ibge_periods("-6", "mensal") is None
+    assert expand_ibge_periods("202301-202312", None) is None
+
+
+def test_sharded_fetch_matches_single_request(fake_api):
+    fake_api.config.ibge_localities = 270
+
+    single = fetch_ibge_aggregate_data("1737", "63", "202301-202312", "N6[all]", max_values_per_request=None)
+    requests_before = fake_api.request_count
+    sharded = fetch_ibge_aggregate_data(
+        "1737", "63", "202301-202312", "N6[all]", period_type="mensal", max_values_per_request=20_000
+    )
+
+    assert fake_api.request_count - requests_before == len(IBGE_MUNICIPALITIES_PER_UF)
+    assert len(sharded) == len(single) == 1 + 270 * 12
+    assert (sharded["V"] == "Valor").sum() == 1
+    assert sharded["V"].iloc[0] == "Valor"
+    key = ["D1C", "D2C", "V"]
+    pd.testing.assert_frame_equal(
+        sharded[key].sort_values(key).reset_index(drop=True), single[key].sort_values(key).reset_index(drop=True)
+    )
+
+
+def test_sharded_fetch_discards_partial_results(fake_api):
+    fake_api.config.fail_first = 1
+    fake_api.config.fail_status = 400
+
+    df = fetch_ibge_aggregate_data("1737", "63", "202301-202312", "N6[all]", period_type="mensal", max_workers=1)
+
+    assert df is None
+    assert fake_api.request_count == len(IBGE_MUNICIPALITIES_PER_UF)
+
+
+def test_sharded_stream_emits_header_once(fake_api):
+    fake_api.config.ibge_localities = 270
+
+    batches = list(fetch_ibge_aggregate_data_batches(
+        "1737", "63", "202301-202312", "N6[all]", batch_size=500, period_type="mensal"
+    ))
+    df = pd.concat(batches, ignore_index=True)
+
+    assert len(df) == 1 + 270 * 12
+    assert (df["V"] == "Valor").sum() == 1
+    assert df["V"].iloc[0] == "Valor"
+
+
+def test_classification_filter_is_sent_to_every_shard(fake_api):
+    fake_api.config.ibge_localities = 54
+    fake_api.config.ibge_categories = 400
+
+    df = fetch_ibge_aggregate_data(
+        "1737", "63", "202301-202312", "N6[all]", period_type="mensal", classification_filter="315[7169]"
+    )
+
+    assert len(df) == 1 + 54 * 12
+    assert set(df["D4C"].iloc[1:]) == {"7169"}
+    assert all("classificacao=315%5B7169%5D" in path for path in fake_api.requests)
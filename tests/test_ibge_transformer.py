@@ -1,6 +1,11 @@
 import pytest
 import pandas as pd
-from src.ibge_pipeline.transformer import transform_ibge_data
+from src.ibge_pipeline.transformer import (
+    _parse_ibge_period_to_date,
+    parse_ibge_periods,
+    transform_ibge_data,
+    transform_ibge_data_batches,
+)
 
 
 @pytest.fixture
@@ -63,3 +68,78 @@ def test_transform_ibge_value_with_ellipsis():
     result = transform_ibge_data(df, "1737", "63", "IPCA")
     assert len(result) == 1
     assert result["valor_serie"].iloc[0] == 5.1
+
+
+def test_transform_ibge_batches_matches_single_frame(sample_ibge_raw):
+    extra = pd.DataFrame([
+        {"D2C": "202403", "V": "...", "D1C": "1", "D1N": "Brasil", "MN": "%"},
+        {"D2C": "202402", "V": "5.0", "D1C": "1", "D1N": "Brasil", "MN": "%"},
+        {"D2C": "202405", "V": "6.1", "D1C": "1", "D1N": "Brasil", "MN": "%"},
+    ])
+    full = pd.concat([sample_ibge_raw, extra], ignore_index=True)
+    batches = [full.iloc[0:2], full.iloc[2:4], full.iloc[4:]]
+
+    expected = transform_ibge_data(full, "1737", "63", "IPCA").reset_index(drop=True)
+    result = transform_ibge_data_batches(batches, "1737", "63", "IPCA")
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_transform_ibge_batches_empty():
+    assert transform_ibge_data_batches([], "1737", "63", "IPCA").empty
+
+
+def test_parse_ibge_periods_matches_scalar_parser():
+    periods = pd.Series(["202401", "2023", None, "20ABCD", "202413", "202405", "0000", "12", 5, "199904", "202401"])
+    expected = periods.apply(_parse_ibge_period_to_date)
+    result = parse_ibge_periods(periods)
+    assert result.dtype == "datetime64[us]"
+    assert result.isna().tolist() == expected.isna().tolist()
+    assert result.dropna().tolist() == expected.dropna().tolist()
+
+
+def test_parse_ibge_periods_with_monthly_hint():
+    result = parse_ibge_periods(pd.Series(["202402", "202411"]), period_type="mensal")
+    assert result.tolist() == [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-11-01")]
+
+
+def test_parse_ibge_periods_with_quarterly_hint():
+    result = parse_ibge_periods(pd.Series(["202402", "202405"]), period_type="trimestral")
+    assert result.iloc[0] == pd.Timestamp("2024-04-01")
+    assert pd.isna(result.iloc[1])
+
+
+def test_parse_ibge_periods_reports_invalid_in_aggregate(caplog):
+    parse_ibge_periods(pd.Series(["20ABCD"] * 50 + ["202401"]))
+    warnings = [r for r in caplog.records if "períodos inválidos" in r.getMessage()]
+    assert len(warnings) == 1
+    assert "50 períodos inválidos" in warnings[0].getMessage()
+
+
+def test_transform_ibge_monthly_period_type(sample_ibge_raw):
+    df = transform_ibge_data(sample_ibge_raw, "1737", "63", "IPCA", period_type="mensal")
+    assert df["data_referencia"].tolist() == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-02-01")]
+
+
+def test_transform_ibge_compact_dtypes(sample_ibge_raw):
+    default = transform_ibge_data(sample_ibge_raw, "1737", "63", "IPCA")
+    compact = transform_ibge_data(sample_ibge_raw, "1737", "63", "IPCA", compact=True)
+
+    assert compact["codigo_agregado"].dtype == "category"
+    assert compact["localidade_nome"].dtype == "category"
+    assert compact["codigo_serie"].dtype == "int32"
+    assert compact["localidade_codigo"].dtype == "string"
+    pd.testing.assert_frame_equal(compact.astype(default.dtypes.to_dict()), default)
+
+
+def test_transform_ibge_keeps_one_row_per_locality():
+    raw = pd.DataFrame([
+        {"D2C": "Período", "V": "Valor", "NC": "Nível", "D1C": "Local", "D1N": "Local Nome", "MN": "Unidade"},
+        {"D2C": "202401", "V": "0.4", "NC": "N6", "D1C": "3304557", "D1N": "Rio de Janeiro", "MN": "%"},
+        {"D2C": "202401", "V": "0.5", "NC": "N6", "D1C": "3550308", "D1N": "São Paulo", "MN": "%"},
+    ])
+
+    df = transform_ibge_data(raw, "1737", "63", "IPCA")
+
+    assert df["localidade_codigo"].tolist() == ["3304557", "3550308"]
+    assert df["valor_serie"].tolist() == [0.4, 0.5]
@@ -0,0 +1,34 @@
+import json
+import pytest
+
+from src.common.json_stream import iter_batches, iter_json_array
+
+
+def split_bytes(payload: bytes, size: int):
+    return [payload[i:i + size] for i in range(0, len(payload), size)]
+
+
+def test_iter_json_array_across_small_chunks():
+    records = [{"D2C": "202401", "V": "4.5", "D1N": "São Paulo"}, {"D2C": "202402", "V": "1,2"}, 12345, "texto"]
+    payload = json.dumps(records, ensure_ascii=False).encode("utf-8")
+
+    assert list(iter_json_array(split_bytes(payload, 3))) == records
+
+
+def test_iter_json_array_empty_array():
+    assert list(iter_json_array([b"  [ ", b" ] "])) == []
+
+
+def test_iter_json_array_truncated_body():
+    payload = json.dumps([{"a": 1}, {"b": 2}]).encode("utf-8")[:-5]
+    with pytest.raises(ValueError):
+        list(iter_json_array(split_bytes(payload, 4)))
+
+
+def test_iter_json_array_requires_array():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
+
+
+def test_iter_batches():
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,41 @@
+import os
+from datetime import date
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.common.landing_zone import landing_path, read_landing_parquet, write_landing_parquet
+
+
+@pytest.fixture
+def transformed_df():
+    return pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+        "codigo_serie": [11, 11],
+        "valor_serie": [13.65, 13.70],
+    })
+
+
+def test_landing_path_layout(tmp_path):
+    path = landing_path(str(tmp_path), "bcb", "selic_diaria", date(2024, 3, 1))
+    assert path == os.path.join(str(tmp_path), "bcb", "selic_diaria", "run_date=2024-03-01", "selic_diaria.parquet")
+
+
+def test_write_landing_parquet_round_trip(tmp_path, transformed_df):
+    path = write_landing_parquet(transformed_df, "bcb", "selic_diaria", date(2024, 3, 1), base_dir=str(tmp_path))
+
+    assert os.listdir(os.path.dirname(path)) == ["selic_diaria.parquet"]
+    parquet_file = pq.ParquetFile(path)
+    assert str(parquet_file.schema_arrow.field("data_referencia").type) == "date32[day]"
+    assert parquet_file.metadata.row_group(0).column(0).compression == "SNAPPY"
+
+    df = read_landing_parquet("bcb", "selic_diaria", date(2024, 3, 1), base_dir=str(tmp_path))
+    assert df["valor_serie"].tolist() == [13.65, 13.70]
+    assert len(df) == 2
+
+
+def test_write_landing_parquet_requires_configuration(transformed_df, monkeypatch):
+    monkeypatch.delenv("LANDING_ZONE_DIR", raising=False)
+    with pytest.raises(ValueError):
+        write_landing_parquet(transformed_df, "bcb", "selic_diaria")
@@ -0,0 +1,146 @@
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.bcb_pipeline.main_bcb import run_full_bcb_pipeline_for_series
+from src.common.bigquery_operations import (
+    delete_staging_table,
+    get_series_watermarks,
+    load_df_to_staging_table,
+    merge_data_to_final_table,
+    overwrite_final_table_partitions,
+)
+from src.common.local_warehouse import configure_local_warehouse
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    yield configure_local_warehouse(str(tmp_path / "warehouse.sqlite"))
+    configure_local_warehouse(None)
+
+
+def _frame(dates, code, values):
+    return pd.DataFrame({
+        "data_referencia": pd.to_datetime(dates),
+        "codigo_serie": code,
+        "valor_serie": values,
+    })
+
+
+def test_merge_upserts_by_date_and_series(warehouse):
+    assert load_df_to_staging_table(_frame(["2024-01-01", "2024-01-02"], 11, [1.0, 2.0]), "p", "ds", "stg")
+    assert merge_data_to_final_table("p", "ds", "stg", "final")
+
+    assert load_df_to_staging_table(_frame(["2024-01-02", "2024-01-03"], 11, [2.5, 3.0]), "p", "ds", "stg")
+    assert merge_data_to_final_table("p", "ds", "stg", "final")
+    assert delete_staging_table("p", "ds", "stg")
+
+    final = warehouse.read_table("ds", "final").sort_values("data_referencia")
+    assert final["valor_serie"].tolist() == [1.0, 2.5, 3.0]
+    assert not warehouse.table_exists("ds", "stg")
+    assert get_series_watermarks("p", "ds", "final") == {11: date(2024, 1, 3)}
+
+
+def test_merge_respects_series_codes_in_shared_staging(warehouse):
+    df = pd.concat([_frame(["2024-01-01"], 11, [1.0]), _frame(["2024-01-01"], 1, [4.95])])
+    assert load_df_to_staging_table(df, "p", "ds", "stg")
+    assert merge_data_to_final_table("p", "ds", "stg", "final", series_codes=[1])
+
+    assert warehouse.read_table("ds", "final")["codigo_serie"].tolist() == [1]
+
+
+def test_merge_ignores_staging_rows_without_date(warehouse):
+    df = _frame(["2024-01-01", None], 11, [1.0, 2.0])
+    assert load_df_to_staging_table(df, "p", "ds", "stg")
+    assert merge_data_to_final_table("p", "ds", "stg", "final")
+    assert merge_data_to_final_table("p", "ds", "stg", "final")
+
+    assert warehouse.read_table("ds", "final")["valor_serie"].tolist() == [1.0]
+
+
+def test_overwrite_partitions_keeps_other_series(warehouse):
+    seed = pd.concat([_frame(["2024-01-01", "2024-01-02"], 11, [1.0, 2.0]), _frame(["2024-01-01"], 1, [4.95])])
+    assert overwrite_final_table_partitions(seed, "p", "ds", "final")
+    assert overwrite_final_table_partitions(_frame(["2024-01-01"], 11, [1.5]), "p", "ds", "final")
+
+    final = warehouse.read_table("ds", "final").sort_values(["codigo_serie", "data_referencia"])
+    assert final[["codigo_serie", "valor_serie"]].values.tolist() == [[1, 4.95], [11, 1.5], [11, 2.0]]
+
+
+def test_watermarks_empty_without_final_table(warehouse):
+    assert get_series_watermarks("p", "ds", "inexistente") == {}
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+def test_bcb_pipeline_runs_end_to_end_on_local_backend(mock_fetch, warehouse):
+    mock_fetch.return_value = pd.DataFrame({"data": ["01/01/2024", "02/01/2024"], "valor": ["13,65", "13,70"]})
+
+    assert run_full_bcb_pipeline_for_series("selic_diaria", 11, "01/01/2024", "31/01/2024") is True
+
+    final = warehouse.read_table("dados_publicos_bcb", "bcb_selic_diaria")
+    assert len(final) == 2
+    assert not warehouse.table_exists("dados_publicos_bcb", "bcb_selic_diaria_staging")
+
+
+def _ibge_frame(localities, values):
+    return pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01"] * len(localities)),
+        "codigo_agregado": "1737",
+        "codigo_serie": 63,
+        "nome_variavel_principal": "IPCA",
+        "valor_serie": values,
+        "unidade_medida": "%",
+        "localidade_codigo": localities,
+        "localidade_nome": [f"Município {code}" for code in localities],
+    })
+
+
+def test_ibge_merge_keeps_every_locality(warehouse):
+    assert load_df_to_staging_table(_ibge_frame(["3304557", "3550308"], [0.4, 0.5]), "p", "ds", "stg", pipeline="ibge")
+    assert merge_data_to_final_table("p", "ds", "stg", "final", pipeline="ibge")
+    assert load_df_to_staging_table(_ibge_frame(["3550308"], [0.6]), "p", "ds", "stg", pipeline="ibge")
+    assert merge_data_to_final_table("p", "ds", "stg", "final", pipeline="ibge")
+
+    final = warehouse.read_table("ds", "final").sort_values("localidade_codigo")
+    assert final["valor_serie"].tolist() == [0.4, 0.6]
+    assert final["localidade_nome"].tolist() == ["Município 3304557", "Município 3550308"]
+
+
+def _create_legacy_ibge_table(warehouse):
+    """Tabela ibge_* como era criada antes do registro de esquemas (layout do BCB)."""
+    warehouse.ensure_dataset("ds")
+    with warehouse._connect() as conn:
+        conn.execute(
+            'CREATE TABLE "ds.final" (data_referencia TEXT, codigo_serie INTEGER, valor_serie REAL, '
+            "PRIMARY KEY (data_referencia, codigo_serie))"
+        )
+        conn.executemany(
+            'INSERT INTO "ds.final" VALUES (?, ?, ?)', [("2023-12-01", 63, 0.5), ("2024-01-01", 63, 0.9)]
+        )
+
+
+def test_ibge_merge_migrates_legacy_table(warehouse):
+    _create_legacy_ibge_table(warehouse)
+
+    assert load_df_to_staging_table(_ibge_frame(["3304557", "3550308"], [0.4, 0.5]), "p", "ds", "stg", pipeline="ibge")
+    assert merge_data_to_final_table("p", "ds", "stg", "final", pipeline="ibge")
+    assert merge_data_to_final_table("p", "ds", "stg", "final", pipeline="ibge")
+
+    final = warehouse.read_table("ds", "final").sort_values(["data_referencia", "localidade_codigo"])
+    assert final["data_referencia"].dt.strftime("%Y-%m-%d").tolist() == ["2023-12-01", "2024-01-01", "2024-01-01"]
+    assert final["localidade_codigo"].tolist()[1:] == ["3304557", "3550308"]
+    assert pd.isna(final["localidade_codigo"].iloc[0])
+    assert final["valor_serie"].tolist() == [0.5, 0.4, 0.5]
+
+
+def test_ibge_overwrite_migrates_legacy_table(warehouse):
+    _create_legacy_ibge_table(warehouse)
+
+    assert overwrite_final_table_partitions(_ibge_frame(["3304557", "3550308"], [0.4, 0.5]), "p", "ds", "final", pipeline="ibge")
+
+    final = warehouse.read_table("ds", "final")
+    assert len(final) == 3
+    assert final.loc[final["localidade_codigo"].notna(), "valor_serie"].sort_values().tolist() == [0.4, 0.5]
+
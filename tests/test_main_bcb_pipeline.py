@@ -1,8 +1,21 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import pandas as pd
+from datetime import date, datetime
 
-from src.bcb_pipeline.main_bcb import run_full_bcb_pipeline_for_series
+from src.common.fingerprint import FingerprintStore
+from src.bcb_pipeline.main_bcb import (
+    BCB_BATCH_STAGING_ID,
+    SERIES_TO_PROCESS,
+    run_all_bcb_pipelines,
+    run_bcb_backfill,
+    run_bcb_pipeline_for_serie,
+    run_bcb_pipelines_batched,
+    reload_bcb_batch_from_landing,
+    reload_bcb_series_from_landing,
+    resolve_incremental_start_date,
+    run_full_bcb_pipeline_for_series,
+)
 
 
 @pytest.fixture
@@ -18,9 +31,9 @@ def sample_transformed_df():
 @patch("src.bcb_pipeline.main_bcb.transform_bcb_data")
 @patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
 @patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
-@patch("src.bcb_pipeline.main_bcb.bigquery.Client")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
 def test_pipeline_success(
-    mock_bq_client,
+    mock_delete,
     mock_merge,
     mock_staging,
     mock_transform,
@@ -32,7 +45,7 @@ def test_pipeline_success(
     mock_transform.return_value = sample_transformed_df
     mock_staging.return_value = True
     mock_merge.return_value = True
-    mock_bq_client.return_value = MagicMock()
+    mock_delete.return_value = True
 
     result = run_full_bcb_pipeline_for_series(
         series_name="selic_diaria",
@@ -42,6 +55,7 @@ def test_pipeline_success(
     )
 
     assert result is True
+    mock_delete.assert_called_once()
 
 
 @patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
@@ -58,6 +72,34 @@ def test_pipeline_empty_extraction(mock_fetch):
     assert result is True
 
 
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+def test_pipeline_extraction_failure_fails_the_series(mock_staging, mock_fetch):
+    mock_fetch.return_value = None
+
+    assert run_bcb_pipeline_for_serie({"name": "selic_diaria", "code": 11}, "01/01/2024", "31/01/2024") is False
+    mock_staging.assert_not_called()
+
+
+@patch("src.bcb_pipeline.main_bcb._extract_series_async")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
+def test_async_extraction_failure_fails_only_that_series(
+    mock_delete, mock_merge, mock_staging, mock_extract_async, monkeypatch
+):
+    series = [{"name": "selic_diaria", "code": 11}, {"name": "dolar_ptax_venda", "code": 1}]
+    monkeypatch.setattr("src.bcb_pipeline.main_bcb.SERIES_TO_PROCESS", series)
+    mock_extract_async.return_value = [None, pd.DataFrame({"data": ["02/01/2024"], "valor": ["4,89"]})]
+    mock_staging.return_value = True
+    mock_merge.return_value = True
+
+    result = run_all_bcb_pipelines("01/01/2024", "31/01/2024", async_extract=True)
+
+    assert result == {"selic_diaria": False, "dolar_ptax_venda": True}
+    mock_staging.assert_called_once()
+
+
 @patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
 @patch("src.bcb_pipeline.main_bcb.transform_bcb_data")
 def test_pipeline_empty_transformation(mock_transform, mock_fetch):
@@ -123,3 +165,267 @@ def test_pipeline_merge_fail(mock_merge, mock_staging, mock_transform, mock_fetc
     )
 
     assert result is False
+
+
+@patch("src.bcb_pipeline.main_bcb.run_full_bcb_pipeline_for_series")
+def test_run_all_reports_per_series_results(mock_run_series):
+    mock_run_series.side_effect = lambda name, code, start, end, **kwargs: name != "dolar_ptax_venda"
+
+    result = run_all_bcb_pipelines("01/01/2024", "31/01/2024", max_workers=3)
+
+    assert list(result) == [serie["name"] for serie in SERIES_TO_PROCESS]
+    assert result["dolar_ptax_venda"] is False
+    assert all(ok for name, ok in result.items() if name != "dolar_ptax_venda")
+    assert mock_run_series.call_count == len(SERIES_TO_PROCESS)
+
+
+@patch("src.bcb_pipeline.main_bcb.run_full_bcb_pipeline_for_series")
+def test_run_all_isolates_unexpected_errors(mock_run_series):
+    def run_series(name, code, start, end, **kwargs):
+        if code == 11:
+            raise RuntimeError("falha inesperada")
+        return True
+
+    mock_run_series.side_effect = run_series
+
+    result = run_all_bcb_pipelines("01/01/2024", "31/01/2024", max_workers=1)
+
+    assert result["selic_diaria"] is False
+    assert result["saldo_credito_pf"] is True
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
+def test_batched_single_staging_load_and_merge_per_table(mock_delete, mock_merge, mock_staging, mock_fetch):
+    series = [
+        {"name": "selic_diaria", "code": 11},
+        {"name": "dolar_ptax_venda", "code": 1},
+        {"name": "sem_dados", "code": 999},
+    ]
+    raw = pd.DataFrame({"data": ["01/01/2024", "02/01/2024"], "valor": ["1,0", "2,0"]})
+    mock_fetch.side_effect = lambda code, start, end: pd.DataFrame() if code == 999 else raw
+    mock_staging.return_value = True
+    mock_merge.side_effect = lambda *args, **kwargs: kwargs["series_codes"] != [1]
+
+    result = run_bcb_pipelines_batched(series, "01/01/2024", "31/01/2024", max_workers=2)
+
+    assert result == {"selic_diaria": True, "dolar_ptax_venda": False, "sem_dados": True}
+    mock_staging.assert_called_once()
+    df_lote = mock_staging.call_args.args[0]
+    assert sorted(df_lote["codigo_serie"].unique().tolist()) == [1, 11]
+    assert mock_staging.call_args.args[3] == BCB_BATCH_STAGING_ID
+    assert mock_merge.call_count == 2
+    assert {call.args[3] for call in mock_merge.call_args_list} == {"bcb_selic_diaria", "bcb_dolar_ptax_venda"}
+    mock_delete.assert_called_once()
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+def test_batched_staging_failure_marks_loaded_series_failed(mock_merge, mock_staging, mock_fetch):
+    series = [{"name": "selic_diaria", "code": 11}, {"name": "sem_dados", "code": 999}]
+    raw = pd.DataFrame({"data": ["01/01/2024"], "valor": ["1,0"]})
+    mock_fetch.side_effect = lambda code, start, end: pd.DataFrame() if code == 999 else raw
+    mock_staging.return_value = False
+
+    result = run_bcb_pipelines_batched(series, "01/01/2024", "31/01/2024", max_workers=1)
+
+    assert result == {"selic_diaria": False, "sem_dados": True}
+    mock_merge.assert_not_called()
+
+
+@patch("src.bcb_pipeline.main_bcb.get_series_watermarks")
+def test_incremental_start_date_uses_watermark_minus_lookback(mock_watermarks):
+    mock_watermarks.return_value = {11: date(2024, 3, 10)}
+
+    start = resolve_incremental_start_date("selic_diaria", 11, "01/01/2024", revision_lookback_days=5)
+
+    assert start == "05/03/2024"
+
+
+@patch("src.bcb_pipeline.main_bcb.get_series_watermarks")
+def test_incremental_start_date_falls_back_without_watermark(mock_watermarks):
+    mock_watermarks.return_value = {}
+
+    assert resolve_incremental_start_date("selic_diaria", 11, "01/01/2024") == "01/01/2024"
+
+
+@patch("src.bcb_pipeline.main_bcb.get_series_watermarks")
+@patch("src.bcb_pipeline.main_bcb.run_full_bcb_pipeline_for_series")
+def test_run_all_incremental_passes_per_series_start(mock_run_series, mock_watermarks):
+    mock_watermarks.side_effect = lambda project, dataset, table, client=None: (
+        {11: date(2024, 1, 20)} if table == "bcb_selic_diaria" else {}
+    )
+    mock_run_series.return_value = True
+
+    run_all_bcb_pipelines("01/01/2024", "31/01/2024", max_workers=1, incremental=True, revision_lookback_days=7)
+
+    starts = {call.args[0]: call.args[2] for call in mock_run_series.call_args_list}
+    assert starts["selic_diaria"] == "13/01/2024"
+    assert starts["dolar_ptax_venda"] == "01/01/2024"
+
+
+@patch("src.bcb_pipeline.main_bcb.run_full_bcb_pipeline_for_series")
+def test_backfill_uses_chunked_extraction(mock_run_series):
+    mock_run_series.return_value = True
+
+    run_bcb_backfill(end_date="31/12/2024", max_workers=1)
+
+    for call in mock_run_series.call_args_list:
+        assert call.args[2] == "01/01/1986"
+        assert call.kwargs["chunked"] is True
+    partition_types = {call.args[0]: call.kwargs["partition_type"] for call in mock_run_series.call_args_list}
+    assert partition_types["selic_diaria"] == "MONTH"
+    assert partition_types["selic_acumulada_mes"] == "DAY"
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.load_parquet_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
+def test_pipeline_loads_from_landing_zone(
+    mock_delete, mock_merge, mock_load_parquet, mock_load_df, mock_fetch, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("LANDING_ZONE_DIR", str(tmp_path))
+    mock_fetch.return_value = pd.DataFrame({"data": ["01/01/2024"], "valor": ["13,65"]})
+    mock_load_parquet.return_value = True
+    mock_merge.return_value = True
+
+    assert run_full_bcb_pipeline_for_series("selic_diaria", 11, "01/01/2024", "31/01/2024") is True
+
+    mock_load_df.assert_not_called()
+    parquet_path = mock_load_parquet.call_args.args[0]
+    assert parquet_path.startswith(str(tmp_path / "bcb" / "selic_diaria" / "run_date="))
+
+    mock_load_parquet.reset_mock()
+    assert reload_bcb_series_from_landing("selic_diaria", date.today()) is True
+    mock_fetch.assert_called_once()
+    assert mock_load_parquet.call_args.args[0] == parquet_path
+
+
+def test_reload_without_landing_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("LANDING_ZONE_DIR", str(tmp_path))
+    assert reload_bcb_series_from_landing("selic_diaria", date(2024, 1, 1)) is False
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
+def test_pipeline_skips_bigquery_when_fingerprint_unchanged(
+    mock_delete, mock_merge, mock_staging, mock_fetch, tmp_path, monkeypatch
+):
+    monkeypatch.setattr("src.common.fingerprint._STORE", FingerprintStore(str(tmp_path / "fp.sqlite")))
+    monkeypatch.setattr("src.common.fingerprint._STORE_CONFIGURED", True)
+    mock_fetch.return_value = pd.DataFrame({"data": ["01/01/2024"], "valor": ["13,65"]})
+    mock_staging.return_value = True
+    mock_merge.return_value = True
+
+    assert run_full_bcb_pipeline_for_series("selic_diaria", 11, "01/01/2024", "31/01/2024") is True
+    assert run_full_bcb_pipeline_for_series("selic_diaria", 11, "01/01/2024", "01/02/2024") is True
+    mock_staging.assert_called_once()
+    mock_merge.assert_called_once()
+
+    mock_fetch.return_value = pd.DataFrame({"data": ["01/01/2024"], "valor": ["13,70"]})
+    assert run_full_bcb_pipeline_for_series("selic_diaria", 11, "01/01/2024", "01/02/2024") is True
+    assert mock_staging.call_count == 2
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
+def test_fingerprint_skip_survives_the_moving_default_window(
+    mock_delete, mock_merge, mock_staging, mock_fetch, tmp_path, monkeypatch
+):
+    store = FingerprintStore(str(tmp_path / "fp.sqlite"))
+    monkeypatch.setattr("src.common.fingerprint._STORE", store)
+    monkeypatch.setattr("src.common.fingerprint._STORE_CONFIGURED", True)
+    # Série mensal: duas execuções diárias seguidas trazem o mesmo conteúdo com janelas diferentes
+    mock_fetch.return_value = pd.DataFrame({"data": ["01/02/2024", "01/03/2024"], "valor": ["4,2", "4,3"]})
+    mock_staging.return_value = True
+    mock_merge.return_value = True
+    serie = {"name": "inadimplencia", "code": 21082}
+
+    for today in (datetime(2024, 4, 10), datetime(2024, 4, 11)):
+        with patch("src.bcb_pipeline.main_bcb.datetime") as mock_datetime:
+            mock_datetime.today.return_value = today
+            assert run_bcb_pipeline_for_serie(serie) is True
+
+    assert mock_fetch.call_args_list[0].args[1] != mock_fetch.call_args_list[1].args[1]
+    mock_staging.assert_called_once()
+    with store._connect() as conn:
+        assert conn.execute("SELECT key FROM fingerprints").fetchall() == [("bcb:inadimplencia:janela",)]
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_df_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.overwrite_final_table_partitions")
+def test_pipeline_partition_overwrite_strategy_skips_staging(mock_overwrite, mock_merge, mock_staging, mock_fetch):
+    mock_fetch.return_value = pd.DataFrame({"data": ["01/01/2024"], "valor": ["13,65"]})
+    mock_overwrite.return_value = True
+
+    assert run_full_bcb_pipeline_for_series(
+        "selic_diaria", 11, "01/01/2024", "31/01/2024", load_strategy="partition_overwrite"
+    ) is True
+    mock_overwrite.assert_called_once()
+    assert mock_overwrite.call_args.args[3] == "bcb_selic_diaria"
+    mock_staging.assert_not_called()
+    mock_merge.assert_not_called()
+
+
+@patch("src.bcb_pipeline.main_bcb.get_series_watermarks")
+@patch("src.bcb_pipeline.main_bcb.run_full_bcb_pipeline_for_series")
+def test_single_serie_entry_point_resolves_window(mock_run_series, mock_watermarks):
+    mock_run_series.return_value = True
+    mock_watermarks.return_value = {11: date(2024, 3, 10)}
+
+    serie = {"name": "selic_diaria", "code": 11, "load_strategy": "partition_overwrite"}
+    assert run_bcb_pipeline_for_serie(serie, "01/01/2024", "31/03/2024", incremental=True) is True
+
+    args, kwargs = mock_run_series.call_args
+    assert args == ("selic_diaria", 11, "03/03/2024", "31/03/2024")
+    assert kwargs["load_strategy"] == "partition_overwrite"
+
+
+@patch("src.bcb_pipeline.main_bcb.fetch_bcb_series_data")
+@patch("src.bcb_pipeline.main_bcb.load_parquet_to_staging_table")
+@patch("src.bcb_pipeline.main_bcb.merge_data_to_final_table")
+@patch("src.bcb_pipeline.main_bcb.delete_staging_table")
+def test_batched_run_can_be_reloaded_from_landing(
+    mock_delete, mock_merge, mock_load_parquet, mock_fetch, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("LANDING_ZONE_DIR", str(tmp_path))
+    series = [{"name": "selic_diaria", "code": 11}, {"name": "dolar_ptax_venda", "code": 1}]
+    monkeypatch.setattr("src.bcb_pipeline.main_bcb.SERIES_TO_PROCESS", series)
+    mock_fetch.return_value = pd.DataFrame({"data": ["02/01/2024"], "valor": ["4,89"]})
+    mock_load_parquet.return_value = True
+    mock_merge.return_value = True
+
+    assert run_bcb_pipelines_batched(series, "01/01/2024", "31/01/2024", max_workers=1) == {
+        "selic_diaria": True, "dolar_ptax_venda": True
+    }
+    batch_path = mock_load_parquet.call_args.args[0]
+    assert batch_path.startswith(str(tmp_path / "bcb" / "lote" / "run_date="))
+
+    mock_load_parquet.reset_mock()
+    mock_merge.reset_mock()
+    assert reload_bcb_batch_from_landing(date.today()) == {"selic_diaria": True, "dolar_ptax_venda": True}
+    mock_load_parquet.assert_called_once()
+    assert mock_load_parquet.call_args.args[3] == BCB_BATCH_STAGING_ID
+    merges = {call.args[3]: call.kwargs["series_codes"] for call in mock_merge.call_args_list}
+    assert merges == {"bcb_selic_diaria": [11], "bcb_dolar_ptax_venda": [1]}
+
+    mock_merge.reset_mock()
+    assert reload_bcb_series_from_landing("dolar_ptax_venda", date.today()) is True
+    assert mock_load_parquet.call_args.args[0] == batch_path
+    assert mock_merge.call_args.args[3] == "bcb_dolar_ptax_venda"
+    assert mock_merge.call_args.kwargs["series_codes"] == [1]
+
+    mock_merge.reset_mock()
+    assert reload_bcb_series_from_landing("lote", date.today()) is False
+    mock_merge.assert_not_called()
@@ -1,7 +1,12 @@
 import pytest
+import requests
 import pandas as pd
 from unittest.mock import patch, MagicMock
-from src.ibge_pipeline.main_ibge import run_full_ibge_pipeline_for_indicator
+from src.ibge_pipeline.main_ibge import (
+    IBGE_INDICATORS_TO_PROCESS,
+    run_all_ibge_pipelines,
+    run_full_ibge_pipeline_for_indicator,
+)
 
 
 @pytest.fixture
@@ -18,6 +23,13 @@ def sample_transformed_df():
     })
 
 
+@pytest.fixture(autouse=True)
+def mock_period_type():
+    """Metadados do agregado sem rede: periodicidade mensal, a menos que o teste mude."""
+    with patch("src.ibge_pipeline.main_ibge.fetch_ibge_period_type", return_value="mensal") as mock_fetch_period:
+        yield mock_fetch_period
+
+
 @pytest.fixture
 def indicator_config():
     return {
@@ -34,9 +46,9 @@ def indicator_config():
 @patch("src.ibge_pipeline.main_ibge.transform_ibge_data")
 @patch("src.ibge_pipeline.main_ibge.load_df_to_staging_table")
 @patch("src.ibge_pipeline.main_ibge.merge_data_to_final_table")
-@patch("src.ibge_pipeline.main_ibge.bigquery.Client")
+@patch("src.ibge_pipeline.main_ibge.delete_staging_table")
 def test_pipeline_success(
-    mock_bq_client,
+    mock_delete,
     mock_merge,
     mock_staging,
     mock_transform,
@@ -48,10 +60,41 @@ def test_pipeline_success(
     mock_transform.return_value = sample_transformed_df
     mock_staging.return_value = True
     mock_merge.return_value = True
-    mock_bq_client.return_value = MagicMock()
+    mock_delete.return_value = True
 
     result = run_full_ibge_pipeline_for_indicator(indicator_config)
     assert result is True
+    assert mock_fetch.call_args.kwargs["classification_filter"] is None
+
+
+@patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data")
+def test_pipeline_passes_classification_filter(mock_fetch, indicator_config):
+    mock_fetch.return_value = pd.DataFrame()
+
+    config = {**indicator_config, "classification_filter": "315[7169]", "period_type": "mensal"}
+    assert run_full_ibge_pipeline_for_indicator(config) is True
+
+    assert mock_fetch.call_args.kwargs["classification_filter"] == "315[7169]"
+    assert mock_fetch.call_args.kwargs["period_type"] == "mensal"
+
+
+@patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data")
+def test_pipeline_reads_period_type_from_metadata(mock_fetch, mock_period_type, indicator_config):
+    mock_fetch.return_value = pd.DataFrame()
+    mock_period_type.return_value = "trimestral"
+
+    assert run_full_ibge_pipeline_for_indicator(indicator_config) is True
+
+    mock_period_type.assert_called_once_with("1737")
+    assert mock_fetch.call_args.kwargs["period_type"] == "trimestral"
+
+
+@patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data")
+def test_pipeline_fails_without_period_type(mock_fetch, mock_period_type, indicator_config):
+    mock_period_type.return_value = None
+
+    assert run_full_ibge_pipeline_for_indicator(indicator_config) is False
+    mock_fetch.assert_not_called()
 
 
 @patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data")
@@ -61,6 +104,24 @@ def test_pipeline_empty_extraction(mock_fetch, indicator_config):
     assert result is True
 
 
+@patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data")
+@patch("src.ibge_pipeline.main_ibge.load_df_to_staging_table")
+def test_pipeline_extraction_failure(mock_staging, mock_fetch, indicator_config):
+    mock_fetch.return_value = None
+
+    assert run_full_ibge_pipeline_for_indicator(indicator_config) is False
+    assert run_full_ibge_pipeline_for_indicator(indicator_config, df_raw=None, extracted=True) is False
+    assert mock_fetch.call_count == 1
+    mock_staging.assert_not_called()
+
+
+@patch("src.ibge_pipeline.extractor.http_get")
+def test_pipeline_stream_mode_request_failure(mock_get, indicator_config):
+    mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error")
+
+    assert run_full_ibge_pipeline_for_indicator({**indicator_config, "stream": True}) is False
+
+
 @patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data")
 @patch("src.ibge_pipeline.main_ibge.transform_ibge_data")
 def test_pipeline_empty_transformation(mock_transform, mock_fetch, indicator_config):
@@ -94,4 +155,43 @@ def test_pipeline_merge_fail(mock_merge, mock_staging, mock_transform, mock_fetc
     mock_staging.return_value = True
     mock_merge.return_value = False
     result = run_full_ibge_pipeline_for_indicator(indicator_config)
-    assert result is False
\ No newline at end of file
+    assert result is False
+
+@patch("src.ibge_pipeline.main_ibge.run_full_ibge_pipeline_for_indicator")
+def test_run_all_reports_per_indicator_results(mock_run_indicator):
+    mock_run_indicator.side_effect = lambda config, **kwargs: config["aggregate_code"] != "5938"
+
+    result = run_all_ibge_pipelines(max_workers=2)
+
+    assert list(result) == [cfg["indicator_name_table"] for cfg in IBGE_INDICATORS_TO_PROCESS]
+    assert result["pib_anual_valores_correntes_brasil"] is False
+    assert result["ipca_variacao_mensal_brasil"] is True
+
+
+@patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data_batches")
+@patch("src.ibge_pipeline.main_ibge.load_df_to_staging_table")
+@patch("src.ibge_pipeline.main_ibge.merge_data_to_final_table")
+@patch("src.ibge_pipeline.main_ibge.delete_staging_table")
+def test_pipeline_stream_mode(mock_delete, mock_merge, mock_staging, mock_batches, indicator_config):
+    mock_batches.return_value = iter([
+        pd.DataFrame([{"D2C": "Mês", "V": "Valor"}, {"D2C": "202301", "V": "0.5"}]),
+        pd.DataFrame([{"D2C": "202302", "V": "0.8"}]),
+    ])
+    mock_staging.return_value = True
+    mock_merge.return_value = True
+
+    result = run_full_ibge_pipeline_for_indicator({**indicator_config, "stream": True})
+
+    assert result is True
+    assert len(mock_staging.call_args.args[0]) == 2
+
+
+@patch("src.ibge_pipeline.main_ibge.fetch_ibge_aggregate_data_batches")
+def test_pipeline_stream_mode_midstream_failure(mock_batches, indicator_config):
+    def broken_stream(**kwargs):
+        yield pd.DataFrame([{"D2C": "Mês", "V": "Valor"}, {"D2C": "202301", "V": "0.5"}])
+        raise ValueError("JSON truncado")
+
+    mock_batches.side_effect = broken_stream
+
+    assert run_full_ibge_pipeline_for_indicator({**indicator_config, "stream": True}) is False
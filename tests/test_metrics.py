@@ -0,0 +1,147 @@
+import json
+import socket
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.common.concurrency import run_concurrently
+from src.common.local_warehouse import configure_local_warehouse
+from src.common.metrics import (
+    JsonLinesSink,
+    MetricsSink,
+    PrometheusTextfileSink,
+    StatsdSink,
+    build_sink,
+    configure_metrics_sinks,
+    record_bigquery_job,
+    record_bytes_downloaded,
+    stage,
+)
+
+
+class ListSink(MetricsSink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, metrics):
+        self.records.append(metrics)
+
+
+def test_sink_without_emit_fails_on_creation():
+    class IncompleteSink(MetricsSink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink()
+
+
+@pytest.fixture
+def sink():
+    collected = ListSink()
+    configure_metrics_sinks([collected])
+    yield collected
+    configure_metrics_sinks(None)
+
+
+def test_stage_records_duration_rows_and_jobs(sink):
+    job = MagicMock(job_id="job_123", total_bytes_processed=2048)
+    with stage("bcb", "selic_diaria", "merge") as metrics:
+        metrics.rows = 10
+        record_bigquery_job(job)
+
+    record = sink.records[0]
+    assert (record.pipeline, record.series, record.stage, record.status) == ("bcb", "selic_diaria", "merge", "ok")
+    assert record.rows == 10
+    assert record.job_ids == ["job_123"]
+    assert record.bytes_processed == 2048
+    assert record.duration_s >= 0
+
+
+def test_stage_marks_exceptions_as_failures(sink):
+    with pytest.raises(RuntimeError):
+        with stage("ibge", "ipca", "transform"):
+            raise RuntimeError("boom")
+    assert sink.records[0].status == "erro"
+
+
+def test_worker_threads_report_to_callers_stage(sink):
+    with stage("bcb", "selic_diaria", "extract"):
+        run_concurrently(record_bytes_downloaded, [100, 200, 300], max_workers=3)
+    assert sink.records[0].bytes_downloaded == 600
+
+
+def test_recording_outside_stage_is_noop(sink):
+    record_bytes_downloaded(100)
+    assert sink.records == []
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    configure_metrics_sinks([JsonLinesSink(str(path))])
+    try:
+        with stage("bcb", "selic_diaria", "extract"):
+            pass
+        with stage("bcb", "selic_diaria", "transform"):
+            pass
+    finally:
+        configure_metrics_sinks(None)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["stage"] for line in lines] == ["extract", "transform"]
+
+
+def test_prometheus_textfile_keeps_latest_value_per_stage(tmp_path):
+    path = tmp_path / "pipeline.prom"
+    configure_metrics_sinks([PrometheusTextfileSink(str(path))])
+    try:
+        for rows in (5, 7):
+            with stage("bcb", "selic_diaria", "extract") as metrics:
+                metrics.rows = rows
+    finally:
+        configure_metrics_sinks(None)
+
+    content = path.read_text()
+    assert 'pipeline_stage_rows{pipeline="bcb",series="selic_diaria",stage="extract"} 7' in content
+    assert content.count("pipeline_stage_rows{") == 1
+    assert "# TYPE pipeline_stage_duration_seconds gauge" in content
+
+
+def test_statsd_sink_sends_udp_datagram():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    configure_metrics_sinks([StatsdSink("127.0.0.1", receiver.getsockname()[1])])
+    try:
+        with stage("bcb", "selic_diaria", "merge") as metrics:
+            metrics.rows = 3
+        payload = receiver.recv(4096).decode("utf-8").splitlines()
+    finally:
+        configure_metrics_sinks(None)
+        receiver.close()
+
+    assert payload[0].startswith("pipeline.bcb.selic_diaria.merge.duration:")
+    assert "pipeline.bcb.selic_diaria.merge.rows:3|c" in payload
+
+
+def test_build_sink_from_spec(tmp_path):
+    assert isinstance(build_sink(f"jsonl:{tmp_path}/m.jsonl"), JsonLinesSink)
+    assert isinstance(build_sink(f"prometheus:{tmp_path}/m.prom"), PrometheusTextfileSink)
+    assert build_sink("statsd:localhost:9125").address == ("localhost", 9125)
+    with pytest.raises(ValueError):
+        build_sink("kafka:topic")
+
+
+def test_bcb_pipeline_reports_every_stage(fake_api, sink, tmp_path):
+    from src.bcb_pipeline.main_bcb import run_full_bcb_pipeline_for_series
+
+    configure_local_warehouse(str(tmp_path / "warehouse.sqlite"))
+    try:
+        assert run_full_bcb_pipeline_for_series("selic_diaria", 11, "01/01/2024", "31/01/2024") is True
+    finally:
+        configure_local_warehouse(None)
+
+    by_stage = {record.stage: record for record in sink.records}
+    assert list(by_stage) == ["extract", "transform", "stage_load", "merge", "cleanup"]
+    assert by_stage["extract"].rows == 31
+    assert by_stage["extract"].bytes_downloaded > 0
+    assert all(record.status == "ok" for record in sink.records)
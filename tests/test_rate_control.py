@@ -0,0 +1,231 @@
+import asyncio
+import logging
+
+import pytest
+import requests
+
+from src.bcb_pipeline.extractor import fetch_bcb_series_data, fetch_bcb_series_data_async
+from src.common import rate_control
+from src.common.async_http import AsyncHttpClient, run_async
+from src.common.http_client import _controlled_get
+from src.common.metrics import PrometheusTextfileSink, configure_metrics_sinks, stage
+from src.common.rate_control import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CIRCUIT_OPEN_SECONDS,
+    CircuitOpenError,
+    HostRateController,
+    configure_host_rate_limit,
+    get_host_controller,
+    get_rate_control_states,
+)
+from tests.test_metrics import ListSink
+
+
+@pytest.fixture
+def sink():
+    collected = ListSink()
+    configure_metrics_sinks([collected])
+    yield collected
+    configure_metrics_sinks(None)
+
+
+def _fail(controller: HostRateController, times: int) -> None:
+    for _ in range(times):
+        is_probe = controller.check_circuit()
+        controller.record_result(failed=True, is_probe=is_probe)
+
+
+def test_throttle_halves_rate_and_concurrency_once_per_interval():
+    controller = HostRateController("api.test", rate_per_second=10, burst=10, max_concurrency=8)
+
+    controller.on_throttle()
+    controller.on_throttle()
+
+    assert controller.rate_per_second == 5
+    assert controller.concurrency_limit == 4
+
+
+def test_successes_recover_up_to_the_ceiling(monkeypatch):
+    monkeypatch.setattr(rate_control, "RATE_CONTROL_DECREASE_INTERVAL_SECONDS", 0)
+    controller = HostRateController("api.test", rate_per_second=10, burst=10, max_concurrency=8)
+    for _ in range(3):
+        controller.on_throttle()
+    assert (controller.rate_per_second, controller.concurrency_limit) == (1.25, 1)
+
+    for _ in range(200):
+        controller.record_result(failed=False)
+
+    assert (controller.rate_per_second, controller.concurrency_limit) == (10, 8)
+
+
+def test_circuit_opens_after_consecutive_failures():
+    controller = HostRateController("api.test")
+    _fail(controller, CIRCUIT_FAILURE_THRESHOLD - 1)
+    controller.check_circuit()
+    controller.record_result(failed=False)
+    _fail(controller, CIRCUIT_FAILURE_THRESHOLD)
+
+    assert controller.circuit_state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpenError):
+        controller.check_circuit()
+
+
+def test_half_open_lets_a_single_probe_through():
+    controller = HostRateController("api.test")
+    _fail(controller, CIRCUIT_FAILURE_THRESHOLD)
+    controller.open_seconds = 0
+
+    controller.check_circuit()
+    assert controller.circuit_state == CIRCUIT_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        controller.check_circuit()
+
+    controller.record_result(failed=False)
+    assert controller.circuit_state == CIRCUIT_CLOSED
+    controller.check_circuit()
+
+
+def test_failed_probe_reopens_with_longer_wait():
+    controller = HostRateController("api.test")
+    _fail(controller, CIRCUIT_FAILURE_THRESHOLD)
+    controller._opened_at -= CIRCUIT_OPEN_SECONDS
+    assert controller.check_circuit()
+
+    controller.record_result(failed=True, is_probe=True)
+
+    assert controller.circuit_state == CIRCUIT_OPEN
+    assert controller.open_seconds == 2 * CIRCUIT_OPEN_SECONDS
+    controller._opened_at -= CIRCUIT_OPEN_SECONDS
+    with pytest.raises(CircuitOpenError):
+        controller.check_circuit()
+
+
+def test_request_started_before_the_circuit_opened_does_not_decide_the_probe():
+    controller = HostRateController("api.test")
+    straggler = controller.check_circuit()
+    _fail(controller, CIRCUIT_FAILURE_THRESHOLD)
+    controller._opened_at -= CIRCUIT_OPEN_SECONDS
+    probe = controller.check_circuit()
+    assert (straggler, probe) == (False, True)
+
+    controller.record_result(failed=True, is_probe=straggler)
+
+    assert controller.circuit_state == CIRCUIT_HALF_OPEN
+    assert controller.open_seconds == CIRCUIT_OPEN_SECONDS
+    with pytest.raises(CircuitOpenError):
+        controller.check_circuit()
+    controller.record_result(failed=False, is_probe=probe)
+    assert controller.circuit_state == CIRCUIT_CLOSED
+
+
+def test_sync_requests_stop_once_the_circuit_opens(fake_api, sink, caplog):
+    fake_api.config.fail_first = 1000
+    attempts_per_request = 5
+
+    with caplog.at_level(logging.WARNING):
+        for code in range(CIRCUIT_FAILURE_THRESHOLD + 3):
+            with stage("bcb", f"serie_{code}", "extract"):
+                assert fetch_bcb_series_data(code, "01/01/2024", "10/01/2024") is None
+
+    assert fake_api.request_count == CIRCUIT_FAILURE_THRESHOLD * attempts_per_request
+    state = get_rate_control_states()["127.0.0.1"]
+    assert state["circuit_state"] == CIRCUIT_OPEN
+    assert state["rate_per_second"] < 1000
+    skipped = [record for record in sink.records if record.status == "ignorado"]
+    assert len(skipped) == 3
+    assert sink.records[0].throttled_requests >= 1
+    assert skipped[0].http_hosts["127.0.0.1"]["circuit_state"] == CIRCUIT_OPEN
+    assert not any(record.exc_info for record in caplog.records if "ignorada" in record.getMessage())
+
+
+def test_async_requests_share_the_circuit(fake_api):
+    fake_api.config.fail_first = 1000
+
+    async def _fetch_all():
+        async with AsyncHttpClient(backoff_factor=0, backoff_jitter=0) as client:
+            return [
+                await fetch_bcb_series_data_async(client, code, "01/01/2024", "10/01/2024")
+                for code in range(CIRCUIT_FAILURE_THRESHOLD + 2)
+            ]
+
+    frames = run_async(_fetch_all())
+
+    assert all(df is None for df in frames)
+    assert fake_api.request_count == CIRCUIT_FAILURE_THRESHOLD * 5
+    assert get_host_controller("127.0.0.1").circuit_state == CIRCUIT_OPEN
+    assert fetch_bcb_series_data(11, "01/01/2024", "10/01/2024") is None
+    assert fake_api.request_count == CIRCUIT_FAILURE_THRESHOLD * 5
+
+
+def test_sync_throttling_is_seen_on_every_attempt(fake_api):
+    fake_api.config.fail_first = 2
+    fake_api.config.fail_status = 429
+
+    assert len(fetch_bcb_series_data(11, "01/01/2024", "10/01/2024")) == 10
+
+    controller = get_host_controller("127.0.0.1")
+    assert controller.concurrency_limit < 8
+    assert controller.circuit_state == CIRCUIT_CLOSED
+
+
+def test_prometheus_sink_exports_host_state(tmp_path):
+    path = tmp_path / "pipeline.prom"
+    configure_metrics_sinks([PrometheusTextfileSink(str(path))])
+    try:
+        controller = configure_host_rate_limit("api.bcb.gov.br", 10)
+        with stage("bcb", "selic_diaria", "extract"):
+            controller.on_throttle()
+    finally:
+        configure_metrics_sinks(None)
+
+    text = path.read_text()
+    assert 'pipeline_stage_throttled_requests{pipeline="bcb",series="selic_diaria",stage="extract"} 1' in text
+    assert 'pipeline_http_host_rate_per_second{host="api.bcb.gov.br"} 5.0' in text
+    assert 'pipeline_http_host_circuit_state{host="api.bcb.gov.br"} 0' in text
+
+
+def _half_open(host: str) -> HostRateController:
+    controller = get_host_controller(host)
+    _fail(controller, CIRCUIT_FAILURE_THRESHOLD)
+    controller.open_seconds = 0
+    return controller
+
+
+class _BrokenSession:
+    def get(self, url, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("corpo interrompido")
+
+
+def test_probe_raising_any_error_counts_as_failure():
+    controller = _half_open("api.test")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        _controlled_get(_BrokenSession(), "http://api.test/dados")
+
+    assert controller.circuit_state == CIRCUIT_OPEN
+    assert not controller._probe_in_flight
+    controller._opened_at -= controller.open_seconds
+    controller.check_circuit()
+
+
+def test_cancelled_async_probe_releases_the_circuit(fake_api):
+    fake_api.config.latency_seconds = 1
+    controller = _half_open("127.0.0.1")
+
+    async def _cancel_probe():
+        async with AsyncHttpClient(backoff_factor=0, backoff_jitter=0) as client:
+            probe = asyncio.ensure_future(client.get(fake_api.bcb_url.format(series_code=11)))
+            await asyncio.sleep(0.1)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+    run_async(_cancel_probe())
+
+    assert controller.circuit_state == CIRCUIT_HALF_OPEN
+    assert not controller._probe_in_flight
+    controller.check_circuit()
+
@@ -0,0 +1,60 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.common.schemas import BCB_SCHEMA, IBGE_SCHEMA, get_table_schema
+
+
+def test_bcb_to_arrow_uses_exact_types():
+    df = pd.DataFrame({
+        "valor_serie": [1.5, None],
+        "codigo_serie": pd.Series([11, 11], dtype="int32"),
+        "data_referencia": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+    })
+
+    table = BCB_SCHEMA.to_arrow(df)
+
+    assert table.schema == BCB_SCHEMA.arrow_schema
+    assert table.schema.names == ["data_referencia", "codigo_serie", "valor_serie"]
+    assert table.column("valor_serie").null_count == 1
+
+
+def test_ibge_to_arrow_converts_categories_and_numeric_codes_to_string():
+    df = pd.DataFrame({
+        "data_referencia": pd.to_datetime(["2024-01-01"]),
+        "codigo_agregado": pd.Series(["1737"], dtype="category"),
+        "codigo_serie": [63],
+        "nome_variavel_principal": pd.Series(["IPCA"], dtype="category"),
+        "valor_serie": [0.42],
+        "unidade_medida": "%",
+        "localidade_codigo": [3304557],
+        "localidade_nome": pd.Series(["Rio de Janeiro"], dtype="string"),
+    })
+
+    table = IBGE_SCHEMA.to_arrow(df)
+
+    assert table.schema == IBGE_SCHEMA.arrow_schema
+    assert table.column("localidade_codigo").to_pylist() == ["3304557"]
+
+
+def test_to_arrow_rejects_missing_columns():
+    with pytest.raises(ValueError, match="codigo_serie"):
+        BCB_SCHEMA.to_arrow(pd.DataFrame({"data_referencia": [pd.Timestamp("2024-01-01")], "valor_serie": [1.0]}))
+
+
+def test_to_arrow_rejects_fractional_integer_codes():
+    df = pd.DataFrame({"data_referencia": [pd.Timestamp("2024-01-01")], "codigo_serie": [1.5], "valor_serie": [1.0]})
+
+    with pytest.raises(pa.ArrowInvalid):
+        BCB_SCHEMA.to_arrow(df)
+
+
+def test_update_columns_exclude_merge_keys():
+    assert BCB_SCHEMA.update_columns == ["valor_serie"]
+    assert "localidade_codigo" not in IBGE_SCHEMA.update_columns
+
+
+def test_unknown_pipeline_schema():
+    assert get_table_schema("ibge") is IBGE_SCHEMA
+    with pytest.raises(ValueError, match="desconhecido"):
+        get_table_schema("ipea")